@@ -0,0 +1,72 @@
+"""Parámetros de balance de la colonia.
+
+Reúne los números que el equipo de balance quiere barrer y que antes estaban
+escritos en el código: bandas de daño por frío, consumo de carbón para
+calefacción, ritmo y eficiencia de la producción, plazas por edificio y costes
+del menú de construcción.
+``Balance()`` reproduce exactamente los valores originales; ``from_dict``
+acepta las mismas claves que ``to_dict`` (tipos de edificio y recursos por
+nombre, p. ej. ``{'max_workers': {'COAL_MINE': 4}}``), así que un conjunto de
+parámetros se puede guardar en JSON y enviar a otro proceso.
+"""
+import math
+from typing import Dict, Optional, Sequence, Tuple
+
+# (temperatura mínima, máxima, periodo en frames, daño de salud, pérdida de energía)
+COLD_BANDS: Tuple[Tuple[float, float, int, float, float], ...] = (
+    (5, 14, 120, 5, 2),             # Frío
+    (-15, 4, 180, 10, 5),           # Muy frío
+    (-math.inf, -16, 120, 15, 8),   # Extremo
+)
+
+class Balance:
+    def __init__(self, cold_bands: Sequence[Sequence[float]] = COLD_BANDS, heating_coal: int = 1,
+                 heating_period: int = 300, heating_below: int = -5,
+                 production_period: int = 60, cold_efficiency: float = 0.5, cold_production_below: int = -5,
+                 max_workers: Optional[Dict[str, int]] = None,
+                 build_costs: Optional[Dict[str, Dict[str, int]]] = None):
+        self.cold_bands = tuple(tuple(band) for band in cold_bands)
+        self.heating_coal = heating_coal        # Carbón por edificio con calefacción
+        self.heating_period = heating_period    # Cada cuántos frames se consume
+        self.heating_below = heating_below      # Solo por debajo de esta temperatura
+        # Cada production_period frames un trabajador produce 1 unidad (cold_efficiency en
+        # edificios con calefacción por debajo de cold_production_below)
+        self.production_period = production_period
+        self.cold_efficiency = cold_efficiency
+        self.cold_production_below = cold_production_below
+        # Sustituciones sobre los valores por defecto de Building y BuildMenu
+        self.max_workers = dict(max_workers or {})
+        self.build_costs = {kind: dict(cost) for kind, cost in (build_costs or {}).items()}
+
+    def cold_band(self, temperature: float) -> Optional[Tuple[int, float, float]]:
+        """(periodo, daño de salud, pérdida de energía) para una temperatura, o None si no hace daño"""
+        for low, high, period, health_loss, energy_loss in self.cold_bands:
+            if low <= temperature <= high:
+                return (period, health_loss, energy_loss)
+        return None
+
+    def to_dict(self) -> Dict:
+        return {
+            'cold_bands': [[None if math.isinf(v) else v for v in band] for band in self.cold_bands],
+            'heating_coal': self.heating_coal,
+            'heating_period': self.heating_period,
+            'heating_below': self.heating_below,
+            'production_period': self.production_period,
+            'cold_efficiency': self.cold_efficiency,
+            'cold_production_below': self.cold_production_below,
+            'max_workers': dict(self.max_workers),
+            'build_costs': {kind: dict(cost) for kind, cost in self.build_costs.items()},
+        }
+
+    @classmethod
+    def from_dict(cls, data: Optional[Dict]) -> "Balance":
+        """Balance con los valores por defecto salvo las claves presentes en ``data``"""
+        data = dict(data or {})
+        unknown = set(data) - set(cls().to_dict())
+        if unknown:
+            raise ValueError(f"Parámetros de balance desconocidos: {', '.join(sorted(unknown))}")
+        if 'cold_bands' in data:
+            # JSON no tiene infinito: null como límite abierto
+            data['cold_bands'] = [tuple(-math.inf if i == 0 and v is None else math.inf if v is None else v
+                                        for i, v in enumerate(band)) for band in data['cold_bands']]
+        return cls(**data)
@@ -0,0 +1,221 @@
+"""Barridos de balance: muchas colonias headless repartidas en un pool de procesos.
+
+Cada trabajo es una colonia (conjunto de parámetros de ``Balance`` + semilla)
+que se simula en un proceso del ``ProcessPoolExecutor`` hasta ``days`` días o
+hasta que no queda ningún trabajador vivo. Los procesos no comparten nada y
+solo devuelven un diccionario pequeño, así que el rendimiento crece con el
+número de núcleos.
+
+Los resultados se escriben en un JSONL a medida que terminan (una línea por
+colonia, con ``flush``). Al relanzar el mismo barrido con el mismo fichero de
+salida se saltan los trabajos que ya tienen línea, así que un barrido
+interrumpido continúa donde se quedó.
+
+Parámetros:
+
+- ``--grid barrido.json``: producto cartesiano de listas de valores, con claves
+  con puntos para los diccionarios de ``Balance``, p. ej.
+  ``{"heating_coal": [1, 2], "max_workers.COAL_MINE": [2, 3, 4]}``.
+- ``--params conjuntos.jsonl``: un conjunto de parámetros por línea.
+
+Uso:
+    python batch.py --grid barrido.json --seeds 20 --days 10 --output resultados.jsonl
+    python batch.py --params conjuntos.jsonl --jobs 8 --output resultados.jsonl
+    python batch.py --grid barrido.json --fast-forward --output resultados.jsonl
+    python batch.py --summarize resultados.jsonl
+"""
+import argparse
+import hashlib
+import itertools
+import json
+import os
+import sys
+import time
+from concurrent.futures import FIRST_COMPLETED, ProcessPoolExecutor, wait
+from typing import Dict, Iterable, Iterator, List, Optional, Sequence
+
+from balance import Balance
+
+TICKS_PER_HOUR = 6 * 60  # 10 minutos de juego por segundo a 60 FPS
+
+def expand_grid(grid: Dict[str, Sequence]) -> List[Dict]:
+    """Producto cartesiano de ``{clave: [valores]}``; 'a.b' se convierte en {'a': {'b': ...}}"""
+    keys = sorted(grid)
+    param_sets = []
+    for values in itertools.product(*(grid[key] for key in keys)):
+        params: Dict = {}
+        for key, value in zip(keys, values):
+            *parents, leaf = key.split('.')
+            target = params
+            for parent in parents:
+                target = target.setdefault(parent, {})
+            target[leaf] = value
+        param_sets.append(params)
+    return param_sets
+
+def params_id(params: Dict) -> str:
+    """Identificador estable de un conjunto de parámetros"""
+    return hashlib.sha1(json.dumps(params, sort_keys=True).encode()).hexdigest()[:12]
+
+def make_jobs(param_sets: Iterable[Dict], seeds: Sequence[int], days: int, workers: int,
+              fast_forward: bool = False) -> List[Dict]:
+    jobs = []
+    for params in param_sets:
+        Balance.from_dict(params)  # Validar antes de repartir
+        pid = params_id(params)
+        for seed in seeds:
+            jobs.append({'id': f"{pid}-{seed}", 'params_id': pid, 'params': params, 'seed': seed,
+                         'days': days, 'workers': workers, 'fast_forward': fast_forward})
+    return jobs
+
+def run_colony(job: Dict) -> Dict:
+    """Simular una colonia (se ejecuta en un proceso del pool)"""
+    from simulation import Simulation
+
+    simulation = Simulation(seed=job['seed'], workers=job['workers'], record_timeseries=False,
+                            balance=Balance.from_dict(job['params']), fast_forward=job.get('fast_forward', False))
+    state = simulation.game_state
+    collapsed = False
+    # Hora a hora para registrar el día del colapso; la muerte es definitiva, así que
+    # una colonia sin vivos no se recupera y se puede cortar ahí
+    for _ in range(job['days'] * 24):
+        simulation.step(TICKS_PER_HOUR)
+        if not state.living_workers():
+            collapsed = True
+            break
+    return {
+        'id': job['id'],
+        'params_id': job['params_id'],
+        'params': job['params'],
+        'seed': job['seed'],
+        'days': job['days'],
+        'final_day': state.day,
+        'final_hour': state.hour,
+        'collapsed': collapsed,
+        'workers': len(state.workers),
+        'workers_survived': state.living_workers(),
+        'resources': {resource.name: amount for resource, amount in state.resources.items()},
+        'ticks': simulation.ticks,
+        'elapsed_seconds': round(simulation.elapsed, 4),
+    }
+
+def read_results(path: str) -> List[Dict]:
+    """Resultados ya escritos (las líneas incompletas de una ejecución cortada se ignoran)"""
+    if not os.path.exists(path):
+        return []
+    results = []
+    with open(path) as f:
+        for line in f:
+            try:
+                results.append(json.loads(line))
+            except json.JSONDecodeError:
+                continue
+    return results
+
+def run_batch(jobs: Sequence[Dict], output: Optional[str] = None, processes: Optional[int] = None) -> Iterator[Dict]:
+    """Repartir los trabajos en el pool y devolver cada resultado en cuanto termina.
+
+    Con ``output`` se omiten los trabajos que ya están en el fichero y cada
+    resultado nuevo se añade al final.
+    """
+    done = {result['id'] for result in read_results(output)} if output else set()
+    pending = iter([job for job in jobs if job['id'] not in done])
+    processes = processes or os.cpu_count() or 1
+    sink = open(output, 'a') if output else None
+    try:
+        with ProcessPoolExecutor(max_workers=processes) as executor:
+            # Pocos trabajos en vuelo por proceso: la memoria no crece con el tamaño del barrido
+            in_flight = {executor.submit(run_colony, job) for job in itertools.islice(pending, processes * 2)}
+            while in_flight:
+                finished, in_flight = wait(in_flight, return_when=FIRST_COMPLETED)
+                for future in finished:
+                    result = future.result()
+                    if sink is not None:
+                        sink.write(json.dumps(result) + '\n')
+                        sink.flush()
+                    yield result
+                in_flight |= {executor.submit(run_colony, job)
+                              for job in itertools.islice(pending, len(finished))}
+    finally:
+        if sink is not None:
+            sink.close()
+
+def summarize(results: Iterable[Dict]) -> List[Dict]:
+    """Métricas de supervivencia por conjunto de parámetros, de mejor a peor"""
+    groups: Dict[str, List[Dict]] = {}
+    for result in results:
+        groups.setdefault(result['params_id'], []).append(result)
+    summary = []
+    for pid, runs in groups.items():
+        final_days = [run['final_day'] for run in runs]
+        survivors = [run['workers_survived'] for run in runs]
+        summary.append({
+            'params_id': pid,
+            'params': runs[0]['params'],
+            'runs': len(runs),
+            'mean_final_day': round(sum(final_days) / len(runs), 3),
+            'min_final_day': min(final_days),
+            'max_final_day': max(final_days),
+            'mean_workers_survived': round(sum(survivors) / len(runs), 3),
+            'survival_rate': round(sum(1 for run in runs if not run['collapsed']) / len(runs), 3),
+        })
+    summary.sort(key=lambda row: (row['survival_rate'], row['mean_final_day'], row['mean_workers_survived']),
+                 reverse=True)
+    return summary
+
+def print_summary(summary: List[Dict], limit: int = 20, file=sys.stdout):
+    for row in summary[:limit]:
+        print(f"🏁 {row['params_id']} | {row['runs']:>4} partidas | día medio {row['mean_final_day']:>6} "
+              f"({row['min_final_day']}-{row['max_final_day']}) | supervivientes {row['mean_workers_survived']:>6} "
+              f"| sobreviven {row['survival_rate']:.0%} | {json.dumps(row['params'], sort_keys=True)}", file=file)
+
+def main(argv=None) -> int:
+    parser = argparse.ArgumentParser(description="Barridos de balance en paralelo")
+    source = parser.add_mutually_exclusive_group(required=True)
+    source.add_argument('--grid', metavar='RUTA', help="JSON {parámetro: [valores]} (producto cartesiano)")
+    source.add_argument('--params', metavar='RUTA', help="JSONL con un conjunto de parámetros por línea")
+    source.add_argument('--summarize', metavar='RUTA', help="Solo resumir un JSONL de resultados")
+    parser.add_argument('--seeds', type=int, default=10, help="Semillas por conjunto (0..N-1)")
+    parser.add_argument('--seed-offset', type=int, default=0)
+    parser.add_argument('--days', type=int, default=5, help="Días máximos por colonia")
+    parser.add_argument('--workers', type=int, default=5, help="Trabajadores iniciales")
+    parser.add_argument('--jobs', type=int, default=None, help="Procesos (por defecto, núcleos)")
+    parser.add_argument('--output', metavar='RUTA', help="JSONL de resultados (permite reanudar)")
+    parser.add_argument('--summary', metavar='RUTA', help="Guardar el resumen en JSON")
+    parser.add_argument('--fast-forward', action='store_true', help="Noches y refugios en forma cerrada")
+    parser.add_argument('--top', type=int, default=20, help="Conjuntos a mostrar en el resumen")
+    args = parser.parse_args(argv)
+
+    if args.summarize:
+        results = read_results(args.summarize)
+    else:
+        if args.grid:
+            with open(args.grid) as f:
+                param_sets = expand_grid(json.load(f))
+        else:
+            with open(args.params) as f:
+                param_sets = [json.loads(line) for line in f if line.strip()]
+        seeds = range(args.seed_offset, args.seed_offset + args.seeds)
+        jobs = make_jobs(param_sets, seeds, args.days, args.workers, args.fast_forward)
+        previous = read_results(args.output) if args.output else []
+        ids = {job['id'] for job in jobs}
+        results = [result for result in previous if result['id'] in ids]
+        remaining = len(ids) - len(results)
+        print(f"🧪 {len(param_sets)} conjuntos x {args.seeds} semillas: {remaining} colonias pendientes "
+              f"({len(results)} ya hechas)", file=sys.stderr)
+        start = time.perf_counter()
+        for count, result in enumerate(run_batch(jobs, args.output, args.jobs), 1):
+            results.append(result)
+            if count % 100 == 0 or count == remaining:
+                rate = count / (time.perf_counter() - start)
+                print(f"⏱️  {count}/{remaining} colonias ({rate:.1f}/s)", file=sys.stderr)
+
+    summary = summarize(results)
+    print_summary(summary, args.top)
+    if args.summary:
+        with open(args.summary, 'w') as f:
+            json.dump(summary, f, indent=2)
+    return 0
+
+if __name__ == "__main__":
+    sys.exit(main())
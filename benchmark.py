@@ -0,0 +1,292 @@
+"""Banco de pruebas de rendimiento: simulación y dibujado según el tamaño de la colonia.
+
+Mide, para cada escala (trabajadores = N, edificios = N/4, árboles = N/2):
+
+- ``update``: ticks por segundo de ``GameState.update``.
+- ``draw``: ms por frame de ``Game.draw`` (renderizador por capas y ``draw_full``).
+- ``find_work``: µs por asignación de ``Worker.find_work`` con el tablón lleno.
+- ``autosave``: ms por guardado automático contra SQLite en memoria (síncrono).
+- ``memory``: bytes por trabajador, edificio y árbol (``tracemalloc``, N de cada uno).
+
+Todo corre con ``SDL_VIDEODRIVER=dummy`` y semilla fija; cada medida es la
+mejor de ``--repeats`` tandas. Los resultados se guardan en JSON y
+``--baseline`` compara con una ejecución anterior y marca como regresión
+cualquier métrica que empeore más de ``--threshold``.
+
+Uso:
+    python benchmark.py --output bench.json
+    python benchmark.py --scales 5 500 5000 --only update draw
+    python benchmark.py --baseline bench.json --output nuevo.json
+    python benchmark.py --scales 100000 --only update memory
+"""
+import argparse
+import contextlib
+import json
+import os
+import platform
+import random
+import sys
+import time
+from datetime import datetime
+from typing import Callable, Dict, List, Sequence
+
+SCALES = (5, 50, 500, 5000, 50000)
+BENCHMARKS = ('update', 'draw', 'find_work', 'autosave', 'memory')
+# Presupuesto de trabajo por tanda (entidades x ticks) para que las escalas grandes no tarden horas
+WORK_BUDGET = 200_000
+REGRESSION_THRESHOLD = 0.15
+
+# Métricas comparables con la línea base: True si más alto es mejor
+METRICS = {
+    'ticks_per_second': True,
+    'ms_per_tick': False,
+    'layered_ms_per_frame': False,
+    'full_ms_per_frame': False,
+    'us_per_assignment': False,
+    'ms_per_save': False,
+    'bytes_per_worker': False,
+    'bytes_per_building': False,
+    'bytes_per_tree': False,
+}
+
+def _iterations(scale: int, low: int = 5, high: int = 600) -> int:
+    return max(low, min(high, WORK_BUDGET // scale))
+
+def _best_time(func: Callable[[], None], repeats: int) -> float:
+    """Mejor tiempo en segundos de ``repeats`` ejecuciones de ``func`` (el ruido solo suma)"""
+    samples = []
+    for _ in range(repeats):
+        start = time.perf_counter()
+        func()
+        samples.append(time.perf_counter() - start)
+    return min(samples)
+
+def populate(game_state, scale: int, seed: int):
+    """Llenar la colonia hasta ``scale`` trabajadores, ``scale/4`` edificios y ``scale/2`` árboles"""
+    from game import (Building, BuildingType, Tree, Worker, SCREEN_WIDTH, SCREEN_HEIGHT, UI_HEIGHT,
+                      TILE_SIZE)
+    rng = random.Random(seed)
+    kinds = [BuildingType.COAL_MINE, BuildingType.SAWMILL, BuildingType.FARM, BuildingType.HOUSE]
+
+    def position():
+        return (rng.randint(50, SCREEN_WIDTH - 100), rng.randint(UI_HEIGHT + 50, SCREEN_HEIGHT - 100))
+
+    for i in range(max(0, scale // 4 - len(game_state.buildings))):
+        x, y = position()
+        game_state.register_building(Building(kinds[i % len(kinds)], x - x % TILE_SIZE, y - y % TILE_SIZE))
+    for _ in range(max(0, scale // 2 - len(game_state.trees))):
+        game_state.register_tree(Tree(*position()))
+    store = game_state.worker_store
+    for _ in range(max(0, scale - len(game_state.workers))):
+        x, y = position()
+        game_state.register_worker(store.create_worker(x, y) if store is not None else Worker(x, y))
+
+# Colonias ya pobladas (instantáneas de savestate) por (escala, semilla)
+_COLONIES: Dict[tuple, bytes] = {}
+
+def new_state(scale: int, seed: int, vectorized: bool = False, storage=None):
+    """Colonia poblada; se construye una vez por escala y después se carga de su instantánea"""
+    import savestate
+    from game import GameState
+    data = _COLONIES.get((scale, seed))
+    if data is None:
+        state = GameState(enable_persistence=False, initial_workers=0, record_timeseries=False, seed=seed)
+        populate(state, scale, seed)
+        data = _COLONIES[(scale, seed)] = savestate.dumps(state)
+    return savestate.loads(data, enable_persistence=storage is not None, vectorized_workers=vectorized,
+                           storage=storage)
+
+def bench_update(scale: int, seed: int, repeats: int, vectorized: bool = False) -> Dict:
+    state = new_state(scale, seed, vectorized)
+    ticks = _iterations(scale, high=5000)
+    update = state.update
+
+    def run():
+        for _ in range(ticks):
+            update()
+
+    elapsed = _best_time(run, repeats) / ticks
+    return {'ticks': ticks, 'ticks_per_second': round(1 / elapsed, 1), 'ms_per_tick': round(elapsed * 1000, 4)}
+
+def bench_draw(scale: int, seed: int, repeats: int) -> Dict:
+    import game as game_module
+    result = {}
+    frames = _iterations(scale, high=120)
+    for mode in ('layered', 'full'):
+        game = game_module.Game(enable_persistence=False, initial_workers=0, dirty_rects=(mode == 'layered'),
+                                seed=seed)
+        populate(game.game_state, scale, seed)
+        game.draw()  # Primer frame (completo) fuera de la medida
+
+        samples = []
+        for _ in range(repeats):
+            # Solo cuenta el dibujado; el tick entre frames queda fuera
+            elapsed = 0.0
+            for _ in range(frames):
+                game.update()
+                start = time.perf_counter()
+                game.draw()
+                elapsed += time.perf_counter() - start
+            samples.append(elapsed)
+        result[f'{mode}_ms_per_frame'] = round(min(samples) / frames * 1000, 4)
+    result['frames'] = frames
+    return result
+
+def bench_find_work(scale: int, seed: int, repeats: int) -> Dict:
+    state = new_state(scale, seed)
+    workers = state.workers
+    rounds = _iterations(scale, high=2000)
+
+    samples = []
+    for _ in range(repeats):
+        elapsed = 0.0
+        for _ in range(rounds):
+            # Todas las plazas y árboles vuelven al tablón antes de cada ronda
+            for worker in workers:
+                worker.release_jobs(state)
+            start = time.perf_counter()
+            for worker in workers:
+                worker.find_work(state)
+            elapsed += time.perf_counter() - start
+        samples.append(elapsed)
+    assignments = rounds * len(workers)
+    return {'assignments': assignments, 'us_per_assignment': round(min(samples) / max(1, assignments) * 1e6, 4)}
+
+def bench_autosave(scale: int, seed: int, repeats: int) -> Dict:
+    from sqlite_storage import SQLiteStorage
+    storage = SQLiteStorage(':memory:', threaded=False)
+    state = new_state(scale, seed, storage=storage)
+    rng = random.Random(seed)
+    saves = _iterations(scale, low=3, high=50)
+
+    def run():
+        for _ in range(saves):
+            # Cada guardado con cambios en todos los trabajadores (peor caso del diff)
+            for worker in state.workers:
+                worker.health = max(0.0, worker.health - rng.random())
+            storage.submit_autosave(state.game_session_id, state.snapshot())
+
+    # Sin el mensaje de cada guardado
+    with open(os.devnull, 'w') as devnull, contextlib.redirect_stdout(devnull):
+        elapsed = _best_time(run, repeats) / saves
+    storage.close()
+    return {'saves': saves, 'ms_per_save': round(elapsed * 1000, 4)}
+
+def bench_memory(scale: int, seed: int, repeats: int) -> Dict:
+    """Bytes por entidad (objeto, atributos y valores propios); sin índices ni listas de GameState"""
+    import tracemalloc
+    from game import Building, BuildingType, Tree, Worker, SCREEN_WIDTH, SCREEN_HEIGHT
+    rng = random.Random(seed)
+    kinds = list(BuildingType)
+    factories = {
+        'worker': lambda: Worker(rng.randint(0, SCREEN_WIDTH), rng.randint(0, SCREEN_HEIGHT), rng=rng),
+        'building': lambda: Building(rng.choice(kinds), rng.randint(0, SCREEN_WIDTH), rng.randint(0, SCREEN_HEIGHT)),
+        'tree': lambda: Tree(rng.randint(0, SCREEN_WIDTH), rng.randint(0, SCREEN_HEIGHT)),
+    }
+    result = {}
+    for name, make in factories.items():
+        tracemalloc.start()
+        entities = [make() for _ in range(scale)]
+        size = tracemalloc.get_traced_memory()[0] - sys.getsizeof(entities)
+        tracemalloc.stop()
+        result[f'bytes_per_{name}'] = round(size / scale, 1)
+        del entities
+    return result
+
+RUNNERS = {
+    'update': bench_update,
+    'draw': bench_draw,
+    'find_work': bench_find_work,
+    'autosave': bench_autosave,
+    'memory': bench_memory,
+}
+
+def run_benchmarks(scales: Sequence[int] = SCALES, only: Sequence[str] = BENCHMARKS, seed: int = 0,
+                   repeats: int = 3, vectorized: bool = False, log=None) -> Dict:
+    """Ejecutar los bancos pedidos; devuelve el documento JSON completo"""
+    import pygame
+    results: Dict[str, Dict] = {}
+    for name in only:
+        for scale in scales:
+            start = time.perf_counter()
+            if name == 'update':
+                entry = bench_update(scale, seed, repeats, vectorized)
+            else:
+                entry = RUNNERS[name](scale, seed, repeats)
+            results[f'{name}/{scale}'] = entry
+            if log is not None:
+                print(f"⏱️  {name:<10} {scale:>6}: {entry} ({time.perf_counter() - start:.1f} s)", file=log)
+    return {
+        'meta': {
+            'date': datetime.now().isoformat(timespec='seconds'),
+            'python': platform.python_version(),
+            'platform': platform.platform(),
+            'pygame': pygame.version.ver,
+            'seed': seed,
+            'repeats': repeats,
+            'scales': list(scales),
+            'vectorized': vectorized,
+        },
+        'results': results,
+    }
+
+def compare(current: Dict, baseline: Dict, threshold: float = REGRESSION_THRESHOLD) -> List[Dict]:
+    """Métricas presentes en ambos resultados con su variación; ``regression`` si empeora más del umbral"""
+    rows = []
+    for key, entry in current['results'].items():
+        previous = baseline.get('results', {}).get(key)
+        if previous is None:
+            continue
+        for metric, higher_is_better in METRICS.items():
+            if metric not in entry or not previous.get(metric):
+                continue
+            change = entry[metric] / previous[metric] - 1
+            worse = -change if higher_is_better else change
+            rows.append({'benchmark': key, 'metric': metric, 'baseline': previous[metric],
+                         'current': entry[metric], 'change': round(change, 4), 'regression': worse > threshold})
+    return rows
+
+def main(argv=None) -> int:
+    parser = argparse.ArgumentParser(description="Banco de pruebas de rendimiento de Frostpunk")
+    parser.add_argument('--scales', type=int, nargs='+', default=list(SCALES), help="Tamaños de colonia")
+    parser.add_argument('--only', nargs='+', choices=BENCHMARKS, default=list(BENCHMARKS))
+    parser.add_argument('--seed', type=int, default=0)
+    parser.add_argument('--repeats', type=int, default=3, help="Tandas por medida (se usa la mejor)")
+    parser.add_argument('--vectorized', action='store_true', help="Backend NumPy de trabajadores en 'update'")
+    parser.add_argument('--output', metavar='RUTA', help="Guardar los resultados en JSON")
+    parser.add_argument('--baseline', metavar='RUTA', help="Comparar con una ejecución anterior")
+    parser.add_argument('--threshold', type=float, default=REGRESSION_THRESHOLD,
+                        help="Empeoramiento relativo que cuenta como regresión (0.15 = 15%%)")
+    args = parser.parse_args(argv)
+
+    os.environ.setdefault('SDL_VIDEODRIVER', 'dummy')
+    os.environ.setdefault('SDL_AUDIODRIVER', 'dummy')
+    # Los mensajes de sesión y el progreso van a stderr para no mezclarse con el JSON
+    with contextlib.redirect_stdout(sys.stderr):
+        results = run_benchmarks(args.scales, args.only, args.seed, args.repeats, args.vectorized,
+                                 log=sys.stderr)
+
+    if args.output:
+        with open(args.output, 'w') as f:
+            json.dump(results, f, indent=2)
+        print(f"💾 Resultados guardados en {args.output}", file=sys.stderr)
+    else:
+        json.dump(results, sys.stdout, indent=2)
+        print()
+
+    if not args.baseline:
+        return 0
+    with open(args.baseline) as f:
+        baseline = json.load(f)
+    rows = compare(results, baseline, args.threshold)
+    regressions = [row for row in rows if row['regression']]
+    for row in rows:
+        mark = '❌' if row['regression'] else '✅'
+        print(f"{mark} {row['benchmark']:<16} {row['metric']:<22} {row['baseline']:>12} -> "
+              f"{row['current']:<12} ({row['change']:+.1%})", file=sys.stderr)
+    print(f"{'❌' if regressions else '✅'} {len(regressions)} regresiones de {len(rows)} métricas "
+          f"(umbral {args.threshold:.0%})", file=sys.stderr)
+    return 1 if regressions else 0
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,57 @@
+"""Catálogo de edificios cargado de ``buildings.json``.
+
+Cada entrada define un tipo: nombre del enum (``type``), etiqueta en español
+(``label``, el ``value`` de ``BuildingType``), nombre en el menú, color,
+plazas, recurso que produce, si necesita calefacción, si sirve de refugio y
+coste. ``build_menu`` da el orden del menú de construcción (los tipos que no
+aparecen no se pueden construir desde la interfaz).
+
+``game.py`` crea ``BuildingType`` a partir del catálogo y lo compila en tablas
+planas indexadas por ``BuildingType.code``, así que añadir un tipo solo
+requiere una entrada nueva. Los tipos nuevos van al final: el código de cada
+tipo es su posición y las instantáneas guardan códigos.
+"""
+import json
+import os
+from typing import Dict, List, NamedTuple, Optional, Tuple
+
+CATALOGUE_PATH = os.path.join(os.path.dirname(os.path.abspath(__file__)), 'buildings.json')
+
+class BuildingSpec(NamedTuple):
+    type: str
+    label: str
+    name: str
+    color: Tuple[int, int, int]
+    max_workers: int
+    produces: Optional[str]  # Nombre de ResourceType o None
+    heated: bool
+    shelter: bool
+    cost: Dict[str, int]     # Recurso (por nombre) -> cantidad
+
+class Catalogue(NamedTuple):
+    buildings: Tuple[BuildingSpec, ...]
+    build_menu: Tuple[str, ...]
+
+def load_catalogue(path: str = CATALOGUE_PATH) -> Catalogue:
+    """Leer y validar el catálogo (ValueError con el tipo y el campo si algo no cuadra)"""
+    with open(path, encoding='utf-8') as f:
+        data = json.load(f)
+    fields = set(BuildingSpec._fields)
+    buildings: List[BuildingSpec] = []
+    for entry in data['buildings']:
+        kind = entry.get('type', '?')
+        missing, unknown = fields - set(entry), set(entry) - fields
+        if missing or unknown:
+            raise ValueError(f"Edificio {kind} en {path}: faltan {sorted(missing)}, sobran {sorted(unknown)}")
+        if len(entry['color']) != 3:
+            raise ValueError(f"Edificio {kind} en {path}: color debe ser [r, g, b]")
+        buildings.append(BuildingSpec(**dict(entry, color=tuple(entry['color']), cost=dict(entry['cost']))))
+
+    types = [spec.type for spec in buildings]
+    if len(set(types)) != len(types):
+        raise ValueError(f"Tipos de edificio repetidos en {path}")
+    build_menu = tuple(data.get('build_menu', types))
+    unknown = set(build_menu) - set(types)
+    if unknown:
+        raise ValueError(f"build_menu en {path} tiene tipos desconocidos: {', '.join(sorted(unknown))}")
+    return Catalogue(tuple(buildings), build_menu)
@@ -0,0 +1,97 @@
+"""Bus de eventos del juego y sumidero por lotes hacia ``game_events``.
+
+Publicar es una tupla añadida a una lista (``EventBus.publish``), sin
+diccionarios ni E/S, para poder llamarlo desde el bucle de trabajadores. Al
+final de cada tick ``GameState`` llama a ``dispatch()``, que entrega el lote a
+los suscriptores. ``StorageEventSink`` convierte los eventos en filas y las
+envía al backend cuando se juntan ``max_batch`` o pasan ``max_age`` ticks; las
+construcciones van además a ``building_events``.
+"""
+from typing import Callable, Dict, List, Optional, Tuple
+
+# Tipos de evento y nombres de sus campos (el orden es el de publish)
+BUILDING_PLACED = 'building_placed'
+TREE_CHOPPED = 'tree_chopped'
+WORKER_STATE = 'worker_state'
+SHELTER_ENTERED = 'shelter_entered'
+WORKER_DIED = 'worker_died'
+TEMPERATURE_CHANGED = 'temperature_changed'
+
+EVENT_FIELDS: Dict[str, Tuple[str, ...]] = {
+    BUILDING_PLACED: ('building_type', 'x', 'y', 'resources_used'),
+    TREE_CHOPPED: ('x', 'y', 'wood', 'depleted'),
+    WORKER_STATE: ('worker_id', 'from_state', 'to_state'),
+    SHELTER_ENTERED: ('worker_id', 'health'),
+    WORKER_DIED: ('worker_id', 'state'),
+    TEMPERATURE_CHANGED: ('from_temperature', 'to_temperature'),
+}
+
+Event = Tuple[int, str, tuple]  # (game_time, tipo, datos)
+
+class EventBus:
+    def __init__(self):
+        self.tick = 0
+        self._events: List[Event] = []
+        self._subscribers: List[Callable[[List[Event], int], None]] = []
+        self.published = 0
+
+    def publish(self, kind: str, *data):
+        """Anotar un evento del tick actual (solo un append)"""
+        self._events.append((self.tick, kind, data))
+
+    def subscribe(self, handler: Callable[[List[Event], int], None]):
+        """``handler(lote, tick)`` recibe en cada ``dispatch`` los eventos del tick (quizá ninguno)"""
+        self._subscribers.append(handler)
+
+    def unsubscribe(self, handler: Callable[[List[Event], int], None]):
+        if handler in self._subscribers:
+            self._subscribers.remove(handler)
+
+    def dispatch(self):
+        """Entregar los eventos pendientes; sin suscriptores se descartan"""
+        events = self._events
+        if events:
+            self._events = []
+            self.published += len(events)
+        for handler in self._subscribers:
+            handler(events, self.tick)
+
+def event_row(event: Event) -> Dict:
+    """Fila de ``game_events`` para un evento"""
+    game_time, kind, data = event
+    event_data = dict(zip(EVENT_FIELDS.get(kind, ()), data))
+    event_data['game_time'] = game_time
+    return {'event_type': kind, 'event_data': event_data}
+
+class StorageEventSink:
+    """Acumula eventos y los envía en lote al backend por tamaño o por antigüedad"""
+
+    def __init__(self, storage, game_id: str, max_batch: int = 256, max_age: int = 600):
+        self.storage = storage
+        self.game_id = game_id
+        self.max_batch = max_batch
+        self.max_age = max_age  # Ticks
+        self._pending: List[Event] = []
+        self._oldest: Optional[int] = None
+
+    def __call__(self, events: List[Event], tick: int):
+        if events:
+            if self._oldest is None:
+                self._oldest = events[0][0]
+            self._pending.extend(events)
+        if self._pending and (len(self._pending) >= self.max_batch or tick - self._oldest >= self.max_age):
+            self.flush()
+
+    def flush(self):
+        """Enviar lo acumulado (encolado en el hilo del backend)"""
+        if not self._pending:
+            return
+        events, self._pending, self._oldest = self._pending, [], None
+        game_rows = [event_row(event) for event in events]
+        building_rows = [{
+            'building_type': data[0],
+            'x_position': data[1],
+            'y_position': data[2],
+            'resources_used': data[3]
+        } for _, kind, data in events if kind == BUILDING_PLACED]
+        self.storage.submit_events(self.game_id, game_rows, building_rows)
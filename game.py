@@ -1,18 +1,47 @@
+import os
+import time
+_IMPORT_STARTED = time.perf_counter()
+# Importar el juego no escribe nada (simulation.py --json usa stdout)
+os.environ.setdefault('PYGAME_HIDE_SUPPORT_PROMPT', '1')
 import pygame
 import random
 import math
 from enum import Enum
 from typing import List, Dict, Tuple, Optional
-from supabase_manager import SupabaseManager
-
-# Inicialización de Pygame
-pygame.init()
+from storage import StorageBackend, GameSnapshot, WorkerSnapshot, create_storage
+from spatial_index import SpatialGrid
+from job_board import JobBoard
+from text_cache import TEXT_CACHE
+from snowfall import SnowLayer
+from timestep import FixedTimestep
+from timeseries import ResourceRecorder
+from profiler import FrameProfiler, StartupReport
+from rng import RandomStreams
+from balance import Balance
+from buildings import CATALOGUE_PATH, load_catalogue
+from scheduler import Scheduler
+from events import (EventBus, StorageEventSink, BUILDING_PLACED, TREE_CHOPPED, WORKER_STATE,
+                    SHELTER_ENTERED, WORKER_DIED, TEMPERATURE_CHANGED)
 
 # Configuración de la ventana
 SCREEN_WIDTH = 1024
 SCREEN_HEIGHT = 768
 TILE_SIZE = 32
 UI_HEIGHT = 100
+SNOW_DENSITY = 0.0004  # Copos por píxel² del campo de juego
+TREE_REGROWTH_FRAMES = 1800  # 30 segundos para regenerar un árbol cortado
+WEATHER_PERIOD = 600  # La temperatura varía cada 10 segundos
+TREE_SPAWN_CHANCE = 0.001  # Probabilidad por frame de que aparezca un árbol
+HUNGER_PER_FRAME = 0.1
+ENERGY_PER_FRAME = 0.05
+HEALING_PERIOD = 300  # 5 segundos en el refugio por cada curación
+HEALING_AMOUNT = 20
+REST_ENERGY_PER_FRAME = 2  # Energía recuperada por frame descansando de día
+RESTED_ENERGY = 80  # Energía a partir de la cual se deja de descansar
+MIN_WORK_ENERGY = 20  # Por debajo se deja el trabajo para descansar
+CHOP_PROGRESS = 120  # 2 segundos para cortar madera
+FAST_FORWARD_MIN_TICKS = 2  # Tramos más cortos se simulan con update()
+FAST_FORWARD_RECHECK_TICKS = 60  # Con trabajadores activos, tramos cortos para volver a mirar quién se calmó
 
 # Colores
 BLACK = (0, 0, 0)
@@ -30,19 +59,29 @@ LIGHT_BLUE = (173, 216, 230)
 DARK_GREEN = (0, 100, 0)
 LIGHT_GREEN = (144, 238, 144)
 
-class ResourceType(Enum):
+class CodedEnum(Enum):
+    """Enum con un código entero pequeño (orden de declaración) para tablas y arrays
+
+    ``value`` sigue siendo la etiqueta en español que ven la UI y la base de
+    datos; ``code`` indexa las tablas de colores, plazas y comportamiento.
+    """
+    def __new__(cls, label):
+        member = object.__new__(cls)
+        member._value_ = label
+        member.code = len(cls.__members__)
+        return member
+
+class ResourceType(CodedEnum):
     COAL = "carbón"
     WOOD = "madera"
     FOOD = "comida"
 
-class BuildingType(Enum):
-    COAL_MINE = "mina_carbón"
-    SAWMILL = "aserradero"
-    FARM = "granja"
-    HOUSE = "casa"
-    STORAGE = "almacén"
+# Tipos de edificio del catálogo (buildings.json), en su orden
+BUILDING_CATALOGUE = load_catalogue()
+BuildingType = CodedEnum('BuildingType', [(spec.type, spec.label) for spec in BUILDING_CATALOGUE.buildings],
+                         module=__name__)
 
-class WorkerState(Enum):
+class WorkerState(CodedEnum):
     IDLE = "inactivo"
     WORKING = "trabajando"
     EATING = "comiendo"
@@ -50,9 +89,41 @@ class WorkerState(Enum):
     GATHERING = "recolectando"
     SEEKING_SHELTER = "buscando_refugio"
     IN_SHELTER = "en_refugio"
+    DEAD = "muerto"
+
+def _resource(name):
+    try:
+        return ResourceType[name]
+    except KeyError:
+        raise ValueError(f"Recurso desconocido en {CATALOGUE_PATH}: {name}") from None
+
+# Tablas por código (en el orden de declaración de cada enum; edificios compilados del catálogo)
+RESOURCE_COLORS = (DARK_GRAY, BROWN, ORANGE)
+BUILDING_COLORS = tuple(spec.color for spec in BUILDING_CATALOGUE.buildings)
+BUILDING_NAMES = tuple(spec.name for spec in BUILDING_CATALOGUE.buildings)
+BUILDING_MAX_WORKERS = tuple(spec.max_workers for spec in BUILDING_CATALOGUE.buildings)
+BUILDING_PRODUCTION = tuple(_resource(spec.produces) if spec.produces else None
+                            for spec in BUILDING_CATALOGUE.buildings)
+BUILDING_HEATED = tuple(spec.heated for spec in BUILDING_CATALOGUE.buildings)
+BUILDING_COSTS = tuple({_resource(name): amount for name, amount in spec.cost.items()}
+                       for spec in BUILDING_CATALOGUE.buildings)
+BUILDING_TYPES = tuple(BuildingType)
+SHELTER_TYPES = frozenset(kind for kind in BuildingType if BUILDING_CATALOGUE.buildings[kind.code].shelter)
+BUILD_MENU = tuple(BuildingType[name] for name in BUILDING_CATALOGUE.build_menu)
+# Columnas de producción de las series (output_coal_mine, output_sawmill, output_farm en resource_stats).
+# Un tipo sin columna propia suma en la del primero que produce su mismo recurso
+RECORDED_KINDS = (BuildingType.COAL_MINE, BuildingType.SAWMILL, BuildingType.FARM)
+RECORDED_OUTPUT = tuple(next((recorded for recorded in RECORDED_KINDS
+                              if BUILDING_PRODUCTION[recorded.code] is BUILDING_PRODUCTION[kind.code]), None)
+                        for kind in BuildingType)
+# Indicador sobre cada trabajador (None: sin indicador)
+WORKER_STATE_COLORS = (None, GREEN, ORANGE, BLUE, BROWN, RED, LIGHT_BLUE, DARK_GRAY)
 
 class GameState:
-    def __init__(self):
+    def __init__(self, enable_persistence: bool = True, initial_workers: int = 5,
+                 vectorized_workers: bool = False, storage: Optional[StorageBackend] = None,
+                 record_timeseries: bool = True, seed: Optional[int] = None,
+                 balance: Optional[Balance] = None):
         self.resources = {
             ResourceType.COAL: 50,
             ResourceType.WOOD: 100,
@@ -67,25 +138,77 @@ class GameState:
         self.temperature = -10  # Temperatura en grados Celsius
         self.day = 1
         self.fps = 60
-        self.clock = pygame.time.Clock()
         self.hour = 6  # Empieza a las 6:00 am
         self.minute = 0
         self.show_build_menu = False
         self.show_leaderboard = False
         
-        # Sistema de Supabase
-        self.supabase = SupabaseManager()
+        # Un generador por subsistema (árboles, clima, construcción, trabajadores)
+        self.rng = RandomStreams(seed)
+        
+        # Parámetros de balance (frío, calefacción, plazas, costes)
+        self.balance = balance or Balance()
+        self.cold_band = self.balance.cold_band(self.temperature)
+        
+        # Persistencia (Supabase, SQLite o nada; ver storage.py)
+        self.storage = storage if storage is not None else create_storage(enabled=enable_persistence)
         self.game_session_id = None
         self.auto_save_timer = 0
         self.last_save_time = 0
         
+        # Índices espaciales (consultas de cercanía, click y solapamiento)
+        self.building_index = SpatialGrid(TILE_SIZE * 2)
+        self.tree_index = SpatialGrid(TILE_SIZE * 2)
+        self.worker_index = SpatialGrid(TILE_SIZE * 2)
+        
+        # Tablón de trabajos (plazas libres y árboles sin reclamar)
+        self.job_board = JobBoard()
+        
+        # Contadores por tipo de edificio (se mantienen al registrar, sin recorrer la lista)
+        self.building_counts = [0] * len(BuildingType)
+        self.heated_buildings = 0
+        
+        # Trabajadores por estado (last_state), al día con cada evento WORKER_STATE
+        self.worker_state_counts = [0] * len(WorkerState)
+        
+        # Producción agregada: edificios que producen y fracciones pendientes por tipo
+        self.producers = []
+        self.production_accumulated = [0.0] * len(BuildingType)
+        
+        # Eventos futuros por tick (regeneración de árboles, clima, calefacción)
+        self.scheduler = Scheduler()
+        self.schedule_periodic()
+        
+        # Perfilador por fases (desactivado: section() no mide nada)
+        self.profiler = FrameProfiler()
+        
+        # Bus de eventos (game_events / building_events vía StorageEventSink)
+        self.events = EventBus()
+        self.event_sink = None
+        
+        # Series temporales por tick (recursos, trabajadores, producción por tipo de edificio)
+        self.recorder = None
+        if record_timeseries:
+            self.recorder = ResourceRecorder([state.name for state in WorkerState], RECORDED_KINDS)
+        
+        # Almacén vectorizado opcional (NumPy) para colonias de miles de trabajadores
+        self.worker_store = None
+        if vectorized_workers:
+            from worker_store import VectorWorkerStore
+            self.worker_store = VectorWorkerStore(capacity=initial_workers)
+        
         # Inicializar trabajadores
-        for i in range(5):
-            self.workers.append(Worker(100 + i * 50, 200))
+        for i in range(initial_workers):
+            x = 100 + (i % 16) * 50
+            y = 200 + (i // 16) * 20
+            if self.worker_store is not None:
+                self.register_worker(self.worker_store.create_worker(x, y, rng=self.rng.workers))
+            else:
+                self.register_worker(Worker(x, y, rng=self.rng.workers))
         
         # Inicializar edificios básicos
-        self.buildings.append(Building(BuildingType.HOUSE, 150, 150))
-        self.buildings.append(Building(BuildingType.STORAGE, 200, 150))
+        self.register_building(Building(BuildingType.HOUSE, 150, 150))
+        self.register_building(Building(BuildingType.STORAGE, 200, 150))
         
         # Generar árboles
         self.generate_trees()
@@ -94,57 +217,283 @@ class GameState:
         self.start_game_session()
     
     def start_game_session(self):
-        """Iniciar sesión de juego en Supabase"""
-        if self.supabase.enabled:
-            self.game_session_id = self.supabase.create_game_session("Player")
+        """Iniciar sesión de juego en el backend de almacenamiento"""
+        if self.storage.enabled:
+            self.game_session_id = self.storage.create_game_session("Player")
             if self.game_session_id:
                 print(f"🎮 Sesión de juego iniciada: {self.game_session_id}")
+                self.event_sink = StorageEventSink(self.storage, self.game_session_id)
+                self.events.subscribe(self.event_sink)
     
     def auto_save(self):
         """Guardado automático de datos"""
-        if not self.supabase.enabled or not self.game_session_id:
+        if not self.storage.enabled or not self.game_session_id:
             return
             
         current_time = self.game_time
         if current_time - self.last_save_time >= 3600:  # Guardar cada minuto (3600 frames)
-            self.supabase.update_game_session(self.game_session_id, self)
-            self.supabase.save_resource_stats(self.game_session_id, self)
-            self.supabase.save_worker_stats(self.game_session_id, self.workers)
+            # Solo se copia el estado; las escrituras van en el hilo del backend.
+            # Con el registro activo, resource_stats recibe sus filas por hora
+            self.storage.submit_autosave(self.game_session_id, self.snapshot(),
+                                         resource_stats=self.recorder is None)
             self.last_save_time = current_time
-            print("💾 Datos guardados automáticamente")
+    
+    def snapshot(self) -> GameSnapshot:
+        """Copia inmutable del estado actual para persistencia"""
+        return GameSnapshot(
+            day=self.day,
+            hour=self.hour,
+            temperature=self.temperature,
+            game_time=self.game_time,
+            resources=GameSnapshot.freeze_resources(self.resources),
+            buildings_constructed=len(self.buildings),
+            workers=tuple(WorkerSnapshot(w.health, w.energy, w.hunger, w.state.value, w.dead) for w in self.workers)
+        )
     
     def end_game_session(self):
         """Finalizar sesión de juego"""
-        if self.supabase.enabled and self.game_session_id:
-            self.supabase.update_game_session(self.game_session_id, self)
-            self.supabase.end_game_session(self.game_session_id)
+        if self.storage.enabled and self.game_session_id:
+            self.events.dispatch()
+            if self.event_sink is not None:
+                self.event_sink.flush()
+            self.storage.submit_autosave(self.game_session_id, self.snapshot(),
+                                         resource_stats=self.recorder is None)
+            # La hora en curso no se ha cerrado todavía: su fila se envía ahora
+            row = self.recorder.flush() if self.recorder is not None else None
+            if row is not None:
+                self.storage.submit_resource_stats(self.game_session_id, [row])
+            self.storage.end_game_session(self.game_session_id)
             print("🏁 Sesión de juego finalizada")
     
+    def record_output(self, kind, amount):
+        """Anotar producción del tick (kind: tipo de edificio, o None para la tala)"""
+        if self.recorder is not None and amount:
+            if kind is not None:
+                kind = RECORDED_OUTPUT[kind.code]
+                if kind is None:
+                    return
+            self.recorder.add_output(kind, amount)
+    
+    def state_counts(self):
+        """Trabajadores por estado, en el orden de WorkerState (sin recorrerlos)"""
+        return list(self.worker_state_counts)
+    
+    def living_workers(self) -> int:
+        """Trabajadores que no han muerto"""
+        return len(self.workers) - self.worker_state_counts[WorkerState.DEAD.code]
+    
+    def worker_state_changed(self, old, new):
+        """Mover un trabajador entre contadores de estado (junto a cada evento WORKER_STATE)"""
+        counts = self.worker_state_counts
+        counts[old.code] -= 1
+        counts[new.code] += 1
+    
+    def record_sample(self):
+        """Muestra del tick para el registro; cada hora cerrada va a resource_stats"""
+        counts = self.worker_state_counts
+        resources = self.resources
+        row = self.recorder.sample(self.game_time, self.day, self.hour, self.minute,
+                                   (resources[ResourceType.COAL], resources[ResourceType.WOOD],
+                                    resources[ResourceType.FOOD]),
+                                   self.temperature, counts)
+        if row is not None and self.game_session_id:
+            self.storage.submit_resource_stats(self.game_session_id, [row])
+    
+    def reset_world(self):
+        """Vaciar trabajadores, edificios, árboles, índices y tablón (antes de cargar una instantánea)"""
+        self.workers = []
+        self.buildings = []
+        self.trees = []
+        self.selected_worker = None
+        self.selected_building = None
+        self.building_index = SpatialGrid(TILE_SIZE * 2)
+        self.tree_index = SpatialGrid(TILE_SIZE * 2)
+        self.worker_index = SpatialGrid(TILE_SIZE * 2)
+        self.job_board = JobBoard()
+        self.building_counts = [0] * len(BuildingType)
+        self.heated_buildings = 0
+        self.worker_state_counts = [0] * len(WorkerState)
+        self.producers = []
+        self.production_accumulated = [0.0] * len(BuildingType)
+        self.scheduler = Scheduler(self.game_time)
+        if self.worker_store is not None:
+            from worker_store import VectorWorkerStore
+            self.worker_store = VectorWorkerStore()
+    
+    def schedule_periodic(self):
+        """Programar producción, clima y calefacción en múltiplos de su periodo desde game_time"""
+        self.scheduler.now = self.game_time
+        self.scheduler.every(self.balance.production_period, self.produce, priority=1)
+        self.scheduler.every(WEATHER_PERIOD, self.change_temperature, priority=2)
+        self.scheduler.every(self.balance.heating_period, self.heat_buildings, priority=3)
+    
+    def schedule_regrowth(self, tree):
+        """Un árbol recién cortado vuelve a crecer dentro de TREE_REGROWTH_FRAMES"""
+        tree.regrow_at = self.game_time + TREE_REGROWTH_FRAMES
+        self.scheduler.at(tree.regrow_at, self.regrow_tree, tree)
+    
+    def regrow_tree(self, tree):
+        tree.regrow()
+        self.job_board.tree_regrown(tree)
+    
+    def register_worker(self, worker):
+        worker.worker_id = len(self.workers)
+        self.workers.append(worker)
+        self.worker_state_counts[worker.last_state.code] += 1
+        self.worker_index.insert(worker, worker.bounds(), (worker.x, worker.y))
+    
+    def register_building(self, building):
+        building.max_workers = self.balance.max_workers.get(building.building_type.name, building.max_workers)
+        self.buildings.append(building)
+        self.count_building(building)
+        self.building_index.insert(building, building.bounds(), (building.x, building.y),
+                                   kind=building.building_type)
+        self.job_board.add_building(building)
+    
+    def count_building(self, building):
+        self.building_counts[building.building_type.code] += 1
+        if building.needs_heat:
+            self.heated_buildings += 1
+        if building.production_rate is not None:
+            self.producers.append(building)
+    
+    def register_tree(self, tree):
+        self.trees.append(tree)
+        self.tree_index.insert(tree, tree.bounds(), (tree.x, tree.y))
+        self.job_board.add_tree(tree)
+        if tree.is_chopped:
+            self.scheduler.at(tree.regrow_at, self.regrow_tree, tree)
+    
+    def register_many(self, workers=(), buildings=(), trees=()):
+        """Registrar muchas entidades de golpe (mismo resultado que register_* una a una)"""
+        buildings, trees, workers = list(buildings), list(trees), list(workers)
+        max_workers = self.balance.max_workers
+        for building in buildings:
+            building.max_workers = max_workers.get(building.building_type.name, building.max_workers)
+            self.count_building(building)
+        self.buildings.extend(buildings)
+        self.building_index.insert_many([(b, b.bounds(), (b.x, b.y), b.building_type) for b in buildings])
+        for building in buildings:
+            self.job_board.add_building(building)
+        self.trees.extend(trees)
+        self.tree_index.insert_many([(t, t.bounds(), (t.x, t.y), None) for t in trees])
+        for tree in trees:
+            self.job_board.add_tree(tree)
+            if tree.is_chopped:
+                self.scheduler.at(tree.regrow_at, self.regrow_tree, tree)
+        counts = self.worker_state_counts
+        for worker_id, worker in enumerate(workers, len(self.workers)):
+            worker.worker_id = worker_id
+            counts[worker.last_state.code] += 1
+        self.workers.extend(workers)
+        self.worker_index.insert_many([(w, w.bounds(), (w.x, w.y), None) for w in workers])
+    
+    def near_building(self, x, y, margin):
+        """Si hay algún edificio con |bx - x| < margin y |by - y| < margin"""
+        candidates = self.building_index.query_rect((x - margin, y - margin, x + margin, y + margin))
+        return any(abs(b.x - x) < margin and abs(b.y - y) < margin for b in candidates)
+    
+    def near_tree(self, x, y, margin):
+        """Si hay algún árbol con |tx - x| < margin y |ty - y| < margin"""
+        candidates = self.tree_index.query_rect((x - margin, y - margin, x + margin, y + margin))
+        return any(abs(t.x - x) < margin and abs(t.y - y) < margin for t in candidates)
+    
     def generate_trees(self):
+        rng = self.rng.trees
         for _ in range(12):
-            x = random.randint(50, SCREEN_WIDTH - 100)
-            y = random.randint(UI_HEIGHT + 50, SCREEN_HEIGHT - 100)
+            x = rng.randint(50, SCREEN_WIDTH - 100)
+            y = rng.randint(UI_HEIGHT + 50, SCREEN_HEIGHT - 100)
             # Verificar que no esté muy cerca de edificios
-            too_close = False
-            for building in self.buildings:
-                if abs(building.x - x) < TILE_SIZE * 2 and abs(building.y - y) < TILE_SIZE * 2:
-                    too_close = True
-                    break
-            if not too_close:
-                self.trees.append(Tree(x, y))
+            if not self.near_building(x, y, TILE_SIZE * 2):
+                self.register_tree(Tree(x, y))
     
     def add_random_tree(self):
         if len(self.trees) < 12:
-            x = random.randint(50, SCREEN_WIDTH - 100)
-            y = random.randint(UI_HEIGHT + 50, SCREEN_HEIGHT - 100)
+            x = self.rng.trees.randint(50, SCREEN_WIDTH - 100)
+            y = self.rng.trees.randint(UI_HEIGHT + 50, SCREEN_HEIGHT - 100)
             # Verificar que no esté muy cerca de edificios
-            too_close = False
+            if not self.near_building(x, y, TILE_SIZE * 2):
+                self.register_tree(Tree(x, y))
+    
+    def update(self):
+        """Avanzar la simulación un frame (sin dependencias de pantalla)"""
+        self.events.tick = self.game_time
+        self.cold_band = self.balance.cold_band(self.temperature)
+        section = self.profiler.section
+        # Actualizar trabajadores: cada uno completo (movimiento, decisiones y
+        # necesidades) antes que el siguiente; el backend NumPy da lo mismo
+        with section('update.workers'):
+            if self.worker_store is not None:
+                self.worker_store.update(self)
+            else:
+                for worker in self.workers:
+                    worker.update(self)
+        
+        # Actualizar edificios
+        with section('update.buildings'):
             for building in self.buildings:
-                if abs(building.x - x) < TILE_SIZE * 2 and abs(building.y - y) < TILE_SIZE * 2:
-                    too_close = True
-                    break
-            if not too_close:
-                self.trees.append(Tree(x, y))
+                building.update(self)
+        
+        # Generar árboles aleatoriamente
+        if self.rng.trees.random() < TREE_SPAWN_CHANCE:
+            self.add_random_tree()
+        
+        # Actualizar tiempo de juego
+        self.game_time += 1
+        self.advance_time()
+        
+        # Guardado automático
+        with section('update.autosave'):
+            self.auto_save()
+        
+        # Árboles que vuelven a crecer, clima y calefacción (solo lo que vence en este tick)
+        with section('update.scheduler'):
+            self.scheduler.run_due(self.game_time)
+        
+        if self.recorder is not None:
+            with section('update.timeseries'):
+                self.record_sample()
+        
+        with section('update.events'):
+            self.events.dispatch()
+    
+    def change_temperature(self):
+        previous_temperature = self.temperature
+        self.temperature += self.rng.weather.randint(-5, 5)
+        self.temperature = max(-30, min(10, self.temperature))
+        if self.temperature != previous_temperature:
+            self.events.publish(TEMPERATURE_CHANGED, previous_temperature, self.temperature)
+    
+    def produce(self):
+        """Producción de todos los edificios (cada production_period frames).
+
+        Cada trabajador asignado aporta una unidad, o ``cold_efficiency`` en un
+        edificio con calefacción cuando hace frío. Se suma por tipo de edificio y
+        las fracciones se acumulan para el siguiente periodo.
+        """
+        staff = [0] * len(BuildingType)
+        for building in self.producers:
+            staff[building.building_type.code] += len(building.workers)
+        balance = self.balance
+        cold = self.temperature < balance.cold_production_below
+        accumulated = self.production_accumulated
+        for code, workers in enumerate(staff):
+            if not workers:
+                continue
+            accumulated[code] += workers * (balance.cold_efficiency if cold and BUILDING_HEATED[code] else 1.0)
+            amount = int(accumulated[code])
+            if amount:
+                accumulated[code] -= amount
+                self.resources[BUILDING_PRODUCTION[code]] += amount
+                self.record_output(BUILDING_TYPES[code], amount)
+    
+    def heat_buildings(self):
+        """Consumo de carbón para calefacción (cada heating_period frames)"""
+        balance = self.balance
+        if self.temperature < balance.heating_below:
+            needed_coal = self.heated_buildings * balance.heating_coal
+            self.resources[ResourceType.COAL] = max(0, 
+                self.resources[ResourceType.COAL] - needed_coal)
     
     def is_daytime(self):
         return 6 <= self.hour < 18
@@ -160,22 +509,114 @@ class GameState:
                     self.hour = 0
                     self.day += 1
 
+    def advance_clock(self, ticks):
+        """advance_time() de ``ticks`` frames de golpe (game_time incluido)"""
+        steps = (self.game_time + ticks) // 60 - self.game_time // 60
+        self.game_time += ticks
+        if steps:
+            minutes = ((self.day - 1) * 24 + self.hour) * 60 + self.minute + steps * 10
+            days, minutes = divmod(minutes, 24 * 60)
+            self.day = days + 1
+            self.hour, self.minute = divmod(minutes, 60)
+
+    def ticks_until_dawn_or_dusk(self):
+        """Ticks que faltan para que is_daytime() cambie"""
+        boundary = 18 if self.is_daytime() else 6
+        steps = (((boundary - self.hour) % 24) * 60 - self.minute) // 10
+        return (self.game_time // 60 + steps) * 60 - self.game_time
+
+    def fast_forward_ticks(self, max_ticks):
+        """Longitud del próximo tramo: sin cruzar amanecer/anochecer, cambio de temperatura ni autoguardado"""
+        ticks = min(max_ticks, self.ticks_until_dawn_or_dusk(), WEATHER_PERIOD - self.game_time % WEATHER_PERIOD)
+        if self.storage.enabled and self.game_session_id:
+            ticks = min(ticks, max(1, self.last_save_time + 3600 - self.game_time))
+        return ticks
+
+    def fast_forward(self, max_ticks):
+        """Avanzar hasta ``max_ticks`` ticks; devuelve cuántos se avanzaron
+
+        Los trabajadores tranquilos durante todo el tramo (de noche descansando,
+        de día curándose en el refugio; ver Worker.quiet_ticks) avanzan en forma
+        cerrada con skip_ticks() y los edificios igual. El resto se actualiza
+        tick a tick como en update(); si no queda ninguno y no hay registro de
+        series, el reloj salta de un evento programado al siguiente. Los árboles
+        nuevos se siguen sorteando tick a tick, así que los generadores quedan
+        igual que avanzando con update().
+        """
+        ticks = self.fast_forward_ticks(max_ticks)
+        if ticks < FAST_FORWARD_MIN_TICKS:
+            self.update()
+            return 1
+        daytime = self.is_daytime()
+        band = self.balance.cold_band(self.temperature)
+        limits = [worker.quiet_ticks(self, daytime, band, ticks) for worker in self.workers]
+        if any(limit < ticks for limit in limits):
+            ticks = min(ticks, FAST_FORWARD_RECHECK_TICKS)
+        quiet, active = [], []
+        for worker, limit in zip(self.workers, limits):
+            # Los muertos no cambian: no hay nada que avanzar
+            if not worker.dead:
+                (quiet if limit >= ticks else active).append(worker)
+        if active and not quiet:
+            for _ in range(ticks):
+                self.update()
+            return ticks
+
+        self.cold_band = band
+        recorder = self.recorder
+        with self.profiler.section('update.fast_forward'):
+            if self.worker_store is not None:
+                self.worker_store.skip_ticks([worker.worker_id for worker in quiet], ticks, daytime, band)
+            else:
+                for worker in quiet:
+                    worker.skip_ticks(ticks, daytime, band)
+            if not daytime:
+                for worker in quiet:
+                    if worker.x != worker.target_x or worker.y != worker.target_y:
+                        worker.walk(ticks, self)
+            for building in self.buildings:
+                building.skip_ticks(ticks, self)
+
+            random = self.rng.trees.random
+            end = self.game_time + ticks
+            while self.game_time < end:
+                if active or recorder is not None:
+                    stop = self.game_time + 1
+                else:
+                    next_tick = self.scheduler.next_tick()
+                    stop = end if next_tick is None else min(end, max(next_tick, self.game_time + 1))
+                self.events.tick = stop - 1
+                for worker in active:
+                    worker.update(self)
+                for _ in range(stop - self.game_time):
+                    if random() < TREE_SPAWN_CHANCE:
+                        self.add_random_tree()
+                self.advance_clock(stop - self.game_time)
+                self.auto_save()
+                self.scheduler.run_due(self.game_time)
+                if recorder is not None:
+                    self.record_sample()
+                self.events.dispatch()
+        return ticks
+
 class Tree:
+    __slots__ = ('x', 'y', 'wood_amount', 'max_wood', 'regrow_at', 'is_chopped')
+    
     def __init__(self, x: int, y: int):
         self.x = x
         self.y = y
         self.wood_amount = 200  # Durabilidad de 200 unidades
         self.max_wood = 200
-        self.regrowth_timer = 0
+        self.regrow_at = 0  # Tick en que vuelve a crecer si está cortado (GameState.schedule_regrowth)
         self.is_chopped = False
         
-    def update(self):
-        if self.is_chopped:
-            self.regrowth_timer += 1
-            if self.regrowth_timer >= 1800:  # 30 segundos para regenerar
-                self.regrowth_timer = 0
-                self.is_chopped = False
-                self.wood_amount = self.max_wood
+    def regrow(self):
+        self.is_chopped = False
+        self.wood_amount = self.max_wood
+    
+    def bounds(self):
+        """Rectángulo de selección (x0, y0, x1, y1)"""
+        return (self.x - 12, self.y - 12, self.x + 12, self.y + 12)
     
     def chop(self):
         if not self.is_chopped and self.wood_amount > 0:
@@ -199,15 +640,19 @@ class Tree:
             # Mostrar cantidad de madera
             if self.wood_amount > 0:
                 pygame.draw.circle(screen, WHITE, (self.x, self.y - 15), 8)
-                font = pygame.font.Font(None, 16)
-                text = font.render(str(self.wood_amount), True, BLACK)
+                text = TEXT_CACHE.render(str(self.wood_amount), 16, BLACK)
                 screen.blit(text, (self.x - 4, self.y - 20))
         else:
             # Tronco cortado
             pygame.draw.rect(screen, BROWN, (self.x - 3, self.y + 5, 6, 10))
 
 class Worker:
-    def __init__(self, x: int, y: int):
+    __slots__ = ('x', 'y', 'target_x', 'target_y', 'state', 'health', 'hunger', 'energy',
+                 'assigned_building', 'assigned_tree', 'shelter_building', 'work_progress', 'speed',
+                 'color', 'is_selected', 'manual_assignment', 'temperature_damage_timer', 'healing_timer',
+                 'worker_id', 'last_state', 'dead')
+    
+    def __init__(self, x: int, y: int, rng: Optional[random.Random] = None, color: Optional[Tuple] = None):
         self.x = x
         self.y = y
         self.target_x = x
@@ -221,14 +666,26 @@ class Worker:
         self.shelter_building = None
         self.work_progress = 0
         self.speed = 1
-        self.color = (random.randint(100, 200), random.randint(100, 200), random.randint(100, 200))
+        if color is None:
+            rng = rng or random
+            color = (rng.randint(100, 200), rng.randint(100, 200), rng.randint(100, 200))
+        self.color = color
         self.is_selected = False
         self.manual_assignment = False  # Si fue asignado manualmente
         self.temperature_damage_timer = 0
         self.healing_timer = 0
+        self.worker_id = 0  # Índice en GameState.workers (register_worker)
+        self.last_state = self.state  # Para publicar transiciones de estado
+        self.dead = False
         
     def update(self, game_state):
-        # Movimiento hacia el objetivo
+        if self.move():
+            game_state.worker_index.move(self, self.bounds(), (self.x, self.y))
+        self.update_behaviour(game_state)
+        self.update_needs(game_state)
+        
+    def move(self):
+        """Movimiento hacia el objetivo; devuelve True si cambió la posición"""
         dx = self.target_x - self.x
         dy = self.target_y - self.y
         distance = math.sqrt(dx*dx + dy*dy)
@@ -239,56 +696,48 @@ class Worker:
         else:
             self.x = self.target_x
             self.y = self.target_y
+        return distance > 0
+    
+    def bounds(self):
+        """Rectángulo de selección (x0, y0, x1, y1)"""
+        return (self.x - 4, self.y - 4, self.x + 4, self.y + 4)
         
+    def update_behaviour(self, game_state):
+        if self.dead:
+            return
         # Lógica de ciclo día/noche
         if not game_state.is_daytime():
             self.state = WorkerState.RESTING
-            self.assigned_building = None
-            self.assigned_tree = None
+            self.release_jobs(game_state)
             self.manual_assignment = False
         else:
-            # Lógica de estado
-            if self.state == WorkerState.IDLE and not self.manual_assignment:
-                self.find_work(game_state)
-            elif self.state == WorkerState.WORKING:
-                self.work(game_state)
-            elif self.state == WorkerState.EATING:
-                self.eat(game_state)
-            elif self.state == WorkerState.RESTING:
-                self.rest()
-            elif self.state == WorkerState.GATHERING:
-                self.gather_wood(game_state)
-            elif self.state == WorkerState.SEEKING_SHELTER:
-                self.seek_shelter(game_state)
-            elif self.state == WorkerState.IN_SHELTER:
-                self.heal_in_shelter()
+            # Lógica de estado (tabla por código de estado, ver WORKER_BEHAVIOURS)
+            WORKER_BEHAVIOURS[self.state.code](self, game_state)
+    
+    def idle(self, game_state):
+        if not self.manual_assignment:
+            self.find_work(game_state)
         
+    def update_needs(self, game_state):
+        """Hambre, energía, daño por frío y límites (ver VectorWorkerStore para la versión en lote)"""
+        if self.dead:
+            return
         # Consumo de energía y hambre
-        self.hunger += 0.1
-        self.energy -= 0.05
+        self.hunger += HUNGER_PER_FRAME
+        self.energy -= ENERGY_PER_FRAME
         
         # Efectos del frío (sistema mejorado)
         self.temperature_damage_timer += 1
         
         # Solo aplicar daño por temperatura si NO está en refugio
         if self.state != WorkerState.IN_SHELTER:
-            if 5 <= game_state.temperature <= 14:
-                # Temperatura fría: -5 puntos cada 2 segundos (120 frames)
-                if self.temperature_damage_timer >= 120:
-                    self.health -= 5
-                    self.energy -= 2
-                    self.temperature_damage_timer = 0
-            elif -15 <= game_state.temperature <= 4:
-                # Temperatura muy fría: -10 puntos cada 3 segundos (180 frames)
-                if self.temperature_damage_timer >= 180:
-                    self.health -= 10
-                    self.energy -= 5
-                    self.temperature_damage_timer = 0
-            elif game_state.temperature < -15:
-                # Temperatura extremadamente fría: -15 puntos cada 2 segundos
-                if self.temperature_damage_timer >= 120:
-                    self.health -= 15
-                    self.energy -= 8
+            # Banda de frío del tick (ver balance.COLD_BANDS: frío, muy frío, extremo)
+            band = game_state.cold_band
+            if band is not None:
+                period, health_loss, energy_loss = band
+                if self.temperature_damage_timer >= period:
+                    self.health -= health_loss
+                    self.energy -= energy_loss
                     self.temperature_damage_timer = 0
             else:
                 # Temperatura normal (15-35°C): resetear timer
@@ -306,25 +755,41 @@ class Worker:
         self.energy = max(self.energy, 0)
         self.health = max(self.health, 0)
         
+        # La muerte es definitiva
+        cause = self.state
+        died = self.health <= 0
+        if died:
+            self.die(game_state)
+        
+        # Eventos: una comparación por tick salvo cuando algo cambia
+        state = self.state
+        if state is not self.last_state:
+            game_state.events.publish(WORKER_STATE, self.worker_id, self.last_state.name, state.name)
+            game_state.worker_state_changed(self.last_state, state)
+            self.last_state = state
+        if died:
+            game_state.events.publish(WORKER_DIED, self.worker_id, cause.name)
+    
+    def die(self, game_state):
+        """Muerte: deja trabajo y refugio, se queda donde está y no vuelve a decidir ni a gastar"""
+        self.dead = True
+        self.release_jobs(game_state)
+        self.manual_assignment = False
+        self.shelter_building = None
+        self.target_x = self.x
+        self.target_y = self.y
+        self.state = WorkerState.DEAD
+        
     def seek_shelter_emergency(self, game_state):
         # Buscar la casa más cercana
-        closest_house = None
-        min_distance = float('inf')
-        
-        for building in game_state.buildings:
-            if building.building_type == BuildingType.HOUSE:
-                distance = math.sqrt((building.x - self.x)**2 + (building.y - self.y)**2)
-                if distance < min_distance:
-                    min_distance = distance
-                    closest_house = building
+        closest_house = game_state.building_index.nearest(self.x, self.y, kinds=SHELTER_TYPES)
         
         if closest_house:
             self.shelter_building = closest_house
             self.target_x = closest_house.x + TILE_SIZE // 2
             self.target_y = closest_house.y + TILE_SIZE // 2
             self.state = WorkerState.SEEKING_SHELTER
-            self.assigned_building = None
-            self.assigned_tree = None
+            self.release_jobs(game_state)
             self.manual_assignment = False
     
     def seek_shelter(self, game_state):
@@ -336,11 +801,13 @@ class Worker:
                 self.state = WorkerState.IN_SHELTER
                 self.x = self.shelter_building.x + TILE_SIZE // 2
                 self.y = self.shelter_building.y + TILE_SIZE // 2
+                game_state.worker_index.move(self, self.bounds(), (self.x, self.y))
+                game_state.events.publish(SHELTER_ENTERED, self.worker_id, self.health)
     
     def heal_in_shelter(self):
         self.healing_timer += 1
-        if self.healing_timer >= 300:  # 5 segundos (300 frames a 60 FPS)
-            self.health += 20
+        if self.healing_timer >= HEALING_PERIOD:
+            self.health += HEALING_AMOUNT
             self.healing_timer = 0
             
             # Si está completamente curado, salir del refugio
@@ -349,70 +816,168 @@ class Worker:
                 self.state = WorkerState.IDLE
                 self.shelter_building = None
                 self.manual_assignment = False
+
+    def quiet_ticks(self, game_state, daytime, band, limit):
+        """Cuántos de los próximos ``limit`` ticks solo cambian contadores (ver skip_ticks)
+
+        De noche: descansando (o de camino al refugio más cercano con salud
+        <= 20) y sin trabajo asignado; si aún camina, walk() lo mueve tick a
+        tick. De día: quieto en el refugio curándose. El tramo acaba justo antes
+        del tick que cambia de estado (salud <= 20, muerte o curación completa),
+        que se simula con update().
+        """
+        if self.dead:
+            return limit
+        state = self.state
+        if state is not self.last_state or self.health <= 0:
+            return 0
+        if daytime:
+            if state is not WorkerState.IN_SHELTER or self.x != self.target_x or self.y != self.target_y:
+                return 0
+            # Sale del refugio en la curación que llega a 100
+            heals = max(1, int(-(-(100 - self.health) // HEALING_AMOUNT)))
+            first = max(1, HEALING_PERIOD - self.healing_timer)
+            return min(limit, first + (heals - 1) * HEALING_PERIOD - 1)
+
+        if self.assigned_building or self.assigned_tree or self.manual_assignment:
+            return 0
+        if self.health > 20:
+            if state is not WorkerState.RESTING:
+                return 0
+            threshold = 20
+        else:
+            # seek_shelter_emergency se repite cada tick: tiene que dejarlo todo igual
+            house = game_state.building_index.nearest(self.x, self.y, kinds=SHELTER_TYPES)
+            if house is None:
+                if state is not WorkerState.RESTING:
+                    return 0
+            elif (state is not WorkerState.SEEKING_SHELTER or self.shelter_building is not house or
+                  self.target_x != house.x + TILE_SIZE // 2 or self.target_y != house.y + TILE_SIZE // 2):
+                return 0
+            threshold = 0
+        if band is None or band[1] <= 0:
+            return limit
+        period, health_loss, _ = band
+        hits = int(-(-(self.health - threshold) // health_loss))
+        first = max(1, period - self.temperature_damage_timer)
+        return min(limit, first + (hits - 1) * period - 1)
+
+    def skip_ticks(self, ticks, daytime, band):
+        """Avanzar ``ticks`` ticks tranquilos en forma cerrada (hambre, energía, frío y curación)
+
+        Da lo mismo que ``ticks`` llamadas a update_behaviour()/update_needs()
+        salvo el redondeo de coma flotante de hambre y energía.
+        """
+        self.hunger = min(self.hunger + ticks * HUNGER_PER_FRAME, 100)
+        energy = self.energy - ticks * ENERGY_PER_FRAME
+        if daytime:
+            # En el refugio: una curación cada HEALING_PERIOD ticks y sin daño por frío
+            first = max(1, HEALING_PERIOD - self.healing_timer)
+            heals = 0 if ticks < first else 1 + (ticks - first) // HEALING_PERIOD
+            self.health += heals * HEALING_AMOUNT
+            self.healing_timer = ticks - first - (heals - 1) * HEALING_PERIOD if heals else self.healing_timer + ticks
+            self.temperature_damage_timer = 0
+        elif band is None:
+            self.temperature_damage_timer = 0
+        else:
+            period, health_loss, energy_loss = band
+            first = max(1, period - self.temperature_damage_timer)
+            hits = 0 if ticks < first else 1 + (ticks - first) // period
+            self.health = max(self.health - hits * health_loss, 0)
+            energy -= hits * energy_loss
+            self.temperature_damage_timer = (ticks - first - (hits - 1) * period if hits
+                                             else self.temperature_damage_timer + ticks)
+        self.energy = max(energy, 0)
+
+    def walk(self, ticks, game_state):
+        """Movimiento de ``ticks`` ticks de un tramo tranquilo nocturno (ver quiet_ticks)
+
+        Quien busca refugio vuelve a elegir el más cercano en cada tick, igual
+        que seek_shelter_emergency() desde update_needs().
+        """
+        worker_index = game_state.worker_index
+        seeking = self.state is WorkerState.SEEKING_SHELTER
+        for _ in range(ticks):
+            if self.move():
+                worker_index.move(self, self.bounds(), (self.x, self.y))
+            if seeking:
+                self.seek_shelter_emergency(game_state)
+            if self.x == self.target_x and self.y == self.target_y:
+                break
+
+    def release_jobs(self, game_state):
+        """Devolver al tablón la plaza de edificio y el árbol asignados"""
+        if self.assigned_building:
+            game_state.job_board.release_building(self.assigned_building, self)
+            self.assigned_building = None
+        if self.assigned_tree:
+            game_state.job_board.release_tree(self.assigned_tree)
+            self.assigned_tree = None
         
-    def assign_to_tree(self, tree):
+    def assign_to_tree(self, tree, game_state):
+        self.release_jobs(game_state)
+        game_state.job_board.assign_tree(tree)
         self.assigned_tree = tree
-        self.assigned_building = None
         self.target_x = tree.x
         self.target_y = tree.y
         self.state = WorkerState.GATHERING
         self.manual_assignment = True
         
-    def assign_to_building(self, building):
-        if building.needs_worker():
+    def assign_to_building(self, building, game_state):
+        if building is self.assigned_building:
+            return True
+        if building.needs_worker() and not self.dead:
+            self.release_jobs(game_state)
+            game_state.job_board.assign_building(building, self)
             self.assigned_building = building
-            self.assigned_tree = None
             self.target_x = building.x + TILE_SIZE // 2
             self.target_y = building.y + TILE_SIZE // 2
             self.state = WorkerState.WORKING
-            building.assign_worker(self)
             self.manual_assignment = True
             return True
         return False
         
     def find_work(self, game_state):
         # Primero buscar edificio disponible
-        for building in game_state.buildings:
-            if building.needs_worker():
-                self.assigned_building = building
-                self.target_x = building.x + TILE_SIZE // 2
-                self.target_y = building.y + TILE_SIZE // 2
-                self.state = WorkerState.WORKING
-                building.assign_worker(self)
-                return
+        building = game_state.job_board.claim_building(self)
+        if building:
+            self.assigned_building = building
+            self.target_x = building.x + TILE_SIZE // 2
+            self.target_y = building.y + TILE_SIZE // 2
+            self.state = WorkerState.WORKING
+            return
         
         # Si no hay edificios disponibles, buscar árboles
-        for tree in game_state.trees:
-            if not tree.is_chopped and not any(w.assigned_tree == tree for w in game_state.workers):
-                self.assigned_tree = tree
-                self.target_x = tree.x
-                self.target_y = tree.y
-                self.state = WorkerState.GATHERING
-                return
+        tree = game_state.job_board.claim_tree()
+        if tree:
+            self.assigned_tree = tree
+            self.target_x = tree.x
+            self.target_y = tree.y
+            self.state = WorkerState.GATHERING
                 
     def work(self, game_state):
-        if not self.assigned_building or self.energy < 20:
+        """Dejar el puesto sin edificio o sin energía (la producción la calcula GameState.produce)"""
+        if not self.assigned_building or self.energy < MIN_WORK_ENERGY:
             self.state = WorkerState.RESTING
-            self.assigned_building = None
-            return
-            
-        self.work_progress += 1
-        if self.work_progress >= 60:  # 1 segundo de trabajo
-            self.assigned_building.produce(game_state)
-            self.work_progress = 0
+            self.release_jobs(game_state)
     
     def gather_wood(self, game_state):
-        if not self.assigned_tree or self.energy < 20:
+        if not self.assigned_tree or self.energy < MIN_WORK_ENERGY:
             self.state = WorkerState.RESTING
-            self.assigned_tree = None
+            self.release_jobs(game_state)
             return
         
         self.work_progress += 1
-        if self.work_progress >= 120:  # 2 segundos para cortar madera
-            wood_gained = self.assigned_tree.chop()
+        if self.work_progress >= CHOP_PROGRESS:
+            tree = self.assigned_tree
+            wood_gained = tree.chop()
             game_state.resources[ResourceType.WOOD] += wood_gained
+            game_state.record_output(None, wood_gained)
+            game_state.events.publish(TREE_CHOPPED, tree.x, tree.y, wood_gained, tree.is_chopped)
+            if wood_gained and tree.is_chopped:
+                game_state.schedule_regrowth(tree)
             self.work_progress = 0
-            self.assigned_tree = None
+            self.release_jobs(game_state)
             self.state = WorkerState.IDLE
             
     def eat(self, game_state):
@@ -423,35 +988,42 @@ class Worker:
         self.state = WorkerState.IDLE
         
     def rest(self):
-        self.energy = min(100, self.energy + 2)
-        if self.energy >= 80:
+        self.energy = min(100, self.energy + REST_ENERGY_PER_FRAME)
+        if self.energy >= RESTED_ENERGY:
             self.state = WorkerState.IDLE
             
-    def draw(self, screen):
-        # Dibujar trabajador como pixel art
+    def draw(self, screen, pos=None):
+        # Dibujar trabajador como pixel art (pos: posición interpolada para el render)
+        x, y = pos if pos is not None else (self.x, self.y)
         color = self.color
         if self.is_selected:
             # Resaltar trabajador seleccionado
-            pygame.draw.rect(screen, YELLOW, (self.x - 6, self.y - 6, 12, 12), 2)
+            pygame.draw.rect(screen, YELLOW, (x - 6, y - 6, 12, 12), 2)
             
-        pygame.draw.rect(screen, color, (self.x - 4, self.y - 4, 8, 8))
-        pygame.draw.rect(screen, BLACK, (self.x - 4, self.y - 4, 8, 8), 1)
+        pygame.draw.rect(screen, color, (x - 4, y - 4, 8, 8))
+        pygame.draw.rect(screen, BLACK, (x - 4, y - 4, 8, 8), 1)
         
         # Indicador de estado
-        if self.state == WorkerState.WORKING:
-            pygame.draw.circle(screen, GREEN, (self.x, self.y - 8), 3)
-        elif self.state == WorkerState.EATING:
-            pygame.draw.circle(screen, ORANGE, (self.x, self.y - 8), 3)
-        elif self.state == WorkerState.RESTING:
-            pygame.draw.circle(screen, BLUE, (self.x, self.y - 8), 3)
-        elif self.state == WorkerState.GATHERING:
-            pygame.draw.circle(screen, BROWN, (self.x, self.y - 8), 3)
-        elif self.state == WorkerState.SEEKING_SHELTER:
-            pygame.draw.circle(screen, RED, (self.x, self.y - 8), 3)
-        elif self.state == WorkerState.IN_SHELTER:
-            pygame.draw.circle(screen, LIGHT_BLUE, (self.x, self.y - 8), 3)
+        indicator = WORKER_STATE_COLORS[self.state.code]
+        if indicator is not None:
+            pygame.draw.circle(screen, indicator, (x, y - 8), 3)
+
+# Comportamiento diurno por código de estado (Worker.update_behaviour)
+WORKER_BEHAVIOURS = (
+    Worker.idle,                                            # IDLE
+    Worker.work,                                            # WORKING
+    Worker.eat,                                             # EATING
+    lambda worker, game_state: worker.rest(),               # RESTING
+    Worker.gather_wood,                                     # GATHERING
+    Worker.seek_shelter,                                    # SEEKING_SHELTER
+    lambda worker, game_state: worker.heal_in_shelter(),    # IN_SHELTER
+    lambda worker, game_state: None,                        # DEAD
+)
 
 class Building:
+    __slots__ = ('building_type', 'x', 'y', 'workers', 'max_workers', 'production_timer', 'production_rate',
+                 'health', 'needs_heat')
+    
     def __init__(self, building_type: BuildingType, x: int, y: int):
         self.building_type = building_type
         self.x = x
@@ -464,29 +1036,17 @@ class Building:
         self.needs_heat = self.needs_heating()
         
     def get_max_workers(self):
-        if self.building_type == BuildingType.COAL_MINE:
-            return 3
-        elif self.building_type == BuildingType.SAWMILL:
-            return 2
-        elif self.building_type == BuildingType.FARM:
-            return 4
-        elif self.building_type == BuildingType.HOUSE:
-            return 0
-        elif self.building_type == BuildingType.STORAGE:
-            return 0
-        return 1
+        return BUILDING_MAX_WORKERS[self.building_type.code]
         
     def get_production_rate(self):
-        if self.building_type == BuildingType.COAL_MINE:
-            return ResourceType.COAL
-        elif self.building_type == BuildingType.SAWMILL:
-            return ResourceType.WOOD
-        elif self.building_type == BuildingType.FARM:
-            return ResourceType.FOOD
-        return None
+        return BUILDING_PRODUCTION[self.building_type.code]
         
     def needs_heating(self):
-        return self.building_type in [BuildingType.HOUSE, BuildingType.FARM]
+        return BUILDING_HEATED[self.building_type.code]
+        
+    def bounds(self):
+        """Rectángulo ocupado (x0, y0, x1, y1)"""
+        return (self.x, self.y, self.x + TILE_SIZE, self.y + TILE_SIZE)
         
     def needs_worker(self):
         return len(self.workers) < self.max_workers and self.production_rate is not None
@@ -495,20 +1055,19 @@ class Building:
         if len(self.workers) < self.max_workers:
             self.workers.append(worker)
             
-    def produce(self, game_state):
-        if self.production_rate and self.workers:
-            # Efecto del frío en la producción
-            efficiency = 1.0
-            if game_state.temperature < -5 and self.needs_heat:
-                efficiency = 0.5
-                
-            amount = len(self.workers) * efficiency
-            game_state.resources[self.production_rate] += int(amount)
+    def release_worker(self, worker):
+        if worker in self.workers:
+            self.workers.remove(worker)
             
     def update(self, game_state):
         # Efecto del frío en la salud del edificio
         if game_state.temperature < -10 and self.needs_heat:
             self.health -= 0.1
+
+    def skip_ticks(self, ticks, game_state):
+        """update() de ``ticks`` frames con la misma temperatura (GameState.fast_forward)"""
+        if game_state.temperature < -10 and self.needs_heat:
+            self.health -= ticks * 0.1
             
     def draw(self, screen):
         # Dibujar edificio como pixel art
@@ -529,28 +1088,20 @@ class Building:
             pygame.draw.rect(screen, GREEN, (self.x, self.y - 5, health_width, 3))
             
     def get_building_color(self):
-        if self.building_type == BuildingType.COAL_MINE:
-            return DARK_GRAY
-        elif self.building_type == BuildingType.SAWMILL:
-            return BROWN
-        elif self.building_type == BuildingType.FARM:
-            return GREEN
-        elif self.building_type == BuildingType.HOUSE:
-            return LIGHT_BLUE
-        elif self.building_type == BuildingType.STORAGE:
-            return GRAY
-        return WHITE
+        return BUILDING_COLORS[self.building_type.code]
 
 class BuildMenu:
-    def __init__(self):
-        self.font = pygame.font.Font(None, 20)
-        self.buildings = [
-            {"type": BuildingType.HOUSE, "name": "Casa", "cost": {ResourceType.WOOD: 10}},
-            {"type": BuildingType.SAWMILL, "name": "Aserradero", "cost": {ResourceType.WOOD: 15}},
-            {"type": BuildingType.COAL_MINE, "name": "Mina de Carbón", "cost": {ResourceType.WOOD: 20}},
-            {"type": BuildingType.FARM, "name": "Granja", "cost": {ResourceType.WOOD: 12}},
-            {"type": BuildingType.STORAGE, "name": "Almacén", "cost": {ResourceType.WOOD: 8}}
-        ]
+    def __init__(self, balance: Optional[Balance] = None):
+        self.font_size = 20
+        # Orden, nombres y costes del catálogo (build_menu en buildings.json)
+        self.buildings = [{"type": kind, "name": BUILDING_NAMES[kind.code], "cost": dict(BUILDING_COSTS[kind.code])}
+                          for kind in BUILD_MENU]
+        # Costes del balance (tipos y recursos por nombre)
+        if balance is not None:
+            for building in self.buildings:
+                cost = balance.build_costs.get(building['type'].name)
+                if cost is not None:
+                    building['cost'] = {ResourceType[name]: amount for name, amount in cost.items()}
         self.selected = 0
         
     def draw(self, screen, game_state):
@@ -567,7 +1118,7 @@ class BuildMenu:
         pygame.draw.rect(screen, WHITE, (menu_x, menu_y, menu_width, menu_height), 2)
         
         # Título
-        title = self.font.render("Construir Edificio", True, WHITE)
+        title = TEXT_CACHE.render("Construir Edificio", self.font_size, WHITE)
         screen.blit(title, (menu_x + 10, menu_y + 10))
         
         # Lista de edificios
@@ -576,7 +1127,7 @@ class BuildMenu:
             color = YELLOW if i == self.selected else WHITE
             
             # Nombre del edificio
-            name_text = self.font.render(f"{i+1}. {building['name']}", True, color)
+            name_text = TEXT_CACHE.render(f"{i+1}. {building['name']}", self.font_size, color)
             screen.blit(name_text, (menu_x + 10, y_pos))
             
             # Costos
@@ -592,20 +1143,20 @@ class BuildMenu:
                     break
             
             cost_color = GREEN if can_build else RED
-            cost_surface = self.font.render(cost_text, True, cost_color)
+            cost_surface = TEXT_CACHE.render(cost_text, self.font_size, cost_color)
             screen.blit(cost_surface, (menu_x + 10, y_pos + 15))
         
         # Instrucciones
         inst_text = "Enter: Construir | ESC: Cerrar | ↑↓: Seleccionar"
-        inst_surface = self.font.render(inst_text, True, GRAY)
+        inst_surface = TEXT_CACHE.render(inst_text, self.font_size, GRAY)
         screen.blit(inst_surface, (menu_x + 10, menu_y + menu_height - 25))
 
 class UI:
     def __init__(self):
-        self.font = pygame.font.Font(None, 24)
-        self.small_font = pygame.font.Font(None, 18)
+        self.font_size = 24
+        self.small_font_size = 18
         
-    def draw(self, screen, game_state):
+    def draw(self, screen, game_state, time_scale=1):
         # Fondo de la UI
         pygame.draw.rect(screen, DARK_BLUE, (0, 0, SCREEN_WIDTH, UI_HEIGHT))
         pygame.draw.rect(screen, WHITE, (0, 0, SCREEN_WIDTH, UI_HEIGHT), 2)
@@ -615,33 +1166,33 @@ class UI:
         for i, (resource_type, amount) in enumerate(game_state.resources.items()):
             color = self.get_resource_color(resource_type)
             text = f"{resource_type.value}: {amount}"
-            text_surface = self.font.render(text, True, color)
+            text_surface = TEXT_CACHE.render(text, self.font_size, color)
             screen.blit(text_surface, (10 + i * 150, y_offset))
         
         # Información de trabajadores
-        worker_text = f"Trabajadores: {len(game_state.workers)}"
-        worker_surface = self.font.render(worker_text, True, WHITE)
+        worker_text = f"Trabajadores: {game_state.living_workers()}"
+        worker_surface = TEXT_CACHE.render(worker_text, self.font_size, WHITE)
         screen.blit(worker_surface, (10, y_offset + 30))
         
         # Información del trabajador seleccionado
         if game_state.selected_worker:
             worker = game_state.selected_worker
             worker_info = f"Trabajador: Salud {int(worker.health)}% | Energía {int(worker.energy)}% | Hambre {int(worker.hunger)}%"
-            worker_info_surface = self.font.render(worker_info, True, YELLOW)
+            worker_info_surface = TEXT_CACHE.render(worker_info, self.font_size, YELLOW)
             screen.blit(worker_info_surface, (10, y_offset + 55))
         
         # Temperatura
         temp_color = RED if game_state.temperature < -5 else WHITE
         temp_text = f"Temperatura: {game_state.temperature}°C"
-        temp_surface = self.font.render(temp_text, True, temp_color)
+        temp_surface = TEXT_CACHE.render(temp_text, self.font_size, temp_color)
         screen.blit(temp_surface, (350, y_offset + 30))
         
         # Día y hora
         day_text = f"Día: {game_state.day}"
-        day_surface = self.font.render(day_text, True, WHITE)
+        day_surface = TEXT_CACHE.render(day_text, self.font_size, WHITE)
         screen.blit(day_surface, (350, y_offset + 55))
         hour_text = f"Hora: {game_state.hour:02d}:{game_state.minute:02d}"
-        hour_surface = self.font.render(hour_text, True, WHITE)
+        hour_surface = TEXT_CACHE.render(hour_text, self.font_size, WHITE)
         screen.blit(hour_surface, (500, y_offset + 55))
         
         # Indicador de día/noche
@@ -651,37 +1202,108 @@ class UI:
         else:
             daynight_text = "Noche (*)"
             color = LIGHT_BLUE
-        daynight_surface = self.font.render(daynight_text, True, color)
+        daynight_surface = TEXT_CACHE.render(daynight_text, self.font_size, color)
         screen.blit(daynight_surface, (650, y_offset + 55))
         
+        # Velocidad de la simulación
+        speed_color = YELLOW if time_scale != 1 else WHITE
+        speed_surface = TEXT_CACHE.render(f"Velocidad: x{time_scale:g}", self.font_size, speed_color)
+        screen.blit(speed_surface, (800, y_offset + 55))
+        
         # Instrucciones
         instructions = [
-            "B: Menú de Construcción | L: Leaderboard | Click: Seleccionar trabajador | Click derecho: Asignar tarea | ESC: Salir"
+            "B: Menú de Construcción | L: Leaderboard | F: Velocidad | Click: Seleccionar trabajador | Click derecho: Asignar tarea | ESC: Salir"
         ]
         
         for i, instruction in enumerate(instructions):
-            inst_surface = self.small_font.render(instruction, True, GRAY)
+            inst_surface = TEXT_CACHE.render(instruction, self.small_font_size, GRAY)
             screen.blit(inst_surface, (500, y_offset + 20 + i * 20))
             
     def get_resource_color(self, resource_type):
-        if resource_type == ResourceType.COAL:
-            return DARK_GRAY
-        elif resource_type == ResourceType.WOOD:
-            return BROWN
-        elif resource_type == ResourceType.FOOD:
-            return ORANGE
-        return WHITE
+        return RESOURCE_COLORS[resource_type.code]
+
+class PerformanceOverlay:
+    """Panel F3 con p50/p95/p99 (ms) de cada fase del perfilador"""
+    REFRESH_FRAMES = 30  # El texto se regenera cada medio segundo, no cada frame
+    
+    def __init__(self, profiler):
+        self.profiler = profiler
+        self.font_size = 18
+        self.visible = False
+        self.surface = None
+        self.rect = None
+        self._frames = 0
+        
+    def toggle(self):
+        self.visible = not self.visible
+        # Con traza activa el perfilador sigue midiendo aunque se oculte el panel
+        self.profiler.enabled = self.visible or self.profiler.trace_path is not None
+        self.surface = None
+        
+    def update(self):
+        self._frames += 1
+        if self.surface is not None and self._frames % self.REFRESH_FRAMES:
+            return
+        stats = self.profiler.stats()
+        lines = [f"{'Fase':<18}{'p50':>8}{'p95':>8}{'p99':>8}"]
+        for name in sorted(stats, key=lambda n: (n != 'frame', n)):
+            s = stats[name]
+            lines.append(f"{name:<18}{s['p50']:>8.2f}{s['p95']:>8.2f}{s['p99']:>8.2f}")
+        rendered = [TEXT_CACHE.render(line, self.font_size, WHITE) for line in lines]
+        width = max(r.get_width() for r in rendered) + 12
+        height = len(rendered) * 16 + 10
+        surface = pygame.Surface((width, height))
+        surface.fill(DARK_BLUE)
+        for i, line in enumerate(rendered):
+            surface.blit(line, (6, 5 + i * 16))
+        self.surface = surface
+        self.rect = pygame.Rect(10, UI_HEIGHT + 10, width, height)
+        
+    def draw(self, screen):
+        if self.surface is not None:
+            screen.blit(self.surface, self.rect)
 
 class Game:
-    def __init__(self):
+    def __init__(self, enable_persistence: bool = True, initial_workers: int = 5, dirty_rects: bool = True,
+                 profile: bool = False, profile_trace: Optional[str] = None, seed: Optional[int] = None,
+                 balance: Optional[Balance] = None, startup: Optional[StartupReport] = None):
+        # Solo vídeo y fuentes: pygame.init() también arranca audio y joysticks, que el juego no usa
+        pygame.display.init()
+        pygame.font.init()
         self.screen = pygame.display.set_mode((SCREEN_WIDTH, SCREEN_HEIGHT))
         pygame.display.set_caption("Frostpunk - Gestión de Recursos")
-        self.game_state = GameState()
+        self.clock = pygame.time.Clock()
+        self.startup = startup
+        if startup is not None:
+            startup.mark('sdl')
+        # El backend no conecta aquí: la sesión va al outbox y se envía desde su hilo
+        self.game_state = GameState(enable_persistence=enable_persistence, initial_workers=initial_workers,
+                                    seed=seed, balance=balance)
+        if startup is not None:
+            startup.mark('state')
+        # Perfilador compartido con GameState (F3 muestra el panel)
+        self.profiler = self.game_state.profiler
+        self.profiler.trace_path = profile_trace
+        self.profiler.enabled = profile_trace is not None
+        self.overlay = PerformanceOverlay(self.profiler)
+        if profile:
+            self.overlay.toggle()
         self.ui = UI()
-        self.build_menu = BuildMenu()
+        self.build_menu = BuildMenu(self.game_state.balance)
         self.leaderboard = Leaderboard()
+        self.snow = SnowLayer(SCREEN_WIDTH, SCREEN_HEIGHT - UI_HEIGHT, top=UI_HEIGHT, density=SNOW_DENSITY)
+        # Renderizador por capas con rectángulos sucios (draw_full es el camino clásico)
+        self.renderer = None
+        if dirty_rects:
+            from renderer import LayeredRenderer
+            self.renderer = LayeredRenderer(self)
+        # Paso de simulación fijo (60 Hz) con escala de tiempo e interpolación
+        self.timestep = FixedTimestep()
+        self._previous_positions = {}
         self.running = True
         self.selected_building = None
+        if startup is not None:
+            startup.mark('ui')
         
     def handle_events(self):
         for event in pygame.event.get():
@@ -701,11 +1323,15 @@ class Game:
                     self.game_state.show_build_menu = not self.game_state.show_build_menu
                     if self.game_state.show_build_menu:
                         self.game_state.show_leaderboard = False
+                elif event.key == pygame.K_f:
+                    self.timestep.cycle_time_scale()
+                elif event.key == pygame.K_F3:
+                    self.overlay.toggle()
                 elif event.key == pygame.K_l:
                     self.game_state.show_leaderboard = not self.game_state.show_leaderboard
                     if self.game_state.show_leaderboard:
                         self.game_state.show_build_menu = False
-                        self.leaderboard.refresh_data(self.game_state.supabase)
+                        self.leaderboard.refresh_data(self.game_state.storage, self.game_state.game_session_id)
                 elif event.key == pygame.K_RETURN and self.game_state.show_build_menu:
                     self.try_build_selected()
                 elif event.key == pygame.K_UP and self.game_state.show_build_menu:
@@ -734,28 +1360,28 @@ class Game:
                 self.game_state.resources[resource] -= amount
             
             # Construir edificio
-            self.add_building(building_info['type'])
+            building = self.add_building(building_info['type'])
+            if building is not None:
+                cost = {resource.name.lower(): amount for resource, amount in building_info['cost'].items()}
+                self.game_state.events.publish(BUILDING_PLACED, building.building_type.value,
+                                               building.x, building.y, cost)
             self.game_state.show_build_menu = False
                 
     def handle_left_click(self, pos):
         # Verificar si se hizo click en un trabajador
-        for worker in self.game_state.workers:
-            if (worker.x - 4 <= pos[0] <= worker.x + 4 and 
-                worker.y - 4 <= pos[1] <= worker.y + 4):
-                # Deseleccionar trabajador anterior
-                if self.game_state.selected_worker:
-                    self.game_state.selected_worker.is_selected = False
-                # Seleccionar nuevo trabajador
-                worker.is_selected = True
-                self.game_state.selected_worker = worker
-                return
+        for worker in self.game_state.worker_index.query_point(*pos):
+            # Deseleccionar trabajador anterior
+            if self.game_state.selected_worker:
+                self.game_state.selected_worker.is_selected = False
+            # Seleccionar nuevo trabajador
+            worker.is_selected = True
+            self.game_state.selected_worker = worker
+            return
         
         # Verificar si se hizo click en un edificio
-        for building in self.game_state.buildings:
-            if (building.x <= pos[0] <= building.x + TILE_SIZE and 
-                building.y <= pos[1] <= building.y + TILE_SIZE):
-                self.selected_building = building
-                return
+        for building in self.game_state.building_index.query_point(*pos):
+            self.selected_building = building
+            return
         
         # Si no se hizo click en nada, deseleccionar
         if self.game_state.selected_worker:
@@ -764,113 +1390,113 @@ class Game:
         self.selected_building = None
     
     def handle_right_click(self, pos):
-        if not self.game_state.selected_worker:
+        if not self.game_state.selected_worker or self.game_state.selected_worker.dead:
             return
             
         worker = self.game_state.selected_worker
         
         # Verificar si se hizo click derecho en un árbol
-        for tree in self.game_state.trees:
-            if (tree.x - 12 <= pos[0] <= tree.x + 12 and 
-                tree.y - 12 <= pos[1] <= tree.y + 12 and not tree.is_chopped):
-                worker.assign_to_tree(tree)
+        for tree in self.game_state.tree_index.query_point(*pos):
+            if not tree.is_chopped:
+                worker.assign_to_tree(tree, self.game_state)
                 return
         
         # Verificar si se hizo click derecho en un edificio
-        for building in self.game_state.buildings:
-            if (building.x <= pos[0] <= building.x + TILE_SIZE and 
-                building.y <= pos[1] <= building.y + TILE_SIZE):
-                if worker.assign_to_building(building):
-                    return
-                break
+        for building in self.game_state.building_index.query_point(*pos):
+            worker.assign_to_building(building, self.game_state)
+            return
         
     def add_building(self, building_type):
         # Encontrar posición libre
-        x = random.randint(50, SCREEN_WIDTH - 100)
-        y = random.randint(UI_HEIGHT + 50, SCREEN_HEIGHT - 100)
+        rng = self.game_state.rng.placement
+        x = rng.randint(50, SCREEN_WIDTH - 100)
+        y = rng.randint(UI_HEIGHT + 50, SCREEN_HEIGHT - 100)
         
         # Verificar que no se superponga con otros edificios o árboles
-        for building in self.game_state.buildings:
-            if (abs(building.x - x) < TILE_SIZE and abs(building.y - y) < TILE_SIZE):
-                return
-        
-        for tree in self.game_state.trees:
-            if (abs(tree.x - x) < TILE_SIZE and abs(tree.y - y) < TILE_SIZE):
-                return
+        if self.game_state.near_building(x, y, TILE_SIZE) or self.game_state.near_tree(x, y, TILE_SIZE):
+            return None
                 
         new_building = Building(building_type, x, y)
-        self.game_state.buildings.append(new_building)
-        
-    def update(self):
-        # Actualizar trabajadores
+        self.game_state.register_building(new_building)
+        return new_building
+        
+    def update(self, steps: int = 1):
+        """Simular ``steps`` pasos fijos, guardando las posiciones previas al último"""
+        for i in range(steps):
+            if i == steps - 1:
+                self._previous_positions = {id(w): (w.x, w.y) for w in self.game_state.workers}
+            self.game_state.update()
+        
+    def render_position(self, worker):
+        """Posición del trabajador interpolada entre los dos últimos pasos"""
+        previous = self._previous_positions.get(id(worker))
+        if previous is None:
+            return (worker.x, worker.y)
+        alpha = self.timestep.alpha
+        return (previous[0] + (worker.x - previous[0]) * alpha,
+                previous[1] + (worker.y - previous[1]) * alpha)
+        
+    def render_positions(self):
+        """[(trabajador, posición interpolada)] de todos, con alpha calculado una sola vez"""
+        alpha = self.timestep.alpha
+        previous_positions = self._previous_positions
+        positions = []
         for worker in self.game_state.workers:
-            worker.update(self.game_state)
-        
-        # Actualizar edificios
-        for building in self.game_state.buildings:
-            building.update(self.game_state)
-        
-        # Actualizar árboles
-        for tree in self.game_state.trees:
-            tree.update()
+            x, y = worker.x, worker.y
+            previous = previous_positions.get(id(worker))
+            if previous is not None:
+                x = previous[0] + (x - previous[0]) * alpha
+                y = previous[1] + (y - previous[1]) * alpha
+            positions.append((worker, (x, y)))
+        return positions
         
-        # Generar árboles aleatoriamente
-        if random.random() < 0.001:  # 0.1% de probabilidad por frame
-            self.game_state.add_random_tree()
-        
-        # Actualizar tiempo de juego
-        self.game_state.game_time += 1
-        self.game_state.advance_time()
-        
-        # Guardado automático
-        self.game_state.auto_save()
-        
-        # Cambiar día cada 10 segundos (600 frames a 60 FPS)
-        if self.game_state.game_time % 600 == 0:
-            # Variar temperatura
-            self.game_state.temperature += random.randint(-5, 5)
-            self.game_state.temperature = max(-30, min(10, self.game_state.temperature))
-        
-        # Consumo automático de recursos
-        if self.game_state.game_time % 300 == 0:  # Cada 5 segundos
-            # Consumo de carbón para calefacción
-            if self.game_state.temperature < -5:
-                needed_coal = len([b for b in self.game_state.buildings if b.needs_heat])
-                self.game_state.resources[ResourceType.COAL] = max(0, 
-                    self.game_state.resources[ResourceType.COAL] - needed_coal)
-                    
     def draw(self):
+        if self.overlay.visible:
+            self.overlay.update()
+        if self.renderer is not None:
+            self.renderer.draw()
+        else:
+            self.draw_full()
+        
+    def draw_full(self):
+        """Redibujar todo el frame y volcarlo con flip()"""
+        section = self.profiler.section
         # Limpiar pantalla
         self.screen.fill(BLACK)
         
-        # Dibujar fondo (nieve/paisaje)
-        for x in range(0, SCREEN_WIDTH, TILE_SIZE):
-            for y in range(UI_HEIGHT, SCREEN_HEIGHT, TILE_SIZE):
-                if random.random() < 0.1:  # 10% de probabilidad de nieve
-                    pygame.draw.circle(self.screen, WHITE, 
-                                     (x + random.randint(0, TILE_SIZE), 
-                                      y + random.randint(0, TILE_SIZE)), 1)
+        # Dibujar fondo (paisaje pre-renderizado)
+        with section('draw.background'):
+            self.snow.update()
+            self.snow.draw_background(self.screen)
         
         # Dibujar árboles
-        for tree in self.game_state.trees:
-            tree.draw(self.screen)
+        with section('draw.trees'):
+            for tree in self.game_state.trees:
+                tree.draw(self.screen)
         
         # Dibujar edificios
-        for building in self.game_state.buildings:
-            building.draw(self.screen)
+        with section('draw.buildings'):
+            for building in self.game_state.buildings:
+                building.draw(self.screen)
             
         # Dibujar trabajadores
-        for worker in self.game_state.workers:
-            worker.draw(self.screen)
+        with section('draw.workers'):
+            for worker, position in self.render_positions():
+                worker.draw(self.screen, position)
             
         # Dibujar selección
         if self.selected_building:
             pygame.draw.rect(self.screen, YELLOW, 
                            (self.selected_building.x - 2, self.selected_building.y - 2, 
                             TILE_SIZE + 4, TILE_SIZE + 4), 3)
+        
+        # Copos de nieve por encima de la escena
+        with section('draw.flakes'):
+            self.snow.draw_flakes(self.screen)
             
         # Dibujar UI
-        self.ui.draw(self.screen, self.game_state)
+        with section('draw.ui'):
+            self.ui.draw(self.screen, self.game_state, self.timestep.time_scale)
         
         # Dibujar menú de construcción
         if self.game_state.show_build_menu:
@@ -880,27 +1506,56 @@ class Game:
         if self.game_state.show_leaderboard:
             self.leaderboard.draw(self.screen)
         
+        # Panel de rendimiento (F3)
+        if self.overlay.visible:
+            self.overlay.draw(self.screen)
+        
         # Actualizar pantalla
-        pygame.display.flip()
+        with section('draw.present'):
+            pygame.display.flip()
         
     def run(self):
+        clock = self.clock
+        profiler = self.profiler
+        clock.tick()
+        startup = self.startup
         while self.running:
-            self.handle_events()
-            self.update()
-            self.draw()
-            self.game_state.clock.tick(self.game_state.fps)
+            profiler.begin_frame()
+            with profiler.section('events'):
+                self.handle_events()
+            # La simulación avanza según el tiempo real, no según los frames dibujados
+            steps = self.timestep.advance(clock.get_time() / 1000)
+            with profiler.section('update'):
+                self.update(steps)
+            with profiler.section('draw'):
+                self.draw()
+            profiler.end_frame()
+            if startup is not None:
+                # Hasta el primer frame presentado
+                startup.mark('first_frame')
+                startup.report()
+                startup = None
+            clock.tick(self.game_state.fps)
             
+        if profiler.trace_path is not None:
+            count = profiler.write_trace()
+            print(f"⏱️  Traza de {count} eventos guardada en {profiler.trace_path}")
         pygame.quit()
 
 class Leaderboard:
     def __init__(self):
-        self.font = pygame.font.Font(None, 20)
-        self.title_font = pygame.font.Font(None, 24)
+        self.font_size = 20
+        self.title_font_size = 24
         self.data = []
+        self.cache = None
+        self.current_game_id = None
         
-    def refresh_data(self, supabase_manager):
-        """Actualizar datos del leaderboard"""
-        self.data = supabase_manager.get_leaderboard(10)
+    def refresh_data(self, storage, game_id=None):
+        """Mostrar el leaderboard en caché y revalidarlo en segundo plano (no bloquea)"""
+        self.cache = storage.leaderboard
+        self.current_game_id = game_id
+        self.cache.revalidate()
+        self.data = self.cache.rows(10)
         
     def draw(self, screen):
         """Dibujar leaderboard"""
@@ -914,7 +1569,7 @@ class Leaderboard:
         pygame.draw.rect(screen, WHITE, (menu_x, menu_y, menu_width, menu_height), 2)
         
         # Título
-        title = self.title_font.render("🏆 Tabla de Puntuaciones", True, YELLOW)
+        title = TEXT_CACHE.render("🏆 Tabla de Puntuaciones", self.title_font_size, YELLOW)
         screen.blit(title, (menu_x + 10, menu_y + 10))
         
         # Encabezados
@@ -923,44 +1578,58 @@ class Leaderboard:
         header_y = menu_y + 40
         
         for i, header in enumerate(headers):
-            header_surface = self.font.render(header, True, WHITE)
+            header_surface = TEXT_CACHE.render(header, self.font_size, WHITE)
             screen.blit(header_surface, (header_x + i * 80, header_y))
         
-        # Datos
+        # Datos (la consulta en segundo plano puede haber terminado desde el último frame)
+        if self.cache is not None:
+            self.data = self.cache.rows(10)
         for i, record in enumerate(self.data[:10]):
             y_pos = menu_y + 70 + i * 25
             color = YELLOW if i == 0 else WHITE
+            if self.current_game_id and record.get('id') == self.current_game_id:
+                color = LIGHT_GREEN  # Partida actual
             
             # Posición
             pos_text = f"{i+1}."
-            pos_surface = self.font.render(pos_text, True, color)
+            pos_surface = TEXT_CACHE.render(pos_text, self.font_size, color)
             screen.blit(pos_surface, (header_x, y_pos))
             
             # Jugador
             player_text = record.get('player_name', 'Unknown')[:8]
-            player_surface = self.font.render(player_text, True, color)
+            player_surface = TEXT_CACHE.render(player_text, self.font_size, color)
             screen.blit(player_surface, (header_x + 80, y_pos))
             
             # Día
             day_text = str(record.get('final_day', 0))
-            day_surface = self.font.render(day_text, True, color)
+            day_surface = TEXT_CACHE.render(day_text, self.font_size, color)
             screen.blit(day_surface, (header_x + 160, y_pos))
             
             # Trabajadores
             workers_text = str(record.get('workers_survived', 0))
-            workers_surface = self.font.render(workers_text, True, color)
+            workers_surface = TEXT_CACHE.render(workers_text, self.font_size, color)
             screen.blit(workers_surface, (header_x + 240, y_pos))
             
             # Edificios
             buildings_text = str(record.get('buildings_constructed', 0))
-            buildings_surface = self.font.render(buildings_text, True, color)
+            buildings_surface = TEXT_CACHE.render(buildings_text, self.font_size, color)
             screen.blit(buildings_surface, (header_x + 320, y_pos))
         
         # Instrucciones
         inst_text = "ESC: Cerrar | L: Actualizar"
-        inst_surface = self.font.render(inst_text, True, GRAY)
+        inst_surface = TEXT_CACHE.render(inst_text, self.font_size, GRAY)
         screen.blit(inst_surface, (menu_x + 10, menu_y + menu_height - 25))
 
 if __name__ == "__main__":
-    game = Game()
+    import argparse
+    parser = argparse.ArgumentParser(description="Frostpunk - Gestión de Recursos")
+    parser.add_argument('--profile', action='store_true', help="Abrir con el panel de rendimiento (F3)")
+    parser.add_argument('--profile-trace', metavar='RUTA', help="Guardar una traza de Chrome (JSON) al salir")
+    parser.add_argument('--startup-report', action='store_true', help="Tiempo de arranque por fase")
+    args = parser.parse_args()
+    startup = None
+    if args.startup_report:
+        startup = StartupReport(_IMPORT_STARTED)
+        startup.mark('imports')
+    game = Game(profile=args.profile, profile_trace=args.profile_trace, startup=startup)
     game.run()
@@ -0,0 +1,105 @@
+"""Tablón de trabajos: plazas libres en edificios y árboles sin reclamar.
+
+Sustituye el recorrido de todos los edificios y árboles (y, por cada árbol, de
+todos los trabajadores) que hacía ``Worker.find_work`` en cada frame. Los
+huecos disponibles se guardan en montículos ordenados por orden de registro,
+así que un trabajador inactivo obtiene el mismo edificio o árbol que elegía el
+bucle lineal ("el primero de la lista") en O(log n).
+
+Las entradas se invalidan de forma perezosa: un edificio lleno o un árbol
+cortado/reclamado se descarta al llegar a la cima del montículo, y vuelve a
+entrar cuando se libera una plaza o el árbol se regenera.
+"""
+import heapq
+import itertools
+from typing import Dict, List, Optional, Tuple
+
+class JobBoard:
+    def __init__(self):
+        self._order = itertools.count()
+        self._seq: Dict[int, int] = {}
+        self._building_heap: List[Tuple[int, object]] = []
+        self._tree_heap: List[Tuple[int, object]] = []
+        self._queued = set()
+        self._tree_claims: Dict[int, int] = {}
+
+    def _push(self, heap, obj):
+        key = id(obj)
+        if key not in self._queued:
+            self._queued.add(key)
+            heapq.heappush(heap, (self._seq[key], obj))
+
+    def _pop(self, heap):
+        _, obj = heapq.heappop(heap)
+        self._queued.discard(id(obj))
+
+    # Edificios
+
+    def add_building(self, building):
+        self._seq[id(building)] = next(self._order)
+        if building.needs_worker():
+            self._push(self._building_heap, building)
+
+    def claim_building(self, worker):
+        """Asignar al trabajador el primer edificio con plaza libre, o None"""
+        heap = self._building_heap
+        while heap:
+            building = heap[0][1]
+            if building.needs_worker():
+                building.assign_worker(worker)
+                if not building.needs_worker():
+                    self._pop(heap)
+                return building
+            self._pop(heap)
+        return None
+
+    def assign_building(self, building, worker) -> bool:
+        """Asignación manual a un edificio concreto"""
+        if not building.needs_worker():
+            return False
+        building.assign_worker(worker)
+        return True
+
+    def release_building(self, building, worker):
+        """El trabajador deja el edificio y su plaza vuelve al tablón"""
+        building.release_worker(worker)
+        if building.needs_worker():
+            self._push(self._building_heap, building)
+
+    # Árboles
+
+    def add_tree(self, tree):
+        self._seq[id(tree)] = next(self._order)
+        if not tree.is_chopped:
+            self._push(self._tree_heap, tree)
+
+    def is_tree_claimed(self, tree) -> bool:
+        return self._tree_claims.get(id(tree), 0) > 0
+
+    def claim_tree(self):
+        """Reclamar el primer árbol sin cortar y sin trabajador asignado, o None"""
+        heap = self._tree_heap
+        while heap:
+            tree = heap[0][1]
+            self._pop(heap)
+            if not tree.is_chopped and not self.is_tree_claimed(tree):
+                self._tree_claims[id(tree)] = 1
+                return tree
+        return None
+
+    def assign_tree(self, tree):
+        """Asignación manual (varios trabajadores pueden compartir árbol)"""
+        self._tree_claims[id(tree)] = self._tree_claims.get(id(tree), 0) + 1
+
+    def release_tree(self, tree):
+        claims = self._tree_claims.get(id(tree), 0) - 1
+        if claims > 0:
+            self._tree_claims[id(tree)] = claims
+            return
+        self._tree_claims.pop(id(tree), None)
+        if not tree.is_chopped:
+            self._push(self._tree_heap, tree)
+
+    def tree_regrown(self, tree):
+        if not self.is_tree_claimed(tree):
+            self._push(self._tree_heap, tree)
@@ -0,0 +1,123 @@
+"""Caché del leaderboard con TTL y revalidación en segundo plano.
+
+Antes cada pulsación de L llamaba a ``SupabaseManager.get_leaderboard`` en el
+hilo del juego y la UI se quedaba esperando la consulta ordenada por
+``final_day``. ``LeaderboardCache.rows()`` devuelve siempre lo último que
+tiene (stale-while-revalidate) y, si ha pasado el TTL, lanza la consulta en un
+hilo aparte. Si la consulta falla (``fetch`` devuelve None o lanza), se
+conservan las filas anteriores y siguen caducadas, pero no se reintenta hasta
+pasados ``retry_after`` segundos: ``rows()`` se llama en cada frame y sin esa
+espera una caída de red lanzaría una consulta (y un error) por frame.
+
+Las partidas de esta ejecución no esperan a la base de datos: cada
+``update_game_session`` las anota en ``LocalTopK`` (una lista ordenada), que se
+mezcla con las filas remotas, así que la posición actual del jugador aparece
+al momento.
+"""
+import bisect
+import threading
+import time
+from typing import Callable, Dict, List, Optional, Tuple
+
+class LocalTopK:
+    """Las k mejores partidas locales, ordenadas por final_day descendente"""
+
+    def __init__(self, k: int = 100):
+        self.k = k
+        self._keys: List[Tuple[int, int]] = []
+        self._rows: List[Dict] = []
+        self._by_id: Dict[str, Tuple[int, int]] = {}
+        self._order = 0
+
+    def update(self, game_id: str, row: Dict):
+        """Insertar o mover la fila de una partida"""
+        previous = self._by_id.pop(game_id, None)
+        if previous is not None:
+            index = bisect.bisect_left(self._keys, previous)
+            del self._keys[index]
+            del self._rows[index]
+        # Desempate por antigüedad de la anotación, como un orden estable
+        self._order += 1
+        key = (-row.get('final_day', 0), self._order)
+        index = bisect.bisect_left(self._keys, key)
+        self._keys.insert(index, key)
+        self._rows.insert(index, dict(row, id=game_id))
+        self._by_id[game_id] = key
+        if len(self._rows) > self.k:
+            self._keys.pop()
+            dropped = self._rows.pop()
+            del self._by_id[dropped['id']]
+
+    def rows(self) -> List[Dict]:
+        return list(self._rows)
+
+    def __contains__(self, game_id):
+        return game_id in self._by_id
+
+class LeaderboardCache:
+    def __init__(self, fetch: Callable[[int], Optional[List[Dict]]], ttl: float = 30.0, limit: int = 10,
+                 retry_after: float = 10.0):
+        self.fetch = fetch
+        self.ttl = ttl
+        self.limit = limit
+        self.retry_after = retry_after
+        self.local = LocalTopK()
+        self._remote: List[Dict] = []
+        self._fetched_at: Optional[float] = None
+        self._failed_at: Optional[float] = None
+        self._refreshing = False
+        self._lock = threading.Lock()
+
+    @property
+    def stale(self) -> bool:
+        now = time.monotonic()
+        if self._failed_at is not None and now - self._failed_at < self.retry_after:
+            return False
+        return self._fetched_at is None or now - self._fetched_at >= self.ttl
+
+    def record_session(self, game_id: str, row: Dict):
+        """Anotar el estado actual de una partida de esta ejecución"""
+        with self._lock:
+            self.local.update(game_id, row)
+
+    def revalidate(self) -> bool:
+        """Lanzar la consulta en segundo plano si no hay ya una en curso"""
+        with self._lock:
+            if self._refreshing:
+                return False
+            self._refreshing = True
+        threading.Thread(target=self._refresh, name="leaderboard-refresh", daemon=True).start()
+        return True
+
+    def _refresh(self):
+        try:
+            rows = self.fetch(self.limit)
+        except Exception as e:
+            print(f"❌ Error obteniendo leaderboard: {e}")
+            rows = None
+        with self._lock:
+            if rows is not None:
+                self._remote = rows
+                self._fetched_at = time.monotonic()
+                self._failed_at = None
+            else:
+                self._failed_at = time.monotonic()
+            self._refreshing = False
+
+    def rows(self, limit: Optional[int] = None) -> List[Dict]:
+        """Filas remotas en caché mezcladas con las partidas locales, sin bloquear"""
+        if self.stale:
+            self.revalidate()
+        limit = limit or self.limit
+        with self._lock:
+            local = self.local.rows()
+            remote = [row for row in self._remote if row.get('id') not in self.local]
+        # sorted es estable: ante empate, las filas remotas (ya ordenadas) van primero
+        return sorted(remote + local, key=lambda row: -row.get('final_day', 0))[:limit]
+
+    def rank_of(self, game_id: str) -> Optional[int]:
+        """Posición (1..limit) de una partida en el leaderboard mezclado"""
+        for position, row in enumerate(self.rows(), start=1):
+            if row.get('id') == game_id:
+                return position
+        return None
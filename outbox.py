@@ -0,0 +1,190 @@
+"""Bandeja de salida local (write-ahead) para las escrituras de Supabase.
+
+Cada insert, update o upsert que quiere hacer ``SupabaseManager`` se anota
+primero en una tabla SQLite local y después un hilo la reenvía a Supabase en
+lotes. Si la red falla, las filas se quedan en disco y se reintentan cuando
+vuelve la conexión (también en la siguiente ejecución, tras un cierre o un
+fallo del proceso).
+
+- **Idempotencia**: cada entrada tiene una ``key`` única. Las filas insertadas
+  llevan un ``id`` UUID generado en el cliente y se reenvían como upsert con
+  ``ignore_duplicates``, así que un reintento nunca duplica una fila. Anotar
+  otra vez la misma clave (p. ej. la fila de un trabajador o el update de la
+  partida) sustituye a la entrada pendiente en lugar de acumularla.
+- **Disco acotado**: como mucho ``max_rows`` entradas pendientes; al pasarse
+  se descartan sesiones enteras, de la más antigua a la más nueva, hasta
+  cubrir el exceso (``dropped``). Así nunca queda en cola una fila cuya
+  partida se descartó, ni la partida sin sus filas. La sesión que se está
+  escribiendo no se descarta entera: si ella sola se pasa, pierde primero sus
+  filas dependientes más antiguas y nunca la de ``parent_table``. SQLite
+  reutiliza las páginas libres, así que el fichero no crece más allá del pico.
+- **Rechazos**: una entrada que el servidor rechaza para siempre (datos
+  inválidos, claves foráneas, restricciones) se mueve con ``reject()`` a la
+  tabla ``dead_letter`` del mismo fichero, con el error, para que no bloquee la
+  cola. Si es el insert de ``parent_table``, le acompaña el resto de su sesión.
+"""
+import json
+import sqlite3
+import threading
+import time
+from typing import Dict, List, NamedTuple, Optional, Tuple
+
+INSERT = 'insert'
+UPDATE = 'update'
+UPSERT = 'upsert'
+
+class OutboxEntry(NamedTuple):
+    seq: int
+    key: str
+    table: str
+    op: str
+    payload: Dict
+    match: Optional[Dict]
+    on_conflict: Optional[str]
+    session: Optional[str]
+
+class Outbox:
+    def __init__(self, path: str = 'supabase_outbox.sqlite3', max_rows: int = 50000,
+                 parent_table: Optional[str] = None):
+        self.path = path
+        self.max_rows = max_rows
+        self.parent_table = parent_table  # Tabla de la fila de la que dependen las demás de su sesión
+        self.dropped = 0
+        self.rejected = 0
+        self._lock = threading.Lock()
+        self._conn = sqlite3.connect(path, check_same_thread=False, isolation_level=None)
+        self._conn.execute('PRAGMA journal_mode=WAL')
+        self._conn.execute('PRAGMA synchronous=NORMAL')
+        self._conn.execute("""
+            CREATE TABLE IF NOT EXISTS outbox (
+              seq INTEGER PRIMARY KEY AUTOINCREMENT,
+              key TEXT NOT NULL UNIQUE,
+              tbl TEXT NOT NULL,
+              op TEXT NOT NULL,
+              payload TEXT NOT NULL,
+              match TEXT,
+              on_conflict TEXT,
+              created_at REAL NOT NULL,
+              session TEXT
+            )""")
+        # Outbox de una versión anterior, sin sesión
+        columns = [row[1] for row in self._conn.execute('PRAGMA table_info(outbox)')]
+        if 'session' not in columns:
+            self._conn.execute('ALTER TABLE outbox ADD COLUMN session TEXT')
+        self._conn.execute('CREATE INDEX IF NOT EXISTS outbox_session ON outbox (session)')
+        self._conn.execute("""
+            CREATE TABLE IF NOT EXISTS dead_letter (
+              seq INTEGER PRIMARY KEY,
+              key TEXT NOT NULL,
+              tbl TEXT NOT NULL,
+              op TEXT NOT NULL,
+              payload TEXT NOT NULL,
+              match TEXT,
+              on_conflict TEXT,
+              created_at REAL NOT NULL,
+              session TEXT,
+              error TEXT,
+              rejected_at REAL NOT NULL
+            )""")
+
+    def append(self, key: str, table: str, op: str, payload: Dict,
+               match: Optional[Dict] = None, on_conflict: Optional[str] = None, session: Optional[str] = None):
+        """Anotar una escritura; sustituye a la pendiente con la misma clave"""
+        self.append_many([(key, table, op, payload, match, on_conflict, session)])
+
+    def append_many(self, writes: List[Tuple]):
+        """Anotar varias escrituras (key, table, op, payload, match, on_conflict, session) en una transacción"""
+        now = time.time()
+        rows = [(key, table, op, json.dumps(payload, default=str),
+                 json.dumps(match) if match is not None else None, on_conflict, now, session)
+                for key, table, op, payload, match, on_conflict, session in writes]
+        with self._lock:
+            conn = self._conn
+            conn.execute('BEGIN IMMEDIATE')
+            try:
+                # REPLACE borra la entrada anterior y la vuelve a insertar al final de la cola
+                conn.executemany('INSERT OR REPLACE INTO outbox (key, tbl, op, payload, match, on_conflict, '
+                                 'created_at, session) VALUES (?, ?, ?, ?, ?, ?, ?, ?)', rows)
+                excess = conn.execute('SELECT COUNT(*) FROM outbox').fetchone()[0] - self.max_rows
+                if excess > 0:
+                    self.dropped += self._evict(conn, excess, rows[-1][-1] if rows else None)
+                conn.execute('COMMIT')
+            except Exception:
+                conn.execute('ROLLBACK')
+                raise
+
+    def _evict(self, conn: sqlite3.Connection, excess: int, current: Optional[str]) -> int:
+        """Descartar sesiones enteras, la más antigua primero, hasta cubrir ``excess``; devuelve cuántas filas
+
+        ``current`` (la sesión recién anotada) solo pierde filas dependientes, y
+        solo si las demás sesiones no bastan.
+        """
+        sessions = conn.execute('SELECT session, COUNT(*) FROM outbox GROUP BY session ORDER BY MIN(seq)').fetchall()
+        evicted = []
+        covered = 0
+        for session, count in sessions:
+            if covered >= excess:
+                break
+            if session != current:
+                evicted.append((session,))
+                covered += count
+        dropped = 0
+        if evicted:
+            dropped = conn.executemany('DELETE FROM outbox WHERE session IS ?', evicted).rowcount
+        if dropped < excess:
+            dropped += conn.execute('DELETE FROM outbox WHERE seq IN (SELECT seq FROM outbox WHERE session IS ? '
+                                    'AND tbl IS NOT ? ORDER BY seq LIMIT ?)',
+                                    (current, self.parent_table, excess - dropped)).rowcount
+        return dropped
+
+    def peek(self, limit: int = 500) -> List[OutboxEntry]:
+        """Entradas pendientes más antiguas, en orden de anotación"""
+        with self._lock:
+            rows = self._conn.execute('SELECT seq, key, tbl, op, payload, match, on_conflict, session '
+                                      'FROM outbox ORDER BY seq LIMIT ?', (limit,)).fetchall()
+        return [OutboxEntry(seq, key, table, op, json.loads(payload),
+                            json.loads(match) if match is not None else None, on_conflict, session)
+                for seq, key, table, op, payload, match, on_conflict, session in rows]
+
+    def ack(self, entries: List[OutboxEntry]):
+        """Borrar entradas ya enviadas (si no fueron sustituidas mientras tanto)"""
+        with self._lock:
+            self._conn.executemany('DELETE FROM outbox WHERE seq = ?', [(entry.seq,) for entry in entries])
+
+    def reject(self, entry: OutboxEntry, error: str) -> int:
+        """Mover al dead letter una entrada rechazada por el servidor; devuelve cuántas se movieron
+
+        Si es el insert de ``parent_table`` se mueve también el resto de su
+        sesión, que fallaría por la clave foránea.
+        """
+        if entry.table == self.parent_table and entry.op == INSERT and entry.session is not None:
+            where, params = 'seq = ? OR session = ?', (entry.seq, entry.session)
+        else:
+            where, params = 'seq = ?', (entry.seq,)
+        with self._lock:
+            conn = self._conn
+            conn.execute('BEGIN IMMEDIATE')
+            try:
+                conn.execute('INSERT OR REPLACE INTO dead_letter SELECT seq, key, tbl, op, payload, match, '
+                             'on_conflict, created_at, session, ?, ? FROM outbox WHERE ' + where,
+                             (error, time.time()) + params)
+                moved = conn.execute('DELETE FROM outbox WHERE ' + where, params).rowcount
+                conn.execute('COMMIT')
+            except Exception:
+                conn.execute('ROLLBACK')
+                raise
+        self.rejected += moved
+        return moved
+
+    def dead_letters(self) -> int:
+        """Entradas rechazadas guardadas en ``dead_letter``"""
+        with self._lock:
+            return self._conn.execute('SELECT COUNT(*) FROM dead_letter').fetchone()[0]
+
+    def __len__(self):
+        with self._lock:
+            return self._conn.execute('SELECT COUNT(*) FROM outbox').fetchone()[0]
+
+    def close(self):
+        with self._lock:
+            self._conn.close()
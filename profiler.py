@@ -0,0 +1,140 @@
+"""Perfilador por fases del frame y overlay de rendimiento (F3).
+
+Cada fase se envuelve en ``with profiler.section('nombre'):``. Desactivado,
+``section`` devuelve siempre el mismo contexto vacío (una llamada y un ``with``,
+sin medir nada). Activado, suma el tiempo de cada fase dentro del frame (con
+paso fijo puede haber varios ``update`` por frame) y ``end_frame()`` guarda el
+total en una ventana deslizante de ``window`` frames, de la que salen p50, p95
+y p99.
+
+Con ``trace_path`` además se anota cada sección como evento completo (``"ph":
+"X"``) del formato Trace Event de Chrome; ``write_trace()`` lo vuelca en un
+JSON que abren ``chrome://tracing`` o Perfetto.
+"""
+import json
+import time
+from collections import deque
+from typing import Deque, Dict, List, Optional, TextIO, Tuple
+
+class _NullSection:
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc):
+        return False
+
+NULL_SECTION = _NullSection()
+
+class _Section:
+    __slots__ = ('profiler', 'name', 'start')
+
+    def __init__(self, profiler: "FrameProfiler", name: str):
+        self.profiler = profiler
+        self.name = name
+        self.start = 0
+
+    def __enter__(self):
+        self.start = time.perf_counter_ns()
+        return self
+
+    def __exit__(self, *exc):
+        end = time.perf_counter_ns()
+        self.profiler._add(self.name, self.start, end)
+        return False
+
+def percentile(sorted_values: List[float], fraction: float) -> float:
+    """Percentil por rango más cercano de una lista ya ordenada"""
+    if not sorted_values:
+        return 0.0
+    index = min(len(sorted_values) - 1, max(0, int(round(fraction * len(sorted_values))) - 1))
+    return sorted_values[index]
+
+class FrameProfiler:
+    MAX_TRACE_EVENTS = 1_000_000  # ~100 MB de JSON como mucho
+
+    def __init__(self, enabled: bool = False, window: int = 240, trace_path: Optional[str] = None):
+        self.window = window
+        self.trace_path = trace_path
+        self.enabled = enabled or trace_path is not None
+        self.frames = 0
+        self._sections: Dict[str, _Section] = {}
+        self._frame: Dict[str, int] = {}
+        self._history: Dict[str, Deque[float]] = {}
+        self._frame_start = 0
+        self._trace: List[Dict] = []
+        self._origin = time.perf_counter_ns()
+
+    def section(self, name: str):
+        """Contexto que mide una fase (vacío si el perfilador está desactivado)"""
+        if not self.enabled:
+            return NULL_SECTION
+        section = self._sections.get(name)
+        if section is None:
+            section = self._sections[name] = _Section(self, name)
+        return section
+
+    def _add(self, name: str, start: int, end: int):
+        self._frame[name] = self._frame.get(name, 0) + (end - start)
+        if self.trace_path is not None and len(self._trace) < self.MAX_TRACE_EVENTS:
+            self._trace.append({'name': name, 'ph': 'X', 'pid': 1, 'tid': 1,
+                                'ts': (start - self._origin) / 1000, 'dur': (end - start) / 1000})
+
+    def begin_frame(self):
+        if self.enabled:
+            self._frame_start = time.perf_counter_ns()
+
+    def end_frame(self):
+        """Cerrar el frame: pasar los tiempos acumulados a la ventana deslizante"""
+        if not self.enabled:
+            return
+        if self._frame_start:
+            self._add('frame', self._frame_start, time.perf_counter_ns())
+        self._frame_start = 0
+        for name, total in self._frame.items():
+            history = self._history.get(name)
+            if history is None:
+                history = self._history[name] = deque(maxlen=self.window)
+            history.append(total / 1e6)
+        self._frame = {}
+        self.frames += 1
+
+    def stats(self) -> Dict[str, Dict[str, float]]:
+        """{fase: {'p50', 'p95', 'p99'}} en milisegundos sobre la ventana"""
+        result = {}
+        for name, history in self._history.items():
+            values = sorted(history)
+            result[name] = {'p50': percentile(values, 0.50), 'p95': percentile(values, 0.95),
+                            'p99': percentile(values, 0.99)}
+        return result
+
+    def write_trace(self, path: Optional[str] = None) -> int:
+        """Volcar los eventos en formato Trace Event de Chrome; devuelve cuántos"""
+        path = path or self.trace_path
+        if path is None:
+            return 0
+        with open(path, 'w') as f:
+            json.dump({'traceEvents': self._trace, 'displayTimeUnit': 'ms'}, f)
+        return len(self._trace)
+
+class StartupReport:
+    """Tiempo de arranque por fase hasta el primer frame (``game.py --startup-report``)"""
+
+    def __init__(self, start: Optional[float] = None):
+        self.start = time.perf_counter() if start is None else start
+        self._last = self.start
+        self.phases: List[Tuple[str, float]] = []
+
+    def mark(self, name: str):
+        """Cerrar la fase ``name``: tiempo desde la marca anterior"""
+        now = time.perf_counter()
+        self.phases.append((name, now - self._last))
+        self._last = now
+
+    def total(self) -> float:
+        return self._last - self.start
+
+    def report(self, file: Optional[TextIO] = None):
+        print("🚀 Arranque:", file=file)
+        for name, seconds in self.phases:
+            print(f"   {name:<12} {seconds * 1000:8.1f} ms", file=file)
+        print(f"   {'total':<12} {self.total() * 1000:8.1f} ms", file=file)
@@ -0,0 +1,419 @@
+"""Renderizador por capas con rectángulos sucios.
+
+Capas, de abajo arriba:
+
+1. ``static``: suelo nevado pre-renderizado + árboles + edificios. Solo se
+   repinta la zona de una entidad cuando cambia su aspecto (madera de un árbol,
+   trabajadores o salud de un edificio).
+2. ``scene``: la capa estática más trabajadores y la selección. Solo se
+   recomponen los rectángulos de los trabajadores cuyo aspecto cambió.
+3. Pantalla: ``scene`` + copos de nieve + panel de UI (que se renderiza en su
+   propia superficie solo cuando cambia algún valor mostrado).
+
+Cada frame se envía a ``pygame.display.update(rects)`` únicamente la lista de
+rectángulos modificados. Con un menú abierto (construcción o leaderboard) se
+compone el frame completo, como el camino clásico ``Game.draw_full``.
+
+Cuando se mueven muchos trabajadores, recomponer y restaurar región a región
+cuesta más en Python que dibujarlos todos: el frame se compone entonces
+directamente en pantalla (capa estática + trabajadores + copos + UI cacheada),
+que sigue ahorrando el repintado de suelo, árboles, edificios y textos del
+camino clásico. La capa ``scene`` se reconstruye al volver a pocos cambios.
+
+Comparar tiempos con el camino clásico:
+    SDL_VIDEODRIVER=dummy python renderer.py --compare --frames 600
+"""
+import argparse
+import os
+import time
+from typing import Dict, List
+
+import pygame
+
+from game import BLACK, TILE_SIZE, UI_HEIGHT, YELLOW, SCREEN_WIDTH, SCREEN_HEIGHT
+
+# Márgenes de dibujo (lo que pinta cada draw(), no solo la caja de colisión)
+def worker_rect(worker, pos=None) -> pygame.Rect:
+    x, y = pos if pos is not None else (worker.x, worker.y)
+    return pygame.Rect(int(x) - 8, int(y) - 12, 17, 20)
+
+def tree_rect(tree) -> pygame.Rect:
+    return pygame.Rect(tree.x - 13, tree.y - 24, 32, 42)
+
+def building_rect(building) -> pygame.Rect:
+    return pygame.Rect(building.x - 6, building.y - 6, TILE_SIZE + 12, TILE_SIZE + 16)
+
+def tree_signature(tree):
+    return (tree.is_chopped, tree.wood_amount)
+
+def building_signature(building):
+    return (len(building.workers), building.health < 100, int((building.health / 100) * TILE_SIZE))
+
+def worker_signature(worker, pos=None):
+    x, y = pos if pos is not None else (worker.x, worker.y)
+    return (int(x), int(y), worker.state, worker.is_selected)
+
+class LayeredRenderer:
+    # Fracción de pantalla sucia a partir de la cual se compone el frame entero
+    FULL_SCENE_AREA = 0.35
+    # Trabajadores con aspecto cambiado a partir de los cuales se compone el frame entero
+    MAX_WORKER_REGIONS = 16
+    # Frames enteros seguidos antes de volver a comparar las firmas de los trabajadores
+    COMPOSITE_FRAMES = 30
+
+    def __init__(self, game):
+        self.game = game
+        size = game.screen.get_size()
+        self.static = pygame.Surface(size).convert()
+        self.scene = pygame.Surface(size).convert()
+        self.ui_surface = pygame.Surface((SCREEN_WIDTH, UI_HEIGHT)).convert()
+        self.ui_rect = pygame.Rect(0, 0, SCREEN_WIDTH, UI_HEIGHT)
+        self._static_signatures: Dict[int, tuple] = {}
+        self._worker_frames: Dict[int, tuple] = {}  # id -> (firma, rect)
+        self._positions: List[tuple] = []  # (trabajador, posición) del frame en curso
+        self._flakes: List[tuple] = []
+        self._ui_signature = None
+        self._selection = None
+        self._perf_rect = None  # Zona del panel F3 en el último frame
+        self._needs_full = True
+        self._scene_stale = False  # El último frame se compuso sin pasar por ``scene``
+        self._composite_left = 0
+        self._frames_fresh = True  # _worker_frames tiene las firmas del frame anterior
+        self.last_dirty_count = 0
+
+    def invalidate(self):
+        """Forzar una recomposición completa en el próximo frame"""
+        self._needs_full = True
+
+    @staticmethod
+    def _enclose(region: pygame.Rect, find) -> tuple:
+        """Agrandar la región hasta contener entera cada entidad que toca.
+
+        pygame recorta mal los contornos (dibuja el borde en el límite del
+        recorte), así que no se dibuja con set_clip: la región crece hasta que
+        toda entidad que la toca cabe dentro, y se repinta completa.
+        ``find(region)`` devuelve [(entidad, rect_de_dibujo)] en orden de dibujo.
+        """
+        while True:
+            found = find(region)
+            grown = region.unionall([rect for _, rect in found]) if found else region
+            if grown == region:
+                return region, [entity for entity, _ in found]
+            region = grown
+
+    @staticmethod
+    def _merge(regions: List[pygame.Rect]) -> List[pygame.Rect]:
+        """Fusionar las regiones que se solapan para no repintar dos veces la misma zona"""
+        merged: List[pygame.Rect] = []
+        for region in regions:
+            region = pygame.Rect(region)
+            hits = region.collidelistall(merged)
+            while hits:
+                for index in reversed(hits):
+                    region.union_ip(merged.pop(index))
+                hits = region.collidelistall(merged)
+            merged.append(region)
+        return merged
+
+    # Capa estática
+
+    def _static_entities(self, region: pygame.Rect):
+        state = self.game.game_state
+        query = (region.left - TILE_SIZE, region.top - TILE_SIZE,
+                 region.right + TILE_SIZE, region.bottom + TILE_SIZE)
+        found = [(tree, tree_rect(tree)) for tree in state.tree_index.query_rect(query)]
+        found += [(building, building_rect(building)) for building in state.building_index.query_rect(query)]
+        return [(entity, rect) for entity, rect in found if rect.colliderect(region)]
+
+    def _draw_static_region(self, region: pygame.Rect) -> pygame.Rect:
+        region, entities = self._enclose(region, self._static_entities)
+        static = self.static
+        static.set_clip(region)
+        static.fill(BLACK)
+        self.game.snow.draw_background(static)
+        static.set_clip(None)
+        # Árboles primero y después edificios, como en el dibujado completo
+        for entity in entities:
+            entity.draw(static)
+        return region
+
+    def _rebuild_static(self):
+        state = self.game.game_state
+        self.static.fill(BLACK)
+        self.game.snow.draw_background(self.static)
+        for tree in state.trees:
+            tree.draw(self.static)
+        for building in state.buildings:
+            building.draw(self.static)
+        self._static_signatures = {id(t): tree_signature(t) for t in state.trees}
+        self._static_signatures.update({id(b): building_signature(b) for b in state.buildings})
+
+    def _static_changes(self) -> List[pygame.Rect]:
+        state = self.game.game_state
+        signatures = self._static_signatures
+        changed = []
+        for tree in state.trees:
+            signature = tree_signature(tree)
+            if signatures.get(id(tree)) != signature:
+                signatures[id(tree)] = signature
+                changed.append(tree_rect(tree))
+        for building in state.buildings:
+            signature = building_signature(building)
+            if signatures.get(id(building)) != signature:
+                signatures[id(building)] = signature
+                changed.append(building_rect(building))
+        return [self._draw_static_region(region) for region in self._merge(changed)]
+
+    # Capa de escena (trabajadores y selección)
+
+    def _selection_rect(self):
+        building = self.game.selected_building
+        if building is None:
+            return None
+        return pygame.Rect(building.x - 2, building.y - 2, TILE_SIZE + 4, TILE_SIZE + 4)
+
+    def _scene_entities(self, region: pygame.Rect):
+        # Margen extra: la posición interpolada va hasta un paso por detrás de la indexada
+        query = (region.left - 14, region.top - 14, region.right + 14, region.bottom + 14)
+        position = self.game.render_position
+        found = [(worker, worker_rect(worker, position(worker)))
+                 for worker in self.game.game_state.worker_index.query_rect(query)]
+        found = [(worker, rect) for worker, rect in found if rect.colliderect(region)]
+        if self._selection is not None and self._selection.colliderect(region):
+            found.append((None, self._selection))
+        return found
+
+    def _draw_scene_region(self, region: pygame.Rect) -> pygame.Rect:
+        region, entities = self._enclose(region, self._scene_entities)
+        scene = self.scene
+        scene.blit(self.static, region, region)
+        position = self.game.render_position
+        for worker in entities:
+            if worker is None:
+                pygame.draw.rect(scene, YELLOW, self._selection, 3)
+            else:
+                worker.draw(scene, position(worker))
+        return region
+
+    def _draw_scene_full(self):
+        self.scene.blit(self.static, (0, 0))
+        self._frames_fresh = True
+        frames = {}
+        for worker, pos in self.game.render_positions():
+            worker.draw(self.scene, pos)
+            frames[id(worker)] = (worker_signature(worker, pos), worker_rect(worker, pos))
+        if self._selection is not None:
+            pygame.draw.rect(self.scene, YELLOW, self._selection, 3)
+        self._worker_frames = frames
+
+    def _worker_changes(self) -> tuple:
+        """Rectángulos sucios de los trabajadores y la selección cuyo aspecto cambió
+
+        Devuelve (rectángulos, trabajadores cambiados) y actualiza las firmas.
+        """
+        dirty = []
+        changed = 0
+        frames = self._worker_frames
+        self._positions = positions = self.game.render_positions()
+        for worker, pos in positions:
+            signature = worker_signature(worker, pos)
+            previous = frames.get(id(worker))
+            if previous is None or previous[0] != signature:
+                rect = worker_rect(worker, pos)
+                if previous is not None:
+                    dirty.append(previous[1])
+                dirty.append(rect)
+                frames[id(worker)] = (signature, rect)
+                changed += 1
+
+        selection = self._selection_rect()
+        if selection != self._selection:
+            for rect in (self._selection, selection):
+                if rect is not None:
+                    dirty.append(rect.inflate(2, 2))
+            self._selection = selection
+        return dirty, changed
+
+    def _scene_changes(self, dirty: List[pygame.Rect]) -> List[pygame.Rect]:
+        if self._scene_stale:
+            self._draw_scene_full()
+            self._scene_stale = False
+            return [self.scene.get_rect()]
+        regions = [self._draw_scene_region(region) for region in self._merge(dirty)]
+        return self._merge(regions)
+
+    # UI
+
+    def _ui_state(self):
+        state = self.game.game_state
+        worker = state.selected_worker
+        selected = (int(worker.health), int(worker.energy), int(worker.hunger)) if worker else None
+        return (tuple(state.resources.values()), state.living_workers(), selected, state.temperature,
+                state.day, state.hour, state.minute, state.is_daytime(), self.game.timestep.time_scale)
+
+    def _ui_changed(self) -> bool:
+        signature = self._ui_state()
+        if signature == self._ui_signature:
+            return False
+        self._ui_signature = signature
+        self.ui_surface.fill(BLACK)
+        self.game.ui.draw(self.ui_surface, self.game.game_state, self.game.timestep.time_scale)
+        return True
+
+    # Frame
+
+    def _overlay_open(self) -> bool:
+        state = self.game.game_state
+        return state.show_build_menu or state.show_leaderboard
+
+    def _draw_full(self, screen, flakes):
+        self._rebuild_static()
+        self._selection = self._selection_rect()
+        self._draw_scene_full()
+        self._scene_stale = False
+        self._ui_signature = None
+        self._ui_changed()
+        screen.blit(self.scene, (0, 0))
+        self.game.snow.draw_flakes(screen, flakes)
+        screen.blit(self.ui_surface, self.ui_rect)
+        game = self.game
+        if game.game_state.show_build_menu:
+            game.build_menu.draw(screen, game.game_state)
+        if game.game_state.show_leaderboard:
+            game.leaderboard.draw(screen)
+        self._draw_perf_overlay(screen)
+        pygame.display.flip()
+        self.last_dirty_count = 1
+
+    def _draw_composite(self, screen, flakes):
+        """Frame entero sin la capa ``scene``: estática + trabajadores + copos + UI cacheada"""
+        section = self.game.profiler.section
+        with section('draw.workers'):
+            screen.blit(self.static, (0, 0))
+            for worker, pos in self._positions:
+                worker.draw(screen, pos)
+            if self._selection is not None:
+                pygame.draw.rect(screen, YELLOW, self._selection, 3)
+        with section('draw.flakes'):
+            self.game.snow.draw_flakes(screen, flakes)
+        with section('draw.ui'):
+            self._ui_changed()
+            screen.blit(self.ui_surface, self.ui_rect)
+            self._draw_perf_overlay(screen)
+        with section('draw.present'):
+            pygame.display.flip()
+        self._scene_stale = True
+        self._flakes = flakes
+        self.last_dirty_count = 1
+
+    def _draw_perf_overlay(self, screen) -> List:
+        """Pintar el panel F3 encima de todo; devuelve las zonas a volcar"""
+        overlay = self.game.overlay
+        rect = overlay.rect if overlay.visible else None
+        if rect is not None:
+            overlay.draw(screen)
+        rects = [r for r in (self._perf_rect, rect) if r is not None]
+        self._perf_rect = rect
+        return rects
+
+    def draw(self):
+        game = self.game
+        screen = game.screen
+        section = game.profiler.section
+        game.snow.update()
+        flakes = game.snow.positions()
+
+        if self._needs_full or self._overlay_open():
+            self._draw_full(screen, flakes)
+            # Al cerrar el menú hay que recomponer toda la pantalla
+            self._needs_full = self._overlay_open()
+            self._flakes = flakes
+            return
+
+        with section('draw.static'):
+            static_dirty = self._static_changes()
+        with section('draw.scene'):
+            if self._composite_left > 0:
+                # Componiendo frames enteros: no se comparan firmas hasta la próxima revisión
+                self._composite_left -= 1
+                self._positions = game.render_positions()
+                self._selection = self._selection_rect()
+                self._frames_fresh = False
+                composite = True
+            else:
+                # Tras frames sin comparar, las firmas guardadas son viejas: se compone uno
+                # más y se decide en el siguiente con firmas del frame anterior
+                fresh = self._frames_fresh
+                worker_dirty, changed = self._worker_changes()
+                self._frames_fresh = True
+                area = sum(r.w * r.h for r in worker_dirty)
+                many = changed > self.MAX_WORKER_REGIONS or \
+                    area > self.FULL_SCENE_AREA * self.scene.get_width() * self.scene.get_height()
+                composite = many or not fresh
+                if many and fresh:
+                    self._composite_left = self.COMPOSITE_FRAMES
+                if not composite:
+                    scene_dirty = self._scene_changes(static_dirty + worker_dirty)
+        if composite:
+            # Con muchos trabajadores moviéndose sale más barato componer todo el frame
+            self._draw_composite(screen, flakes)
+            return
+
+        scene = self.scene
+        with section('draw.flakes'):
+            # Borrar los copos del frame anterior (y el panel F3) y pintar los nuevos, en lote
+            flake_rects = [(x, y, 3, 3) for x, y in self._flakes]
+            dirty = scene_dirty + flake_rects
+            if self._perf_rect is not None:
+                dirty.append(self._perf_rect)
+            screen.blits([(scene, region, region) for region in dirty], doreturn=False)
+            game.snow.draw_flakes(screen, flakes)
+            dirty.extend((x, y, 3, 3) for x, y in flakes)
+            self._flakes = flakes
+
+        with section('draw.ui'):
+            # Los copos no invaden el panel: solo se repinta si cambian sus valores
+            if self._ui_changed() or any(r.colliderect(self.ui_rect) for r in scene_dirty):
+                screen.blit(self.ui_surface, self.ui_rect)
+                dirty.append(self.ui_rect)
+            dirty.extend(self._draw_perf_overlay(screen))
+
+        self.last_dirty_count = len(dirty)
+        with section('draw.present'):
+            pygame.display.update(dirty)
+
+def compare_renderers(frames: int = 600, workers: int = 5, seed: int = 0) -> Dict[str, float]:
+    """Tiempo medio por frame (ms) del camino clásico frente al renderizador por capas"""
+    import game as game_module
+
+    results = {}
+    for mode in ('full', 'layered'):
+        game = game_module.Game(enable_persistence=False, initial_workers=workers, dirty_rects=(mode == 'layered'),
+                                seed=seed)
+        draw_time = 0.0
+        for _ in range(frames):
+            game.update()
+            start = time.perf_counter()
+            game.draw()
+            draw_time += time.perf_counter() - start
+        results[mode] = draw_time / frames * 1000
+    results['speedup'] = results['full'] / results['layered'] if results['layered'] else None
+    return results
+
+def main(argv=None) -> int:
+    parser = argparse.ArgumentParser(description="Renderizador por capas de Frostpunk")
+    parser.add_argument('--compare', action='store_true', help="Comparar tiempos con el camino clásico")
+    parser.add_argument('--frames', type=int, default=600)
+    parser.add_argument('--workers', type=int, default=5)
+    args = parser.parse_args(argv)
+    if not args.compare:
+        parser.print_help()
+        return 0
+    os.environ.setdefault('SDL_VIDEODRIVER', 'dummy')
+    results = compare_renderers(args.frames, args.workers)
+    print(f"🖼️  Clásico: {results['full']:.3f} ms/frame | Por capas: {results['layered']:.3f} ms/frame "
+          f"| x{results['speedup']:.1f}")
+    return 0
+
+if __name__ == "__main__":
+    raise SystemExit(main())
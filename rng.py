@@ -0,0 +1,36 @@
+"""Generadores aleatorios por subsistema.
+
+Antes todo salía del módulo global ``random``: cualquier llamada extra (un
+árbol nuevo, un color de trabajador) desplazaba el resto de la secuencia y una
+partida no se podía reproducir. ``RandomStreams`` deriva de una semilla maestra
+un ``random.Random`` independiente para cada subsistema:
+
+- ``trees``: posición de los árboles y su aparición aleatoria.
+- ``weather``: variación de la temperatura.
+- ``placement``: posición de los edificios construidos desde el menú.
+- ``workers``: color de los trabajadores.
+
+Sin semilla se elige una al azar y queda en ``seed`` para poder repetir la
+partida. El estado completo (``getstate``/``setstate``) va en las instantáneas
+de ``savestate.py``.
+"""
+import random
+from typing import Dict, Optional, Tuple
+
+STREAMS = ('trees', 'weather', 'placement', 'workers')
+
+class RandomStreams:
+    def __init__(self, seed: Optional[int] = None):
+        if seed is None:
+            seed = random.SystemRandom().randrange(2 ** 63)
+        self.seed = seed
+        # Semilla de texto: estable entre ejecuciones (no depende de PYTHONHASHSEED)
+        for name in STREAMS:
+            setattr(self, name, random.Random(f"{seed}:{name}"))
+
+    def getstate(self) -> Dict[str, Tuple]:
+        return {name: getattr(self, name).getstate() for name in STREAMS}
+
+    def setstate(self, states: Dict[str, Tuple]):
+        for name in STREAMS:
+            getattr(self, name).setstate(states[name])
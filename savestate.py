@@ -0,0 +1,314 @@
+"""Instantáneas binarias compactas del ``GameState`` completo.
+
+Guardan reloj, recursos, el estado de los generadores de ``RandomStreams`` y
+todos los trabajadores, edificios y árboles, así que cargar una instantánea y
+seguir simulando da exactamente el mismo resultado que la partida original.
+Sirve para reproducir incidencias de producción y para no repetir el
+calentamiento de los bancos de pruebas.
+
+Formato (little-endian)::
+
+    b'FPST' | versión (uint16) | zlib(carga)
+
+La carga son bloques seguidos: cabecera ``struct``, recursos, fracciones de
+producción por tipo de edificio, semilla, estado de cada generador y después
+una columna ``array`` por campo de cada tipo de entidad (``typecode``,
+longitud y bytes). Las referencias entre entidades
+(edificio asignado, árbol, refugio) son índices en las listas de
+``GameState``. Con el backend NumPy las columnas de trabajadores se copian
+directamente desde y hacia los arrays del almacén.
+
+No se guardan las series temporales de ``ResourceRecorder`` ni la selección de
+la interfaz.
+"""
+import contextlib
+import gc
+import struct
+import sys
+import zlib
+from array import array
+from operator import attrgetter
+from typing import Dict, List
+
+from game import (GameState, Building, BuildingType, Tree, Worker, WorkerState, ResourceType,
+                  TREE_REGROWTH_FRAMES)
+from rng import STREAMS
+
+MAGIC = b'FPST'
+VERSION = 4  # 2: tick de regeneración de cada árbol; 3: fracciones de producción por tipo; 4: muerte definitiva
+SUPPORTED_VERSIONS = (1, 2, 3, 4)
+HEADER = struct.Struct('<qqiiiiqIII')
+RNG_HEADER = struct.Struct('<BI')
+RNG_GAUSS = struct.Struct('<?d')
+COLUMN = struct.Struct('<cI')
+COMPRESS_LEVEL = 1  # Lo más rápido; las columnas ya son compactas
+
+BUILDING_TYPES = list(BuildingType)
+WORKER_STATES = list(WorkerState)
+
+# (atributo, typecode, campo en VectorWorkerStore o None)
+WORKER_COLUMNS = (
+    ('x', 'd', 'x'), ('y', 'd', 'y'), ('target_x', 'd', 'target_x'), ('target_y', 'd', 'target_y'),
+    ('speed', 'd', 'speed'), ('health', 'd', 'health'), ('energy', 'd', 'energy'), ('hunger', 'd', 'hunger'),
+    ('temperature_damage_timer', 'q', 'damage_timer'), ('healing_timer', 'q', 'healing_timer'),
+    ('work_progress', 'q', 'work_progress'),
+)
+DTYPES = {'d': '<f8', 'q': '<i8'}
+
+BIG_ENDIAN = sys.byteorder == 'big'
+
+class SnapshotError(ValueError):
+    """Fichero que no es una instantánea o de una versión incompatible"""
+
+class _Writer:
+    def __init__(self):
+        self.parts: List[bytes] = []
+
+    def pack(self, fmt: struct.Struct, *values):
+        self.parts.append(fmt.pack(*values))
+
+    def column(self, values: array):
+        if BIG_ENDIAN:
+            values = array(values.typecode, values)
+            values.byteswap()
+        self.parts.append(COLUMN.pack(values.typecode.encode(), len(values)))
+        self.parts.append(values.tobytes())
+
+    def raw_column(self, typecode: str, count: int, data: bytes):
+        """Columna ya serializada en little-endian (arrays NumPy)"""
+        self.parts.append(COLUMN.pack(typecode.encode(), count))
+        self.parts.append(data)
+
+    def bytes(self) -> bytes:
+        return b''.join(self.parts)
+
+class _Reader:
+    def __init__(self, data: bytes):
+        self.data = memoryview(data)
+        self.offset = 0
+
+    def unpack(self, fmt: struct.Struct) -> tuple:
+        values = fmt.unpack_from(self.data, self.offset)
+        self.offset += fmt.size
+        return values
+
+    def raw_column(self):
+        typecode, count = self.unpack(COLUMN)
+        typecode = typecode.decode()
+        size = array(typecode).itemsize * count
+        data = self.data[self.offset:self.offset + size]
+        self.offset += size
+        return typecode, count, data
+
+    def column(self) -> array:
+        typecode, _, data = self.raw_column()
+        values = array(typecode)
+        values.frombytes(data)
+        if BIG_ENDIAN:
+            values.byteswap()
+        return values
+
+@contextlib.contextmanager
+def _gc_paused():
+    enabled = gc.isenabled()
+    gc.disable()
+    try:
+        yield
+    finally:
+        if enabled:
+            gc.enable()
+
+def _references(entities, targets) -> array:
+    """Índice de cada objetivo en su lista (-1 si no hay)"""
+    index = {id(target): i for i, target in enumerate(targets)}
+    return array('i', [index.get(id(entity), -1) for entity in entities])
+
+def dumps(state: GameState) -> bytes:
+    """Serializar el estado de la partida"""
+    workers, buildings, trees = state.workers, state.buildings, state.trees
+    out = _Writer()
+    out.pack(HEADER, state.game_time, state.last_save_time, state.temperature, state.day, state.hour,
+             state.minute, state.auto_save_timer, len(workers), len(buildings), len(trees))
+    out.column(array('q', [state.resources[resource] for resource in ResourceType]))
+    out.column(array('d', state.production_accumulated))
+    out.column(array('B', str(state.rng.seed).encode()))
+    rng_states = state.rng.getstate()
+    for name in STREAMS:
+        version, internal, gauss = rng_states[name]
+        out.pack(RNG_HEADER, version, len(internal))
+        out.column(array('I', internal))
+        out.pack(RNG_GAUSS, gauss is not None, gauss or 0.0)
+
+    # Edificios (con el orden de sus trabajadores)
+    out.column(array('b', [b.building_type.code for b in buildings]))
+    out.column(array('i', map(attrgetter('x'), buildings)))
+    out.column(array('i', map(attrgetter('y'), buildings)))
+    out.column(array('q', map(attrgetter('production_timer'), buildings)))
+    out.column(array('d', map(attrgetter('health'), buildings)))
+    out.column(array('I', [len(b.workers) for b in buildings]))
+    worker_index = {id(w): i for i, w in enumerate(workers)}
+    out.column(array('i', [worker_index[id(w)] for b in buildings for w in b.workers]))
+
+    # Árboles
+    out.column(array('i', map(attrgetter('x'), trees)))
+    out.column(array('i', map(attrgetter('y'), trees)))
+    out.column(array('i', map(attrgetter('wood_amount'), trees)))
+    out.column(array('i', map(attrgetter('max_wood'), trees)))
+    out.column(array('q', map(attrgetter('regrow_at'), trees)))
+    out.column(array('B', map(attrgetter('is_chopped'), trees)))
+
+    # Trabajadores
+    store = state.worker_store
+    for attribute, typecode, field in WORKER_COLUMNS:
+        if store is not None and field is not None:
+            data = getattr(store, field)[:store.count].astype(DTYPES[typecode]).tobytes()
+            out.raw_column(typecode, store.count, data)
+        else:
+            out.column(array(typecode, map(attrgetter(attribute), workers)))
+    if store is not None:
+        out.raw_column('b', store.count, store.state[:store.count].tobytes())
+        out.raw_column('b', store.count, store.last_state[:store.count].tobytes())
+    else:
+        out.column(array('b', [w.state.code for w in workers]))
+        out.column(array('b', [w.last_state.code for w in workers]))
+    dead = store.dead[:store.count].tolist() if store is not None else [w.dead for w in workers]
+    out.column(array('B', [w.manual_assignment | (d << 1) for w, d in zip(workers, dead)]))
+    out.column(array('B', [channel for w in workers for channel in w.color]))
+    out.column(_references(map(attrgetter('assigned_building'), workers), buildings))
+    out.column(_references(map(attrgetter('assigned_tree'), workers), trees))
+    out.column(_references(map(attrgetter('shelter_building'), workers), buildings))
+
+    return MAGIC + struct.pack('<H', VERSION) + zlib.compress(out.bytes(), COMPRESS_LEVEL)
+
+def loads(data: bytes, enable_persistence: bool = False, vectorized_workers: bool = False,
+          storage=None, record_timeseries: bool = True, balance=None) -> GameState:
+    """Reconstruir un ``GameState`` desde ``dumps``; continúa exactamente donde se guardó"""
+    if data[:4] != MAGIC:
+        raise SnapshotError("No es una instantánea de Frostpunk")
+    version, = struct.unpack_from('<H', data, 4)
+    if version not in SUPPORTED_VERSIONS:
+        raise SnapshotError(f"Versión de instantánea no soportada: {version}")
+    # Miles de objetos nuevos: sin pausar el GC, sus pasadas completas duplican el tiempo de carga
+    with _gc_paused():
+        return _restore(_Reader(zlib.decompress(data[6:])), version,
+                        enable_persistence=enable_persistence, vectorized_workers=vectorized_workers, storage=storage,
+                        record_timeseries=record_timeseries, balance=balance)
+
+def _restore(reader: _Reader, version: int, **kwargs) -> GameState:
+    (game_time, last_save_time, temperature, day, hour, minute, auto_save_timer,
+     n_workers, n_buildings, n_trees) = reader.unpack(HEADER)
+    resources = reader.column()
+    accumulated = reader.column() if version >= 3 else []
+    seed_text = reader.column().tobytes().decode()
+    seed = int(seed_text) if seed_text.lstrip('-').isdigit() else seed_text
+    rng_states = {}
+    for name in STREAMS:
+        rng_version, _ = reader.unpack(RNG_HEADER)
+        internal = tuple(reader.column())
+        has_gauss, gauss = reader.unpack(RNG_GAUSS)
+        rng_states[name] = (rng_version, internal, gauss if has_gauss else None)
+
+    state = GameState(initial_workers=0, seed=seed, **kwargs)
+    state.reset_world()
+    state.game_time = game_time
+    state.events.tick = game_time
+    state.last_save_time = last_save_time
+    state.temperature = temperature
+    state.day, state.hour, state.minute = day, hour, minute
+    state.auto_save_timer = auto_save_timer
+    state.schedule_periodic()
+    state.resources = {resource: amount for resource, amount in zip(ResourceType, resources)}
+    # Tipos añadidos al catálogo después de guardar empiezan sin fracción pendiente
+    state.production_accumulated[:len(accumulated)] = accumulated
+
+    # Edificios
+    kinds, xs, ys, timers, healths, counts, members = (reader.column() for _ in range(7))
+    buildings: List[Building] = []
+    for i in range(n_buildings):
+        building = Building(BUILDING_TYPES[kinds[i]], xs[i], ys[i])
+        building.production_timer = timers[i]
+        building.health = healths[i]
+        buildings.append(building)
+
+    # Árboles
+    xs, ys, woods, max_woods, regrow_at, chopped = (reader.column() for _ in range(6))
+    if version == 1:
+        # Contador de frames desde la tala -> tick de regeneración
+        regrow_at = [game_time + TREE_REGROWTH_FRAMES - timer for timer in regrow_at]
+    trees: List[Tree] = []
+    for i in range(n_trees):
+        tree = Tree(xs[i], ys[i])
+        tree.wood_amount = woods[i]
+        tree.max_wood = max_woods[i]
+        tree.regrow_at = regrow_at[i]
+        tree.is_chopped = bool(chopped[i])
+        trees.append(tree)
+
+    # Trabajadores
+    store = state.worker_store
+    columns: Dict[str, object] = {}
+    for attribute, typecode, field in WORKER_COLUMNS:
+        if store is not None and field is not None:
+            columns[attribute] = reader.raw_column()
+        else:
+            columns[attribute] = reader.column()
+    states, last_states, flags, colors = (reader.column() for _ in range(4))
+    # Antes de la versión 4 un muerto podía curarse: se vuelve a comprobar en el siguiente tick
+    dead_flag = 2 if version >= 4 else 0
+    assigned_buildings, assigned_trees, shelters = (reader.column() for _ in range(3))
+
+    if store is not None:
+        import numpy as np
+        # Primero los objetos y después los arrays de golpe
+        workers = [store.create_worker(0, 0, color=tuple(colors[3 * i:3 * i + 3])) for i in range(n_workers)]
+        for attribute, typecode, field in WORKER_COLUMNS:
+            if field is not None:
+                _, count, raw = columns[attribute]
+                getattr(store, field)[:count] = np.frombuffer(raw, dtype=DTYPES[typecode])
+        store.state[:n_workers] = np.frombuffer(states.tobytes(), dtype=np.int8)
+        store.last_state[:n_workers] = np.frombuffer(last_states.tobytes(), dtype=np.int8)
+        store.dead[:n_workers] = (np.frombuffer(flags.tobytes(), dtype=np.uint8) & dead_flag) != 0
+    else:
+        xs, ys = columns['x'], columns['y']
+        names = [attribute for attribute, _, _ in WORKER_COLUMNS]
+        values = [columns[name] for name in names]
+        workers = []
+        for i in range(n_workers):
+            worker = Worker(xs[i], ys[i], color=tuple(colors[3 * i:3 * i + 3]))
+            for name, column in zip(names, values):
+                setattr(worker, name, column[i])
+            worker.state = WORKER_STATES[states[i]]
+            worker.last_state = WORKER_STATES[last_states[i]]
+            worker.dead = bool(flags[i] & dead_flag)
+            workers.append(worker)
+    state.register_many(workers, buildings, trees)
+
+    # Referencias y plazas ocupadas (en el orden original de cada edificio)
+    for i, worker in enumerate(workers):
+        worker.manual_assignment = bool(flags[i] & 1)
+        if assigned_buildings[i] >= 0:
+            worker.assigned_building = buildings[assigned_buildings[i]]
+        if assigned_trees[i] >= 0:
+            worker.assigned_tree = trees[assigned_trees[i]]
+            state.job_board.assign_tree(worker.assigned_tree)
+        if shelters[i] >= 0:
+            worker.shelter_building = buildings[shelters[i]]
+    start = 0
+    for building, count in zip(buildings, counts):
+        building.workers = [workers[index] for index in members[start:start + count]]
+        start += count
+
+    state.rng.setstate(rng_states)
+    return state
+
+def save(state: GameState, path: str) -> int:
+    """Escribir la instantánea en un fichero; devuelve su tamaño en bytes"""
+    data = dumps(state)
+    with open(path, 'wb') as f:
+        f.write(data)
+    return len(data)
+
+def load(path: str, **kwargs) -> GameState:
+    """Cargar una instantánea de fichero (mismos argumentos que ``loads``)"""
+    with open(path, 'rb') as f:
+        return loads(f.read(), **kwargs)
@@ -0,0 +1,53 @@
+"""Planificador de eventos por tick (cola de prioridad).
+
+Antes cada entidad llevaba su propio contador y lo incrementaba en cada frame
+aunque no pudiera pasar nada: un árbol cortado contaba 1800 frames hasta
+volver a crecer y ``GameState.update`` comprobaba ``game_time % N`` para el
+clima y la calefacción. Ahora se registra el tick en que algo tiene que pasar
+y ``run_due`` ejecuta solo lo que vence; lo que espera no cuesta nada por tick.
+
+Los eventos del mismo tick se ejecutan por ``priority`` y, a igualdad, en el
+orden en que se programaron, así que el resultado es determinista.
+"""
+import heapq
+import itertools
+from typing import Callable, List, Optional, Tuple
+
+class Scheduler:
+    def __init__(self, now: int = 0):
+        self.now = now
+        self._queue: List[Tuple] = []  # (tick, prioridad, orden, callback, args)
+        self._order = itertools.count()
+
+    def __len__(self):
+        return len(self._queue)
+
+    def at(self, tick: int, callback: Callable, *args, priority: int = 0):
+        """Ejecutar ``callback(*args)`` en el tick ``tick``"""
+        heapq.heappush(self._queue, (tick, priority, next(self._order), callback, args))
+
+    def every(self, period: int, callback: Callable, *args, priority: int = 0):
+        """Ejecutar ``callback(*args)`` en cada múltiplo de ``period`` posterior a ``now``
+
+        Equivale a comprobar ``game_time % period == 0`` en cada tick, también
+        al empezar desde una instantánea con ``now`` distinto de cero.
+        """
+        def repeat(*args):
+            self.at(self.now + period, repeat, *args, priority=priority)
+            callback(*args)
+        self.at((self.now // period + 1) * period, repeat, *args, priority=priority)
+
+    def next_tick(self) -> Optional[int]:
+        """Tick del próximo evento, o None si la cola está vacía"""
+        return self._queue[0][0] if self._queue else None
+
+    def run_due(self, now: int) -> int:
+        """Ejecutar los eventos con tick <= ``now``; devuelve cuántos se ejecutaron"""
+        self.now = now
+        queue = self._queue
+        count = 0
+        while queue and queue[0][0] <= now:
+            _, _, _, callback, args = heapq.heappop(queue)
+            callback(*args)
+            count += 1
+        return count
@@ -0,0 +1,164 @@
+"""Simulación headless de Frostpunk: avanza GameState sin ventana, fuentes ni límite de FPS.
+
+Uso:
+    python simulation.py --days 10 --seed 42
+    python simulation.py --days 3 --json > resultado.json
+    python simulation.py --days 1 --workers 10000 --vectorized
+    python simulation.py --days 5 --storage sqlite    # E/S realista sin servicio externo
+    python simulation.py --days 7 --export-timeseries horas.csv --tier hour
+    python simulation.py --days 1 --profile --profile-trace traza.json
+    python simulation.py --days 3 --seed 7 --save-state dia4.fpst
+    python simulation.py --days 1 --load-state dia4.fpst   # mismo resultado que --days 4 --seed 7
+    python simulation.py --days 30 --fast-forward          # noches y refugios en forma cerrada
+"""
+import argparse
+import json
+import sys
+import time
+from collections import Counter
+from typing import Dict, Optional
+
+import savestate
+from balance import Balance
+from game import GameState
+from storage import BACKENDS, create_storage
+
+# 10 minutos de juego por cada 60 frames -> 24 h = 144 s reales = 8640 frames
+FRAMES_PER_DAY = 24 * 6 * 60
+
+class Simulation:
+    """Punto de entrada sin renderizado para barridos de balance y regresiones en CI"""
+
+    def __init__(self, seed: Optional[int] = None, enable_persistence: bool = False,
+                 workers: int = 5, vectorized_workers: bool = False, storage: Optional[str] = None,
+                 record_timeseries: bool = True, snapshot: Optional[str] = None,
+                 balance: Optional[Balance] = None, fast_forward: bool = False):
+        backend = create_storage(storage) if storage else None
+        if snapshot is not None:
+            # Continuar una partida guardada (la semilla y los generadores vienen en la instantánea)
+            self.game_state = savestate.load(snapshot, enable_persistence=enable_persistence,
+                                             vectorized_workers=vectorized_workers, storage=backend,
+                                             record_timeseries=record_timeseries, balance=balance)
+        else:
+            self.game_state = GameState(enable_persistence=enable_persistence, initial_workers=workers,
+                                        vectorized_workers=vectorized_workers, storage=backend,
+                                        record_timeseries=record_timeseries, seed=seed, balance=balance)
+        self.seed = self.game_state.rng.seed
+        # Saltar los tramos tranquilos (noches, curación en el refugio) con GameState.fast_forward
+        self.fast_forward = fast_forward
+        self.ticks = 0
+        self.elapsed = 0.0
+
+    def step(self, ticks: int = 1):
+        """Avanzar la simulación tan rápido como permita la CPU"""
+        update = self.game_state.update
+        profiler = self.game_state.profiler
+        start = time.perf_counter()
+        if self.fast_forward:
+            # Cada llamada (un tick o un tramo entero) cuenta como un frame del perfilador
+            fast_forward = self.game_state.fast_forward
+            remaining = ticks
+            while remaining > 0:
+                if profiler.enabled:
+                    profiler.begin_frame()
+                remaining -= fast_forward(remaining)
+                if profiler.enabled:
+                    profiler.end_frame()
+        elif profiler.enabled:
+            # Cada tick cuenta como un frame del perfilador
+            for _ in range(ticks):
+                profiler.begin_frame()
+                update()
+                profiler.end_frame()
+        else:
+            for _ in range(ticks):
+                update()
+        self.elapsed += time.perf_counter() - start
+        self.ticks += ticks
+
+    def run_days(self, days: int):
+        """Avanzar un número de días de juego completos"""
+        self.step(days * FRAMES_PER_DAY)
+
+    def stats(self) -> Dict:
+        """Estadísticas finales de la colonia"""
+        state = self.game_state
+        return {
+            'seed': self.seed,
+            'ticks': self.ticks,
+            'day': state.day,
+            'hour': state.hour,
+            'minute': state.minute,
+            'temperature': state.temperature,
+            'resources': {r.name: v for r, v in state.resources.items()},
+            'workers': len(state.workers),
+            'workers_survived': state.living_workers(),
+            'worker_states': dict(Counter(w.state.name for w in state.workers)),
+            'buildings': len(state.buildings),
+            'trees': len(state.trees),
+            'elapsed_seconds': round(self.elapsed, 4),
+            'ticks_per_second': round(self.ticks / self.elapsed, 1) if self.elapsed else None
+        }
+
+    def finish(self):
+        """Cerrar la sesión de persistencia si estaba activa"""
+        self.game_state.end_game_session()
+
+def main(argv=None) -> int:
+    parser = argparse.ArgumentParser(description="Simulación headless de Frostpunk")
+    parser.add_argument('--days', type=int, default=1, help="Días de juego a simular")
+    parser.add_argument('--seed', type=int, default=None, help="Semilla aleatoria")
+    parser.add_argument('--workers', type=int, default=5, help="Trabajadores iniciales")
+    parser.add_argument('--vectorized', action='store_true', help="Usar el backend NumPy de trabajadores")
+    parser.add_argument('--persist', action='store_true', help="Guardar la partida (backend de STORAGE_BACKEND)")
+    parser.add_argument('--storage', choices=BACKENDS, default=None, help="Backend de almacenamiento")
+    parser.add_argument('--json', action='store_true', help="Volcar las estadísticas como JSON")
+    parser.add_argument('--no-timeseries', action='store_true', help="No registrar series temporales por tick")
+    parser.add_argument('--export-timeseries', metavar='RUTA', help="Exportar las series (.csv o .parquet)")
+    parser.add_argument('--tier', choices=('tick', 'hour', 'day'), default='hour', help="Nivel a exportar")
+    parser.add_argument('--profile', action='store_true', help="Medir cada fase del tick (p50/p95/p99)")
+    parser.add_argument('--profile-trace', metavar='RUTA', help="Guardar una traza de Chrome (JSON)")
+    parser.add_argument('--load-state', metavar='RUTA', help="Empezar desde una instantánea (savestate)")
+    parser.add_argument('--save-state', metavar='RUTA', help="Guardar una instantánea al terminar")
+    parser.add_argument('--fast-forward', action='store_true',
+                        help="Avanzar noches y refugios en forma cerrada (ver GameState.fast_forward)")
+    args = parser.parse_args(argv)
+
+    simulation = Simulation(seed=args.seed, enable_persistence=args.persist,
+                            workers=args.workers, vectorized_workers=args.vectorized, storage=args.storage,
+                            record_timeseries=not args.no_timeseries, snapshot=args.load_state,
+                            fast_forward=args.fast_forward)
+    profiler = simulation.game_state.profiler
+    profiler.trace_path = args.profile_trace
+    profiler.enabled = args.profile or args.profile_trace is not None
+    simulation.run_days(args.days)
+    if args.save_state:
+        size = savestate.save(simulation.game_state, args.save_state)
+        print(f"💾 Instantánea de {size} bytes guardada en {args.save_state}", file=sys.stderr)
+    simulation.finish()
+    if profiler.enabled:
+        for name, s in sorted(profiler.stats().items()):
+            print(f"⏱️  {name:<18} p50 {s['p50']:.4f} | p95 {s['p95']:.4f} | p99 {s['p99']:.4f} ms",
+                  file=sys.stderr)
+        if args.profile_trace:
+            count = profiler.write_trace()
+            print(f"⏱️  Traza de {count} eventos guardada en {args.profile_trace}", file=sys.stderr)
+    recorder = simulation.game_state.recorder
+    if args.export_timeseries and recorder is not None:
+        rows = recorder.export(args.export_timeseries, args.tier)
+        print(f"📈 {rows} filas ({args.tier}) exportadas a {args.export_timeseries}", file=sys.stderr)
+    stats = simulation.stats()
+
+    if args.json:
+        json.dump(stats, sys.stdout, indent=2, ensure_ascii=False)
+        print()
+    else:
+        print(f"🏁 Día {stats['day']} {stats['hour']:02d}:{stats['minute']:02d} | "
+              f"Temperatura {stats['temperature']}°C")
+        print(f"👥 Trabajadores vivos: {stats['workers_survived']}/{stats['workers']} {stats['worker_states']}")
+        print(f"📦 Recursos: {stats['resources']} | Edificios: {stats['buildings']} | Árboles: {stats['trees']}")
+        print(f"⚡ {stats['ticks']} ticks en {stats['elapsed_seconds']} s ({stats['ticks_per_second']} ticks/s)")
+    return 0
+
+if __name__ == "__main__":
+    sys.exit(main())
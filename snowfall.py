@@ -0,0 +1,90 @@
+"""Fondo pre-renderizado y capa de nieve por partículas.
+
+Sustituye el bucle que, en cada frame, recorría todas las baldosas del campo de
+juego llamando a ``random.random()`` y ``pygame.draw.circle``. El suelo nevado
+se pinta una sola vez en una superficie y los copos son partículas que se
+mueven con aritmética en lote (NumPy si está disponible) y se dibujan con un
+único ``Surface.blits`` a partir de un sprite cacheado.
+
+El número de copos es ``density * área`` pero está limitado por ``max_flakes``,
+así que el coste por frame no crece linealmente con la resolución.
+"""
+import random
+from typing import Optional, Tuple
+
+import pygame
+
+try:
+    import numpy as np
+except ImportError:  # Dependencia opcional
+    np = None
+
+class SnowLayer:
+    def __init__(self, width: int, height: int, top: int = 0, density: float = 0.0004,
+                 max_flakes: int = 400, seed: Optional[int] = 0,
+                 ground_color: Tuple[int, int, int] = (0, 0, 0)):
+        self.width = width
+        self.height = height
+        self.top = top
+        # RNG propio: la nieve no debe consumir el generador global de la simulación
+        self.rng = random.Random(seed)
+        self.count = min(max_flakes, int(width * height * density))
+
+        self.background = self._bake_background(ground_color)
+        self.flake = pygame.Surface((3, 3), pygame.SRCALPHA)
+        pygame.draw.circle(self.flake, (255, 255, 255), (1, 1), 1)
+
+        rng = self.rng
+        xs = [rng.uniform(0, width) for _ in range(self.count)]
+        ys = [rng.uniform(0, height) for _ in range(self.count)]
+        speeds = [rng.uniform(0.3, 1.2) for _ in range(self.count)]
+        drifts = [rng.uniform(-0.3, 0.3) for _ in range(self.count)]
+        if np is not None:
+            self.x, self.y = np.array(xs), np.array(ys)
+            self.speed, self.drift = np.array(speeds), np.array(drifts)
+        else:
+            self.x, self.y, self.speed, self.drift = xs, ys, speeds, drifts
+
+    def _bake_background(self, ground_color) -> pygame.Surface:
+        """Suelo con motas de nieve fijas, pintado una sola vez"""
+        surface = pygame.Surface((self.width, self.height)).convert() if pygame.display.get_surface() \
+            else pygame.Surface((self.width, self.height))
+        surface.fill(ground_color)
+        speckles = int(self.width * self.height / (32 * 32) * 0.1)
+        for _ in range(speckles):
+            x = self.rng.randrange(self.width)
+            y = self.rng.randrange(self.height)
+            pygame.draw.circle(surface, (90, 90, 110), (x, y), 1)
+        return surface
+
+    def update(self):
+        """Caída y deriva de todos los copos; los que salen reaparecen por arriba"""
+        width, height = self.width, self.height
+        if np is not None:
+            self.y += self.speed
+            self.x += self.drift
+            np.mod(self.y, height, out=self.y)
+            np.mod(self.x, width, out=self.x)
+        else:
+            self.y = [(y + s) % height for y, s in zip(self.y, self.speed)]
+            self.x = [(x + d) % width for x, d in zip(self.x, self.drift)]
+
+    def positions(self):
+        """Esquina superior izquierda de cada copo en coordenadas de pantalla"""
+        top = self.top
+        if np is not None:
+            return list(zip(self.x.astype(int).tolist(), (self.y.astype(int) + top).tolist()))
+        return [(int(x), int(y) + top) for x, y in zip(self.x, self.y)]
+
+    def draw_background(self, screen: pygame.Surface):
+        screen.blit(self.background, (0, self.top))
+
+    def draw_flakes(self, screen: pygame.Surface, positions=None):
+        flake = self.flake
+        if positions is None:
+            positions = self.positions()
+        screen.blits([(flake, position) for position in positions], doreturn=False)
+
+    def draw(self, screen: pygame.Surface):
+        self.draw_background(screen)
+        self.draw_flakes(screen)
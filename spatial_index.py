@@ -0,0 +1,213 @@
+"""Índice espacial de rejilla uniforme para edificios, árboles y trabajadores.
+
+Cada entidad se registra con su rectángulo de colisión ``(x0, y0, x1, y1)`` y su
+punto de anclaje ``(x, y)`` (el que usa el juego para medir distancias). Las
+consultas solo recorren las celdas afectadas, así que su coste depende de la
+densidad local y no del número total de entidades del mapa.
+
+Los resultados se devuelven en orden de inserción para conservar la semántica
+de "el primero de la lista" que tenían los bucles lineales.
+"""
+import math
+from typing import Callable, Container, Dict, Hashable, Iterator, List, Optional, Set, Tuple
+
+Rect = Tuple[float, float, float, float]
+Cell = Tuple[int, int]
+
+class _Entry:
+    __slots__ = ('obj', 'seq', 'bounds', 'anchor', 'kind', 'cells')
+
+    def __init__(self, obj, seq: int, bounds: Rect, anchor: Tuple[float, float], kind: Hashable):
+        self.obj = obj
+        self.seq = seq
+        self.bounds = bounds
+        self.anchor = anchor
+        self.kind = kind
+        self.cells = (0, 0, -1, -1)
+
+class SpatialGrid:
+    def __init__(self, cell_size: int = 64):
+        self.cell_size = cell_size
+        self._cells: Dict[Cell, Set[int]] = {}
+        self._entries: Dict[int, _Entry] = {}
+        self._seq = 0
+        # Extensión de celdas ocupadas alguna vez (solo crece); acota la búsqueda del más cercano
+        self._extent = None
+
+    def __len__(self):
+        return len(self._entries)
+
+    def __contains__(self, obj):
+        return id(obj) in self._entries
+
+    def _cell_range(self, bounds: Rect) -> Tuple[int, int, int, int]:
+        size = self.cell_size
+        return (int(bounds[0] // size), int(bounds[1] // size),
+                int(bounds[2] // size), int(bounds[3] // size))
+
+    def _link(self, key: int, cells: Tuple[int, int, int, int]):
+        cx0, cy0, cx1, cy1 = cells
+        if self._extent is None:
+            self._extent = cells
+        else:
+            ex0, ey0, ex1, ey1 = self._extent
+            if cx0 < ex0 or cy0 < ey0 or cx1 > ex1 or cy1 > ey1:
+                self._extent = (min(cx0, ex0), min(cy0, ey0), max(cx1, ex1), max(cy1, ey1))
+        for cx in range(cx0, cx1 + 1):
+            for cy in range(cy0, cy1 + 1):
+                self._cells.setdefault((cx, cy), set()).add(key)
+
+    def _unlink(self, key: int, cells: Tuple[int, int, int, int]):
+        cx0, cy0, cx1, cy1 = cells
+        for cx in range(cx0, cx1 + 1):
+            for cy in range(cy0, cy1 + 1):
+                bucket = self._cells.get((cx, cy))
+                if bucket is not None:
+                    bucket.discard(key)
+                    if not bucket:
+                        del self._cells[(cx, cy)]
+
+    def insert(self, obj, bounds: Rect, anchor: Tuple[float, float], kind: Hashable = None):
+        """Registrar una entidad nueva"""
+        key = id(obj)
+        if key in self._entries:
+            self.move(obj, bounds, anchor)
+            return
+        entry = _Entry(obj, self._seq, bounds, anchor, kind)
+        self._seq += 1
+        entry.cells = self._cell_range(bounds)
+        self._entries[key] = entry
+        self._link(key, entry.cells)
+
+    def insert_many(self, items):
+        """Registrar de golpe ``[(obj, bounds, anchor, kind)]`` (carga de instantáneas)"""
+        size = self.cell_size
+        cells_map, entries = self._cells, self._entries
+        seq = self._seq
+        ex0 = ey0 = math.inf
+        ex1 = ey1 = -math.inf
+        for obj, bounds, anchor, kind in items:
+            key = id(obj)
+            if key in entries:
+                self.move(obj, bounds, anchor)
+                continue
+            entry = _Entry(obj, seq, bounds, anchor, kind)
+            seq += 1
+            cx0, cy0, cx1, cy1 = entry.cells = (int(bounds[0] // size), int(bounds[1] // size),
+                                                int(bounds[2] // size), int(bounds[3] // size))
+            entries[key] = entry
+            for cx in range(cx0, cx1 + 1):
+                for cy in range(cy0, cy1 + 1):
+                    bucket = cells_map.get((cx, cy))
+                    if bucket is None:
+                        cells_map[(cx, cy)] = {key}
+                    else:
+                        bucket.add(key)
+            if cx0 < ex0:
+                ex0 = cx0
+            if cy0 < ey0:
+                ey0 = cy0
+            if cx1 > ex1:
+                ex1 = cx1
+            if cy1 > ey1:
+                ey1 = cy1
+        self._seq = seq
+        if ex1 >= ex0:
+            if self._extent is not None:
+                old = self._extent
+                ex0, ey0, ex1, ey1 = min(ex0, old[0]), min(ey0, old[1]), max(ex1, old[2]), max(ey1, old[3])
+            self._extent = (ex0, ey0, ex1, ey1)
+
+    def move(self, obj, bounds: Rect, anchor: Tuple[float, float]):
+        """Actualizar posición; solo toca las celdas si cambió el rango cubierto"""
+        entry = self._entries[id(obj)]
+        entry.bounds = bounds
+        entry.anchor = anchor
+        cells = self._cell_range(bounds)
+        if cells != entry.cells:
+            self._unlink(id(obj), entry.cells)
+            self._link(id(obj), cells)
+            entry.cells = cells
+
+    def remove(self, obj):
+        entry = self._entries.pop(id(obj), None)
+        if entry is not None:
+            self._unlink(id(obj), entry.cells)
+
+    def _candidates(self, cells: Tuple[int, int, int, int]) -> Iterator[_Entry]:
+        cx0, cy0, cx1, cy1 = cells
+        seen = set()
+        for cx in range(cx0, cx1 + 1):
+            for cy in range(cy0, cy1 + 1):
+                for key in self._cells.get((cx, cy), ()):
+                    if key not in seen:
+                        seen.add(key)
+                        yield self._entries[key]
+
+    def query_point(self, x: float, y: float, kind: Hashable = None) -> List:
+        """Entidades cuyo rectángulo contiene el punto (bordes incluidos)"""
+        size = self.cell_size
+        cx, cy = int(x // size), int(y // size)
+        hits = [e for e in self._candidates((cx, cy, cx, cy))
+                if (kind is None or e.kind == kind)
+                and e.bounds[0] <= x <= e.bounds[2] and e.bounds[1] <= y <= e.bounds[3]]
+        hits.sort(key=lambda e: e.seq)
+        return [e.obj for e in hits]
+
+    def query_rect(self, rect: Rect, kind: Hashable = None) -> List:
+        """Entidades cuyo rectángulo se solapa (estrictamente) con ``rect``"""
+        x0, y0, x1, y1 = rect
+        hits = [e for e in self._candidates(self._cell_range(rect))
+                if (kind is None or e.kind == kind)
+                and e.bounds[0] < x1 and x0 < e.bounds[2] and e.bounds[1] < y1 and y0 < e.bounds[3]]
+        hits.sort(key=lambda e: e.seq)
+        return [e.obj for e in hits]
+
+    def nearest(self, x: float, y: float, kind: Hashable = None,
+                predicate: Optional[Callable] = None, kinds: Optional[Container] = None):
+        """Entidad con el anclaje más cercano al punto (empates: la insertada antes)
+
+        ``kind`` filtra por un tipo y ``kinds`` por cualquiera de varios.
+        """
+        if not self._cells:
+            return None
+        size = self.cell_size
+        cx, cy = int(x // size), int(y // size)
+        ex0, ey0, ex1, ey1 = self._extent
+        max_ring = max(abs(cx - ex0), abs(cx - ex1), abs(cy - ey0), abs(cy - ey1))
+
+        best, best_distance, best_seq = None, float('inf'), -1
+        seen = set()
+        for ring in range(max_ring + 1):
+            for cell in self._ring_cells(cx, cy, ring):
+                for key in self._cells.get(cell, ()):
+                    if key in seen:
+                        continue
+                    seen.add(key)
+                    entry = self._entries[key]
+                    if kind is not None and entry.kind != kind:
+                        continue
+                    if kinds is not None and entry.kind not in kinds:
+                        continue
+                    if predicate is not None and not predicate(entry.obj):
+                        continue
+                    ax, ay = entry.anchor
+                    distance = math.sqrt((ax - x)**2 + (ay - y)**2)
+                    if distance < best_distance or (distance == best_distance and entry.seq < best_seq):
+                        best, best_distance, best_seq = entry.obj, distance, entry.seq
+            # Todo lo que queda fuera del anillo está al menos a ring * cell_size
+            if best_distance < ring * size:
+                break
+        return best
+
+    @staticmethod
+    def _ring_cells(cx: int, cy: int, ring: int) -> Iterator[Cell]:
+        if ring == 0:
+            yield (cx, cy)
+            return
+        for dx in range(-ring, ring + 1):
+            yield (cx + dx, cy - ring)
+            yield (cx + dx, cy + ring)
+        for dy in range(-ring + 1, ring):
+            yield (cx - ring, cy + dy)
+            yield (cx + ring, cy + dy)
@@ -0,0 +1,248 @@
+"""Backend de almacenamiento en un fichero SQLite local.
+
+Mismas tablas, restricciones e índices que ``database_schema.sql`` (UUID como
+TEXT, JSONB como TEXT con JSON y ``updated_at`` mantenido por triggers), así
+que una prueba de carga o un despliegue sin conexión hace el mismo trabajo de
+E/S que en Supabase pero sin servicio externo. ``path=':memory:'`` no toca
+disco.
+"""
+import json
+import sqlite3
+import threading
+import uuid
+from datetime import datetime
+from typing import Dict, List, Optional, Tuple
+
+from storage import StorageBackend, GameSnapshot, WorkerSnapshot
+
+SCHEMA = """
+CREATE TABLE IF NOT EXISTS games (
+  id TEXT PRIMARY KEY,
+  player_name VARCHAR(100) NOT NULL DEFAULT 'Player',
+  start_time TIMESTAMP DEFAULT CURRENT_TIMESTAMP,
+  end_time TIMESTAMP,
+  final_day INTEGER DEFAULT 1,
+  final_temperature INTEGER DEFAULT -10,
+  total_resources_produced TEXT DEFAULT '{"coal": 0, "wood": 0, "food": 0}',
+  buildings_constructed INTEGER DEFAULT 2,
+  workers_survived INTEGER DEFAULT 5,
+  game_duration_minutes INTEGER DEFAULT 0,
+  created_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP,
+  updated_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP
+);
+
+CREATE TABLE IF NOT EXISTS resource_stats (
+  id TEXT PRIMARY KEY,
+  game_id TEXT REFERENCES games(id) ON DELETE CASCADE,
+  day INTEGER NOT NULL,
+  hour INTEGER NOT NULL,
+  coal_amount INTEGER DEFAULT 0,
+  wood_amount INTEGER DEFAULT 0,
+  food_amount INTEGER DEFAULT 0,
+  temperature INTEGER DEFAULT -10,
+  recorded_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP
+);
+
+CREATE TABLE IF NOT EXISTS building_events (
+  id TEXT PRIMARY KEY,
+  game_id TEXT REFERENCES games(id) ON DELETE CASCADE,
+  building_type VARCHAR(50) NOT NULL,
+  x_position INTEGER NOT NULL,
+  y_position INTEGER NOT NULL,
+  resources_used TEXT DEFAULT '{}',
+  construction_time TIMESTAMP DEFAULT CURRENT_TIMESTAMP
+);
+
+CREATE TABLE IF NOT EXISTS worker_stats (
+  id TEXT PRIMARY KEY,
+  game_id TEXT REFERENCES games(id) ON DELETE CASCADE,
+  worker_id INTEGER NOT NULL,
+  total_wood_harvested INTEGER DEFAULT 0,
+  total_coal_mined INTEGER DEFAULT 0,
+  total_food_produced INTEGER DEFAULT 0,
+  time_spent_working INTEGER DEFAULT 0,
+  time_spent_in_shelter INTEGER DEFAULT 0,
+  health_events TEXT DEFAULT '{}',
+  created_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP,
+  updated_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP,
+  UNIQUE(game_id, worker_id)
+);
+
+CREATE TABLE IF NOT EXISTS game_events (
+  id TEXT PRIMARY KEY,
+  game_id TEXT REFERENCES games(id) ON DELETE CASCADE,
+  event_type VARCHAR(50) NOT NULL,
+  event_data TEXT DEFAULT '{}',
+  timestamp TIMESTAMP DEFAULT CURRENT_TIMESTAMP
+);
+
+CREATE INDEX IF NOT EXISTS idx_games_player_name ON games(player_name);
+CREATE INDEX IF NOT EXISTS idx_games_final_day ON games(final_day DESC);
+CREATE INDEX IF NOT EXISTS idx_resource_stats_game_id ON resource_stats(game_id);
+CREATE INDEX IF NOT EXISTS idx_building_events_game_id ON building_events(game_id);
+CREATE INDEX IF NOT EXISTS idx_worker_stats_game_id ON worker_stats(game_id);
+CREATE INDEX IF NOT EXISTS idx_game_events_game_id ON game_events(game_id);
+
+CREATE TRIGGER IF NOT EXISTS update_games_updated_at AFTER UPDATE ON games
+FOR EACH ROW WHEN NEW.updated_at IS OLD.updated_at BEGIN
+  UPDATE games SET updated_at = CURRENT_TIMESTAMP WHERE id = NEW.id;
+END;
+
+CREATE TRIGGER IF NOT EXISTS update_worker_stats_updated_at AFTER UPDATE ON worker_stats
+FOR EACH ROW WHEN NEW.updated_at IS OLD.updated_at BEGIN
+  UPDATE worker_stats SET updated_at = CURRENT_TIMESTAMP WHERE id = NEW.id;
+END;
+"""
+
+WORKER_STATS_COLUMNS = ('id', 'game_id', 'worker_id', 'total_wood_harvested', 'total_coal_mined',
+                        'total_food_produced', 'time_spent_working', 'time_spent_in_shelter', 'health_events')
+
+class SQLiteStorage(StorageBackend):
+    name = 'sqlite'
+
+    def __init__(self, path: str = 'frostpunk.sqlite3', threaded: bool = True):
+        super().__init__(enabled=True)
+        self.path = path
+        self._lock = threading.Lock()
+        self._conn = sqlite3.connect(path, check_same_thread=False, isolation_level=None)
+        self._conn.execute('PRAGMA foreign_keys=ON')
+        if path != ':memory:':
+            self._conn.execute('PRAGMA journal_mode=WAL')
+        self._conn.executescript(SCHEMA)
+        if threaded:
+            self._start_writer()
+
+    def _execute(self, sql: str, params=()) -> sqlite3.Cursor:
+        with self._lock:
+            return self._conn.execute(sql, params)
+
+    def create_game_session(self, player_name: str = "Player") -> Optional[str]:
+        game_id = str(uuid.uuid4())
+        try:
+            self._execute('INSERT INTO games (id, player_name, start_time, total_resources_produced) '
+                          'VALUES (?, ?, ?, ?)',
+                          (game_id, player_name, datetime.now().isoformat(),
+                           json.dumps({'coal': 0, 'wood': 0, 'food': 0})))
+        except sqlite3.Error as e:
+            print(f"❌ Error creando sesión de juego: {e}")
+            return None
+        self._player_names[game_id] = player_name
+        return game_id
+
+    def update_game_session(self, game_id: str, snapshot: GameSnapshot) -> bool:
+        if not game_id:
+            return False
+        total_resources = {
+            'coal': snapshot.resources.get('COAL', 0),
+            'wood': snapshot.resources.get('WOOD', 0),
+            'food': snapshot.resources.get('FOOD', 0)
+        }
+        try:
+            self._execute('UPDATE games SET final_day = ?, final_temperature = ?, total_resources_produced = ?, '
+                          'buildings_constructed = ?, workers_survived = ?, game_duration_minutes = ? '
+                          'WHERE id = ?',
+                          (snapshot.day, snapshot.temperature, json.dumps(total_resources),
+                           snapshot.buildings_constructed, snapshot.workers_survived,
+                           snapshot.game_time // 3600, game_id))
+        except sqlite3.Error as e:
+            print(f"❌ Error actualizando sesión de juego: {e}")
+            return False
+        self._record_live_session(game_id, snapshot)
+        return True
+
+    def save_resource_stats_rows(self, game_id: str, rows: List[Dict]) -> bool:
+        if not game_id:
+            return False
+        values = [(str(uuid.uuid4()), game_id, row['day'], row['hour'], row['coal_amount'], row['wood_amount'],
+                   row['food_amount'], row['temperature']) for row in rows]
+        try:
+            self._insert_many('INSERT INTO resource_stats (id, game_id, day, hour, coal_amount, wood_amount, '
+                              'food_amount, temperature) VALUES (?, ?, ?, ?, ?, ?, ?, ?)', values)
+        except sqlite3.Error as e:
+            print(f"❌ Error guardando estadísticas de recursos: {e}")
+            return False
+        return True
+
+    def _insert_many(self, sql: str, values: List[Tuple]):
+        with self._lock, self._conn as conn:
+            conn.execute('BEGIN')
+            conn.executemany(sql, values)
+
+    def save_building_events(self, game_id: str, rows: List[Dict]) -> bool:
+        if not game_id:
+            return False
+        values = [(str(uuid.uuid4()), game_id, row['building_type'], row['x_position'], row['y_position'],
+                   json.dumps(row['resources_used'])) for row in rows]
+        try:
+            self._insert_many('INSERT INTO building_events (id, game_id, building_type, x_position, y_position, '
+                              'resources_used) VALUES (?, ?, ?, ?, ?, ?)', values)
+        except sqlite3.Error as e:
+            print(f"❌ Error guardando evento de construcción: {e}")
+            return False
+        return True
+
+    def save_game_events(self, game_id: str, rows: List[Dict]) -> bool:
+        if not game_id:
+            return False
+        values = [(str(uuid.uuid4()), game_id, row['event_type'], json.dumps(row['event_data'])) for row in rows]
+        try:
+            self._insert_many('INSERT INTO game_events (id, game_id, event_type, event_data) VALUES (?, ?, ?, ?)',
+                              values)
+        except sqlite3.Error as e:
+            print(f"❌ Error guardando eventos del juego: {e}")
+            return False
+        return True
+
+    def save_worker_stats(self, game_id: str, workers: Tuple[WorkerSnapshot, ...],
+                          diff_only: Optional[bool] = None) -> bool:
+        if not game_id:
+            return False
+        rows, signatures = self._changed_worker_rows(game_id, workers, diff_only)
+        values = [(str(uuid.uuid4()), row['game_id'], row['worker_id'], row['total_wood_harvested'],
+                   row['total_coal_mined'], row['total_food_produced'], row['time_spent_working'],
+                   row['time_spent_in_shelter'], json.dumps(row['health_events'])) for row in rows]
+        placeholders = ', '.join('?' * len(WORKER_STATS_COLUMNS))
+        updates = ', '.join(f'{column} = excluded.{column}' for column in WORKER_STATS_COLUMNS[3:])
+        sql = (f"INSERT INTO worker_stats ({', '.join(WORKER_STATS_COLUMNS)}) VALUES ({placeholders}) "
+               f"ON CONFLICT(game_id, worker_id) DO UPDATE SET {updates}")
+        batch_size = self.worker_stats_batch_size
+        try:
+            with self._lock:
+                conn = self._conn
+                for start in range(0, len(values), batch_size):
+                    with conn:
+                        conn.execute('BEGIN')
+                        conn.executemany(sql, values[start:start + batch_size])
+        except sqlite3.Error as e:
+            print(f"❌ Error guardando estadísticas de trabajadores: {e}")
+            return False
+        self._mark_workers_flushed(game_id, signatures)
+        return True
+
+    def get_leaderboard(self, limit: int = 10) -> Optional[List[Dict]]:
+        try:
+            with self._lock:
+                cursor = self._conn.execute('SELECT id, player_name, final_day, workers_survived, '
+                                            'buildings_constructed FROM games ORDER BY final_day DESC LIMIT ?',
+                                            (limit,))
+                columns = [column[0] for column in cursor.description]
+                return [dict(zip(columns, row)) for row in cursor.fetchall()]
+        except sqlite3.Error as e:
+            print(f"❌ Error obteniendo leaderboard: {e}")
+            return None
+
+    def end_game_session(self, game_id: str) -> bool:
+        if not game_id:
+            return False
+        self._close_queue()
+        self._forget_session(game_id)
+        try:
+            self._execute('UPDATE games SET end_time = ? WHERE id = ?', (datetime.now().isoformat(), game_id))
+        except sqlite3.Error as e:
+            print(f"❌ Error finalizando sesión de juego: {e}")
+            return False
+        return True
+
+    def close(self):
+        with self._lock:
+            self._conn.close()
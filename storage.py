@@ -0,0 +1,379 @@
+"""Interfaz de almacenamiento de partidas y backends disponibles.
+
+``GameState`` solo habla con un ``StorageBackend``: sesiones (crear,
+actualizar, cerrar), estadísticas de recursos, eventos de construcción,
+estadísticas de trabajadores y leaderboard. Backends:
+
+- ``supabase`` (``supabase_manager.SupabaseManager``): el original, con outbox.
+- ``sqlite`` (``sqlite_storage.SQLiteStorage``): fichero local con el mismo
+  esquema e índices que ``database_schema.sql``; para pruebas de carga y
+  despliegues sin conexión con un coste de E/S realista.
+- ``none`` (``NullStorage``): no guarda nada.
+
+Este módulo no importa ``supabase`` ni carga ``.env`` al importarse; cada
+backend carga sus dependencias al construirse.
+"""
+import itertools
+import os
+import threading
+from collections import OrderedDict
+from types import MappingProxyType
+from typing import Callable, Dict, List, Mapping, NamedTuple, Optional, Tuple
+
+from leaderboard_cache import LeaderboardCache
+
+WORKER_STATS_DECIMALS = 2  # Precisión de salud, energía y hambre en worker_stats
+
+class WorkerSnapshot(NamedTuple):
+    """Copia inmutable del estado de un trabajador"""
+    health: float
+    energy: float
+    hunger: float
+    state: str
+    dead: bool = False
+
+class GameSnapshot(NamedTuple):
+    """Copia inmutable del estado de la partida para persistir fuera del hilo principal"""
+    day: int
+    hour: int
+    temperature: int
+    game_time: int
+    resources: Mapping[str, int]
+    buildings_constructed: int
+    workers: Tuple[WorkerSnapshot, ...]
+
+    @property
+    def workers_survived(self) -> int:
+        return sum(1 for worker in self.workers if not worker.dead)
+
+    @staticmethod
+    def freeze_resources(resources: Dict) -> Mapping[str, int]:
+        """Convertir {ResourceType.COAL: 50} en una vista de solo lectura {'COAL': 50}"""
+        return MappingProxyType({getattr(k, 'name', k): v for k, v in resources.items()})
+
+class PersistenceQueue:
+    """Cola acotada de escrituras pendientes.
+
+    - Las escrituras con la misma clave de coalescencia se fusionan: solo se
+      envía la más reciente, conservando su posición en la cola.
+    - Si la cola está llena se descarta la escritura más antigua (nunca se
+      bloquea al productor, que es el bucle del juego).
+    """
+
+    def __init__(self, maxsize: int = 64):
+        self.maxsize = maxsize
+        self._pending: "OrderedDict[object, Tuple[Callable, tuple]]" = OrderedDict()
+        self._cond = threading.Condition()
+        self._unique = itertools.count()
+        self._in_flight = 0
+        self._closed = False
+        self.coalesced = 0
+        self.dropped = 0
+
+    def put(self, key, func: Callable, *args) -> bool:
+        """Encolar una escritura sin bloquear. Devuelve False si la cola está cerrada"""
+        with self._cond:
+            if self._closed:
+                return False
+            if key is not None and key in self._pending:
+                self._pending[key] = (func, args)
+                self.coalesced += 1
+                return True
+            if len(self._pending) >= self.maxsize:
+                self._pending.popitem(last=False)
+                self.dropped += 1
+            if key is None:
+                key = ('_', next(self._unique))
+            self._pending[key] = (func, args)
+            self._cond.notify()
+            return True
+
+    def get(self) -> Optional[Tuple[Callable, tuple]]:
+        """Obtener la siguiente escritura; None cuando la cola se cierra y queda vacía"""
+        with self._cond:
+            while not self._pending and not self._closed:
+                self._cond.wait()
+            if not self._pending:
+                return None
+            _, job = self._pending.popitem(last=False)
+            self._in_flight += 1
+            return job
+
+    def task_done(self):
+        with self._cond:
+            self._in_flight -= 1
+            self._cond.notify_all()
+
+    def join(self, timeout: Optional[float] = None) -> bool:
+        """Esperar a que se vacíe la cola. Devuelve False si vence el timeout"""
+        with self._cond:
+            return self._cond.wait_for(lambda: not self._pending and self._in_flight == 0, timeout)
+
+    def close(self):
+        with self._cond:
+            self._closed = True
+            self._cond.notify_all()
+
+    def __len__(self):
+        with self._cond:
+            return len(self._pending)
+
+_env_loaded = False
+
+def load_env():
+    """Cargar ``.env`` una sola vez (python-dotenv es opcional fuera del modo Supabase)"""
+    global _env_loaded
+    if _env_loaded:
+        return
+    _env_loaded = True
+    try:
+        from dotenv import load_dotenv
+    except ImportError:
+        return
+    load_dotenv()
+
+class StorageBackend:
+    """Interfaz común de persistencia. Por sí misma no guarda nada.
+
+    Los backends reales implementan los métodos ``create_game_session`` ..
+    ``end_game_session``. Si el backend arranca el hilo ``<name>-writer``
+    (``_start_writer``), el guardado automático se encola en una
+    ``PersistenceQueue`` y ``submit_autosave`` nunca bloquea el bucle del juego.
+    """
+
+    name = 'none'
+    QUEUE_SIZE = 64
+    FLUSH_TIMEOUT = 5.0  # Segundos máximos de espera al cerrar la sesión
+
+    def __init__(self, enabled: bool = False):
+        self.enabled = enabled
+        self.queue = PersistenceQueue(self.QUEUE_SIZE)
+        self._writer = None
+        # Upsert masivo de worker_stats: filas por lote y envío solo de cambios
+        self.worker_stats_batch_size = max(1, int(os.getenv('WORKER_STATS_BATCH_SIZE', '500')))
+        self.worker_stats_diff_only = os.getenv('WORKER_STATS_DIFF_ONLY', 'true').lower() == 'true'
+        # Firma de la última fila escrita de cada trabajador, por partida (se olvida al cerrarla)
+        self._flushed_workers: Dict[str, Dict[int, Tuple]] = {}
+        # Leaderboard en caché (TTL + revalidación en segundo plano) con las partidas locales
+        self.leaderboard = LeaderboardCache(self.get_leaderboard, ttl=float(os.getenv('LEADERBOARD_TTL', '30')),
+                                            limit=int(os.getenv('LEADERBOARD_LIMIT', '10')),
+                                            retry_after=float(os.getenv('LEADERBOARD_RETRY', '10')))
+        self._player_names: Dict[str, str] = {}
+
+    # Hilo de escritura
+
+    def _start_writer(self):
+        self._writer = threading.Thread(target=self._writer_loop, name=f"{self.name}-writer", daemon=True)
+        self._writer.start()
+
+    def _writer_loop(self):
+        """Hilo de fondo que ejecuta las escrituras encoladas"""
+        while True:
+            job = self.queue.get()
+            if job is None:
+                return
+            func, args = job
+            try:
+                func(*args)
+            except Exception as e:
+                print(f"❌ Error en escritura en segundo plano: {e}")
+            finally:
+                self.queue.task_done()
+
+    def _close_queue(self):
+        """Esperar a las escrituras encoladas y no aceptar más"""
+        if self._writer is not None and not self.queue.join(self.FLUSH_TIMEOUT):
+            print(f"⚠️  Quedaron {len(self.queue)} escrituras sin enviar al cerrar la sesión")
+        self.queue.close()
+
+    def submit_autosave(self, game_id: str, snapshot: GameSnapshot, resource_stats: bool = True) -> bool:
+        """Guardado automático; encolado si hay hilo de escritura.
+
+        Con ``resource_stats=False`` no se escribe la fila de recursos (la envía
+        ``ResourceRecorder`` por horas con ``submit_resource_stats``).
+        """
+        if not self.enabled or not game_id:
+            return False
+
+        if self._writer is None:
+            self.update_game_session(game_id, snapshot)
+            if resource_stats:
+                self.save_resource_stats(game_id, snapshot)
+            self._save_worker_stats_logged(game_id, snapshot.workers)
+            return True
+        self.queue.put(('games', game_id), self.update_game_session, game_id, snapshot)
+        if resource_stats:
+            self.queue.put(None, self.save_resource_stats, game_id, snapshot)
+        self.queue.put(('worker_stats', game_id), self._save_worker_stats_logged, game_id, snapshot.workers)
+        return True
+
+    def submit_events(self, game_id: str, game_rows: List[Dict], building_rows: List[Dict]) -> bool:
+        """Encolar un lote de game_events y building_events"""
+        if not self.enabled or not game_id:
+            return False
+        if self._writer is None:
+            self._save_events(game_id, game_rows, building_rows)
+            return True
+        return self.queue.put(None, self._save_events, game_id, game_rows, building_rows)
+
+    def _save_events(self, game_id: str, game_rows: List[Dict], building_rows: List[Dict]):
+        if building_rows:
+            self.save_building_events(game_id, building_rows)
+        if game_rows:
+            self.save_game_events(game_id, game_rows)
+
+    def submit_resource_stats(self, game_id: str, rows: List[Dict]) -> bool:
+        """Encolar filas agregadas de ``resource_stats``"""
+        if not self.enabled or not game_id or not rows:
+            return False
+        if self._writer is None:
+            return self.save_resource_stats_rows(game_id, rows)
+        return self.queue.put(None, self.save_resource_stats_rows, game_id, rows)
+
+    def _save_worker_stats_logged(self, game_id: str, workers: Tuple[WorkerSnapshot, ...]):
+        if self.save_worker_stats(game_id, workers):
+            print("💾 Datos guardados automáticamente")
+
+    def flush(self, timeout: Optional[float] = None) -> bool:
+        """Esperar a que terminen las escrituras pendientes"""
+        if self._writer is None:
+            return True
+        return self.queue.join(timeout)
+
+    # Utilidades para los backends
+
+    def _record_live_session(self, game_id: str, snapshot: GameSnapshot):
+        """Anotar la partida en el top-k local del leaderboard"""
+        self.leaderboard.record_session(game_id, {
+            'player_name': self._player_names.get(game_id, 'Player'),
+            'final_day': snapshot.day,
+            'workers_survived': snapshot.workers_survived,
+            'buildings_constructed': snapshot.buildings_constructed
+        })
+
+    @staticmethod
+    def _worker_signature(worker: WorkerSnapshot) -> Tuple:
+        """Salud, energía, hambre y estado tal como se escriben en la fila del trabajador"""
+        return (round(worker.health, WORKER_STATS_DECIMALS), round(worker.energy, WORKER_STATS_DECIMALS),
+                round(worker.hunger, WORKER_STATS_DECIMALS), worker.state)
+
+    def _changed_worker_rows(self, game_id: str, workers: Tuple[WorkerSnapshot, ...],
+                             diff_only: Optional[bool] = None) -> Tuple[List[Dict], List[Tuple]]:
+        """Filas de worker_stats a escribir y sus firmas (solo las que cambiaron en modo diff)"""
+        if diff_only is None:
+            diff_only = self.worker_stats_diff_only
+        flushed = self._flushed_workers.get(game_id, {})
+        rows = []
+        signatures = []
+        for i, worker in enumerate(workers):
+            signature = self._worker_signature(worker)
+            if diff_only and flushed.get(i) == signature:
+                continue
+            health, energy, hunger, state = signature
+            rows.append({
+                'game_id': game_id,
+                'worker_id': i,
+                'total_wood_harvested': 0,  # TODO: Implementar contadores
+                'total_coal_mined': 0,
+                'total_food_produced': 0,
+                'time_spent_working': 0,
+                'time_spent_in_shelter': 0,
+                'health_events': {
+                    'current_health': health,
+                    'current_energy': energy,
+                    'current_hunger': hunger,
+                    'state': state
+                }
+            })
+            signatures.append((i, signature))
+        return rows, signatures
+
+    def _mark_workers_flushed(self, game_id: str, signatures: List[Tuple]):
+        """Anotar las firmas de las filas ya escritas (ver _changed_worker_rows)"""
+        self._flushed_workers.setdefault(game_id, {}).update(signatures)
+
+    def _forget_session(self, game_id: str):
+        """Soltar el estado por partida al cerrarla"""
+        self._flushed_workers.pop(game_id, None)
+
+    # Interfaz
+
+    def create_game_session(self, player_name: str = "Player") -> Optional[str]:
+        """Crear una nueva sesión de juego y devolver su id"""
+        return None
+
+    def update_game_session(self, game_id: str, snapshot: GameSnapshot) -> bool:
+        """Actualizar la sesión de juego con datos actuales"""
+        return False
+
+    def save_resource_stats(self, game_id: str, snapshot: GameSnapshot) -> bool:
+        """Guardar estadísticas de recursos del snapshot"""
+        return self.save_resource_stats_rows(game_id, [{
+            'day': snapshot.day,
+            'hour': snapshot.hour,
+            'coal_amount': snapshot.resources.get('COAL', 0),
+            'wood_amount': snapshot.resources.get('WOOD', 0),
+            'food_amount': snapshot.resources.get('FOOD', 0),
+            'temperature': snapshot.temperature
+        }])
+
+    def save_resource_stats_rows(self, game_id: str, rows: List[Dict]) -> bool:
+        """Guardar varias filas de resource_stats (day, hour, *_amount, temperature)"""
+        return False
+
+    def save_building_event(self, game_id: str, building_type: str, x: int, y: int, resources_used: Dict) -> bool:
+        """Guardar evento de construcción"""
+        return self.save_building_events(game_id, [{
+            'building_type': building_type,
+            'x_position': x,
+            'y_position': y,
+            'resources_used': resources_used
+        }])
+
+    def save_building_events(self, game_id: str, rows: List[Dict]) -> bool:
+        """Guardar varias filas de building_events"""
+        return False
+
+    def save_game_events(self, game_id: str, rows: List[Dict]) -> bool:
+        """Guardar varias filas de game_events (event_type, event_data)"""
+        return False
+
+    def save_worker_stats(self, game_id: str, workers: Tuple[WorkerSnapshot, ...],
+                          diff_only: Optional[bool] = None) -> bool:
+        """Guardar estadísticas de trabajadores (UNIQUE(game_id, worker_id))"""
+        return False
+
+    def get_leaderboard(self, limit: int = 10) -> Optional[List[Dict]]:
+        """Consultar la tabla de puntuaciones (bloqueante; la UI usa ``self.leaderboard``).
+
+        Devuelve None si la consulta falló, para que la caché conserve las filas anteriores.
+        """
+        return []
+
+    def end_game_session(self, game_id: str) -> bool:
+        """Finalizar sesión de juego vaciando antes las escrituras pendientes"""
+        return False
+
+class NullStorage(StorageBackend):
+    """Backend que descarta todo (simulación headless, pruebas sin E/S)"""
+
+    def __init__(self):
+        super().__init__(enabled=False)
+
+BACKENDS = ('supabase', 'sqlite', 'none')
+
+def create_storage(backend: Optional[str] = None, enabled: bool = True) -> StorageBackend:
+    """Construir el backend indicado o el de ``STORAGE_BACKEND`` (por defecto supabase)"""
+    if not enabled:
+        return NullStorage()
+    load_env()
+    backend = (backend or os.getenv('STORAGE_BACKEND', 'supabase')).lower()
+    if backend == 'supabase':
+        from supabase_manager import SupabaseManager
+        return SupabaseManager()
+    if backend == 'sqlite':
+        from sqlite_storage import SQLiteStorage
+        return SQLiteStorage(os.getenv('SQLITE_PATH', 'frostpunk.sqlite3'))
+    if backend == 'none':
+        return NullStorage()
+    raise ValueError(f"Backend de almacenamiento desconocido: {backend} (opciones: {', '.join(BACKENDS)})")
@@ -1,42 +1,199 @@
+"""Backend de almacenamiento en Supabase.
+
+Las escrituras se anotan en un outbox local (``outbox.py``) y un hilo las
+reenvía en lotes. ``supabase`` y ``python-dotenv`` se importan al construir el
+backend, no al importar este módulo.
+"""
 import os
-import json
+import threading
+import time
+import uuid
 from datetime import datetime
-from typing import Dict, List, Optional
-from dotenv import load_dotenv
-from supabase import create_client, Client
+from typing import Dict, List, Optional, Tuple
+
+from outbox import Outbox, OutboxEntry, INSERT, UPDATE, UPSERT
+from storage import StorageBackend, GameSnapshot, WorkerSnapshot, load_env
 
-# Cargar variables de entorno
-load_dotenv()
+class SupabaseManager(StorageBackend):
+    name = 'supabase'
+    RETRY_INTERVAL = 2.0  # Primer reintento del outbox sin conexión (se duplica hasta RETRY_MAX)
+    RETRY_MAX = 60.0
+    # Códigos de error (PostgreSQL/PostgREST) que no cambian al reintentar: datos inválidos (22),
+    # restricciones y claves foráneas (23), columnas, tablas o permisos (42) y peticiones mal formadas
+    REJECTED_CODES = ('22', '23', '42', 'PGRST1', 'PGRST2')
 
-class SupabaseManager:
-    def __init__(self):
+    def __init__(self, enabled: bool = True):
+        load_env()
+        super().__init__(enabled=False)
+        self._drainer = None
+        self.outbox = None
+        self.online = None  # None: aún no se ha intentado enviar nada
+        self._wake = threading.Event()
+        self._drained = threading.Event()
+        self._stopping = False
         self.supabase_url = os.getenv('SUPABASE_URL')
         self.supabase_key = os.getenv('SUPABASE_KEY')
+        self.client = None
+        self._connect_lock = threading.Lock()  # Hilo del outbox y revalidación del leaderboard
         
-        if not self.supabase_url or not self.supabase_key:
+        if not enabled:
+            # Modo local explícito (simulación headless, pruebas de carga)
+            self.enabled = False
+        elif not self.supabase_url or not self.supabase_key:
             print("⚠️  Supabase no configurado. Ejecutando en modo local.")
-            self.client = None
             self.enabled = False
         else:
+            # Aunque no haya conexión las escrituras se anotan en el outbox y se envían al volver.
+            # El cliente (importar supabase/httpx) se crea en el hilo del outbox, no en el arranque
+            self.enabled = True
+            self.outbox = Outbox(os.getenv('SUPABASE_OUTBOX_PATH', 'supabase_outbox.sqlite3'),
+                                 max_rows=int(os.getenv('SUPABASE_OUTBOX_MAX_ROWS', '50000')),
+                                 parent_table='games')
+            pending = len(self.outbox)
+            if pending:
+                print(f"📤 {pending} escrituras pendientes de una ejecución anterior")
+        
+        if self.enabled:
+            self._start_writer()
+            self._drainer = threading.Thread(target=self._drain_loop, name="supabase-outbox", daemon=True)
+            self._drainer.start()
+    
+    def _connect(self) -> bool:
+        """Crear el cliente si aún no existe"""
+        with self._connect_lock:
+            if self.client is not None:
+                return True
             try:
+                from supabase import create_client
                 self.client = create_client(
                     supabase_url=self.supabase_url,
                     supabase_key=self.supabase_key
                 )
-                self.enabled = True
                 print("✅ Supabase conectado exitosamente")
+                return True
             except Exception as e:
                 print(f"❌ Error conectando a Supabase: {e}")
-                self.client = None
-                self.enabled = False
+                return False
+    
+    def _record(self, writes: List[Tuple]):
+        """Anotar escrituras (key, table, op, payload, match, on_conflict, session) y despertar al drenador"""
+        self.outbox.append_many(writes)
+        self._wake.set()
+    
+    # Drenado del outbox
+    
+    def _drain_loop(self):
+        """Hilo que reenvía el outbox a Supabase, con reintentos espaciados sin conexión"""
+        delay = self.RETRY_INTERVAL
+        while not self._stopping:
+            if self._drain():
+                delay = self.RETRY_INTERVAL
+                self._wake.wait()
+            else:
+                self._wake.wait(delay)
+                delay = min(delay * 2, self.RETRY_MAX)
+            self._wake.clear()
+    
+    def _drain(self) -> bool:
+        """Enviar el outbox por lotes hasta vaciarlo. Devuelve False si falló la conexión"""
+        while True:
+            entries = self.outbox.peek(self.worker_stats_batch_size)
+            if not entries:
+                self._drained.set()
+                return True
+            self._drained.clear()
+            if not self._connect():
+                self.online = False
+                return False
+            for batch in self._batches(entries):
+                try:
+                    rejected = self._send_or_reject(batch)
+                except Exception as e:
+                    if self.online is not False:
+                        print(f"⚠️  Sin conexión con Supabase, {len(self.outbox)} escrituras en el outbox: {e}")
+                    self.online = False
+                    return False
+                self.online = True
+                if rejected:
+                    # Un rechazo puede haberse llevado más entradas de su sesión: volver a leer la cola
+                    break
+    
+    @classmethod
+    def _is_rejection(cls, error: Exception) -> bool:
+        """El servidor rechazó los datos (reintentar no sirve); sin código es un fallo de red"""
+        code = getattr(error, 'code', None)
+        return isinstance(code, str) and code.startswith(cls.REJECTED_CODES)
+    
+    def _send_or_reject(self, batch: List[OutboxEntry]) -> bool:
+        """Enviar un lote y confirmarlo; si el servidor lo rechaza, partirlo hasta aislar las filas culpables
+
+        Las filas rechazadas pasan al dead letter del outbox. Los fallos de red
+        se propagan y el lote se queda en cola. Devuelve True si hubo rechazos.
+        """
+        try:
+            self._send(batch)
+        except Exception as e:
+            if not self._is_rejection(e):
+                raise
+            if len(batch) > 1:
+                half = len(batch) // 2
+                rejected = self._send_or_reject(batch[:half])
+                return self._send_or_reject(batch[half:]) or rejected
+            moved = self.outbox.reject(batch[0], str(e))
+            print(f"❌ Supabase rechazó una escritura en {batch[0].table}: {e} "
+                  f"({moved} entradas al dead letter del outbox)")
+            return True
+        self.outbox.ack(batch)
+        return False
+    
+    @staticmethod
+    def _batches(entries: List[OutboxEntry]) -> List[List[OutboxEntry]]:
+        """Agrupar entradas consecutivas de la misma tabla y operación (los update van de uno en uno)"""
+        batches: List[List[OutboxEntry]] = []
+        for entry in entries:
+            if batches and entry.op != UPDATE:
+                last = batches[-1][0]
+                if (last.table, last.op, last.on_conflict) == (entry.table, entry.op, entry.on_conflict):
+                    batches[-1].append(entry)
+                    continue
+            batches.append([entry])
+        return batches
+    
+    def _send(self, batch: List[OutboxEntry]):
+        first = batch[0]
+        table = self.client.table(first.table)
+        if first.op == UPDATE:
+            query = table.update(first.payload)
+            for column, value in first.match.items():
+                query = query.eq(column, value)
+            query.execute()
+        elif first.op == INSERT:
+            # El id lo genera el cliente: si un reintento llega dos veces, la segunda se ignora
+            table.upsert([entry.payload for entry in batch], on_conflict='id', ignore_duplicates=True).execute()
+        else:
+            table.upsert([entry.payload for entry in batch], on_conflict=first.on_conflict).execute()
+    
+    def flush(self, timeout: Optional[float] = None) -> bool:
+        """Esperar a que terminen las escrituras pendientes y se vacíe el outbox"""
+        if self._writer is None:
+            return True
+        deadline = None if timeout is None else time.monotonic() + timeout
+        if not self.queue.join(timeout):
+            return False
+        self._drained.clear()
+        self._wake.set()
+        remaining = None if deadline is None else max(0.0, deadline - time.monotonic())
+        return self._drained.wait(remaining)
     
     def create_game_session(self, player_name: str = "Player") -> Optional[str]:
-        """Crear una nueva sesión de juego"""
+        """Crear una nueva sesión de juego (el id se genera aquí para poder enviarla más tarde)"""
         if not self.enabled:
             return None
             
         try:
+            game_id = str(uuid.uuid4())
             data = {
+                'id': game_id,
                 'player_name': player_name,
                 'start_time': datetime.now().isoformat(),
                 'final_day': 1,
@@ -51,14 +208,15 @@ class SupabaseManager:
                 'game_duration_minutes': 0
             }
             
-            result = self.client.table('games').insert(data).execute()
-            return result.data[0]['id'] if result.data else None
+            self._record([(f'games:{game_id}', 'games', INSERT, data, None, None, game_id)])
+            self._player_names[game_id] = player_name
+            return game_id
             
         except Exception as e:
             print(f"❌ Error creando sesión de juego: {e}")
             return None
     
-    def update_game_session(self, game_id: str, game_state) -> bool:
+    def update_game_session(self, game_id: str, snapshot: GameSnapshot) -> bool:
         """Actualizar la sesión de juego con datos actuales"""
         if not self.enabled or not game_id:
             return False
@@ -66,113 +224,114 @@ class SupabaseManager:
         try:
             # Calcular recursos totales producidos
             total_resources = {
-                'coal': game_state.resources.get('COAL', 0),
-                'wood': game_state.resources.get('WOOD', 0),
-                'food': game_state.resources.get('FOOD', 0)
+                'coal': snapshot.resources.get('COAL', 0),
+                'wood': snapshot.resources.get('WOOD', 0),
+                'food': snapshot.resources.get('FOOD', 0)
             }
             
-            # Contar trabajadores vivos (salud > 0)
-            workers_alive = sum(1 for worker in game_state.workers if worker.health > 0)
-            
             data = {
-                'final_day': game_state.day,
-                'final_temperature': game_state.temperature,
+                'final_day': snapshot.day,
+                'final_temperature': snapshot.temperature,
                 'total_resources_produced': total_resources,
-                'buildings_constructed': len(game_state.buildings),
-                'workers_survived': workers_alive,
-                'game_duration_minutes': game_state.game_time // 3600  # Convertir frames a minutos
+                'buildings_constructed': snapshot.buildings_constructed,
+                'workers_survived': snapshot.workers_survived,
+                'game_duration_minutes': snapshot.game_time // 3600  # Convertir frames a minutos
             }
             
-            self.client.table('games').update(data).eq('id', game_id).execute()
+            # Misma clave en cada guardado: solo queda pendiente el update más reciente
+            self._record([(f'games:update:{game_id}', 'games', UPDATE, data, {'id': game_id}, None, game_id)])
+            self._record_live_session(game_id, snapshot)
             return True
             
         except Exception as e:
             print(f"❌ Error actualizando sesión de juego: {e}")
             return False
     
-    def save_resource_stats(self, game_id: str, game_state) -> bool:
-        """Guardar estadísticas de recursos"""
+    def save_resource_stats_rows(self, game_id: str, rows: List[Dict]) -> bool:
+        """Guardar filas de estadísticas de recursos (un único lote en el outbox)"""
         if not self.enabled or not game_id:
             return False
             
         try:
-            data = {
-                'game_id': game_id,
-                'day': game_state.day,
-                'hour': game_state.hour,
-                'coal_amount': game_state.resources.get('COAL', 0),
-                'wood_amount': game_state.resources.get('WOOD', 0),
-                'food_amount': game_state.resources.get('FOOD', 0),
-                'temperature': game_state.temperature
-            }
-            
-            self.client.table('resource_stats').insert(data).execute()
+            self._insert_rows('resource_stats', game_id, rows)
             return True
             
         except Exception as e:
             print(f"❌ Error guardando estadísticas de recursos: {e}")
             return False
     
-    def save_building_event(self, game_id: str, building_type: str, x: int, y: int, resources_used: Dict) -> bool:
-        """Guardar evento de construcción"""
+    def _insert_rows(self, table: str, game_id: str, rows: List[Dict]):
+        """Anotar inserts con id generado en el cliente (idempotentes al reintentar)"""
+        writes = []
+        for row in rows:
+            row_id = str(uuid.uuid4())
+            writes.append((f'{table}:{row_id}', table, INSERT, dict(row, id=row_id, game_id=game_id), None, None,
+                           game_id))
+        self._record(writes)
+    
+    def save_building_events(self, game_id: str, rows: List[Dict]) -> bool:
+        """Guardar eventos de construcción"""
         if not self.enabled or not game_id:
             return False
             
         try:
-            data = {
-                'game_id': game_id,
-                'building_type': building_type,
-                'x_position': x,
-                'y_position': y,
-                'resources_used': resources_used
-            }
-            
-            self.client.table('building_events').insert(data).execute()
+            self._insert_rows('building_events', game_id, rows)
             return True
             
         except Exception as e:
             print(f"❌ Error guardando evento de construcción: {e}")
             return False
     
-    def save_worker_stats(self, game_id: str, workers: List) -> bool:
-        """Guardar estadísticas de trabajadores"""
+    def save_game_events(self, game_id: str, rows: List[Dict]) -> bool:
+        """Guardar eventos del juego"""
         if not self.enabled or not game_id:
             return False
             
         try:
-            for i, worker in enumerate(workers):
-                data = {
-                    'game_id': game_id,
-                    'worker_id': i,
-                    'total_wood_harvested': 0,  # TODO: Implementar contadores
-                    'total_coal_mined': 0,
-                    'total_food_produced': 0,
-                    'time_spent_working': 0,
-                    'time_spent_in_shelter': 0,
-                    'health_events': {
-                        'current_health': worker.health,
-                        'current_energy': worker.energy,
-                        'current_hunger': worker.hunger,
-                        'state': worker.state.value
-                    }
-                }
-                
-                self.client.table('worker_stats').upsert(data).execute()
+            self._insert_rows('game_events', game_id, rows)
+            return True
             
+        except Exception as e:
+            print(f"❌ Error guardando eventos del juego: {e}")
+            return False
+    
+    def save_worker_stats(self, game_id: str, workers: Tuple[WorkerSnapshot, ...],
+                          diff_only: Optional[bool] = None) -> bool:
+        """Guardar estadísticas de trabajadores con un upsert masivo por lote.
+
+        Usa la restricción UNIQUE(game_id, worker_id) como clave de conflicto. En
+        modo diff solo se anotan los trabajadores cuya salud, energía, hambre o
+        estado cambió desde la última anotación en el outbox, que los envía en
+        lotes de ``worker_stats_batch_size`` filas.
+        """
+        if not self.enabled or not game_id:
+            return False
+        
+        rows, signatures = self._changed_worker_rows(game_id, workers, diff_only)
+        # Una entrada por trabajador: un guardado nuevo sustituye a la fila aún no enviada
+        writes = [(f"worker_stats:{game_id}:{row['worker_id']}", 'worker_stats', UPSERT, row, None,
+                   'game_id,worker_id', game_id) for row in rows]
+            
+        try:
+            if writes:
+                self._record(writes)
+            # Lo anotado en el outbox llegará a la base de datos aunque ahora no haya red
+            self._mark_workers_flushed(game_id, signatures)
             return True
             
         except Exception as e:
             print(f"❌ Error guardando estadísticas de trabajadores: {e}")
             return False
     
-    def get_leaderboard(self, limit: int = 10) -> List[Dict]:
-        """Obtener tabla de puntuaciones"""
+    def get_leaderboard(self, limit: int = 10) -> Optional[List[Dict]]:
         if not self.enabled:
             return []
+        if not self._connect():
+            return None
             
         try:
             result = self.client.table('games')\
-                .select('player_name, final_day, workers_survived, buildings_constructed')\
+                .select('id, player_name, final_day, workers_survived, buildings_constructed')\
                 .order('final_day', desc=True)\
                 .limit(limit)\
                 .execute()
@@ -181,21 +340,30 @@ class SupabaseManager:
             
         except Exception as e:
             print(f"❌ Error obteniendo leaderboard: {e}")
-            return []
+            return None
     
     def end_game_session(self, game_id: str) -> bool:
-        """Finalizar sesión de juego"""
+        """Finalizar sesión de juego vaciando antes la cola de escrituras y el outbox"""
         if not self.enabled or not game_id:
             return False
+        
+        self._close_queue()
+        self._forget_session(game_id)
             
         try:
             data = {
                 'end_time': datetime.now().isoformat()
             }
             
-            self.client.table('games').update(data).eq('id', game_id).execute()
-            return True
-            
+            self._record([(f'games:end:{game_id}', 'games', UPDATE, data, {'id': game_id}, None, game_id)])
         except Exception as e:
             print(f"❌ Error finalizando sesión de juego: {e}")
-            return False 
\ No newline at end of file
+            return False
+        
+        # Lo que no se envíe ahora queda en disco para la próxima ejecución
+        sent = self.flush(self.FLUSH_TIMEOUT)
+        if not sent:
+            print(f"📤 {len(self.outbox)} escrituras quedan en el outbox para la próxima conexión")
+        self._stopping = True
+        self._wake.set()
+        return sent
@@ -0,0 +1,49 @@
+import time
+
+from leaderboard_cache import LeaderboardCache
+
+class FlakyFetch:
+    """fetch que falla (None) o devuelve filas según ``rows``"""
+
+    def __init__(self):
+        self.calls = 0
+        self.rows = None
+
+    def __call__(self, limit):
+        self.calls += 1
+        return self.rows
+
+def wait_idle(cache):
+    deadline = time.monotonic() + 5
+    while cache._refreshing and time.monotonic() < deadline:
+        time.sleep(0.001)
+
+def test_failed_refresh_is_not_retried_every_frame():
+    fetch = FlakyFetch()
+    cache = LeaderboardCache(fetch, ttl=30, retry_after=60)
+    assert cache.rows() == []
+    wait_idle(cache)
+    assert fetch.calls == 1
+    for _ in range(100):
+        cache.rows()
+        wait_idle(cache)
+    assert fetch.calls == 1
+
+def test_retries_after_interval_and_keeps_rows():
+    fetch = FlakyFetch()
+    fetch.rows = [{'id': 'a', 'final_day': 3}]
+    cache = LeaderboardCache(fetch, ttl=0, retry_after=0.05)
+    cache.rows()
+    wait_idle(cache)
+    fetch.rows = None
+    cache.rows()
+    wait_idle(cache)
+    assert fetch.calls == 2
+    # Falló: se conservan las filas y se espera antes de reintentar
+    assert cache.rows() == [{'id': 'a', 'final_day': 3}]
+    wait_idle(cache)
+    assert fetch.calls == 2
+    time.sleep(0.06)
+    cache.rows()
+    wait_idle(cache)
+    assert fetch.calls == 3
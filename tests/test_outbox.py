@@ -0,0 +1,28 @@
+from outbox import INSERT, UPSERT, Outbox
+
+def session_writes(session, children):
+    writes = [(f'games:{session}', 'games', INSERT, {'id': session}, None, None, session)]
+    writes += [(f'worker_stats:{session}:{i}', 'worker_stats', UPSERT, {'game_id': session, 'worker_id': i},
+                None, 'game_id,worker_id', session) for i in range(children)]
+    return writes
+
+def pending(outbox):
+    return [(entry.session, entry.table) for entry in outbox.peek(1000)]
+
+def test_eviction_drops_whole_sessions():
+    outbox = Outbox(':memory:', max_rows=12, parent_table='games')
+    outbox.append_many(session_writes('a', 5))
+    outbox.append_many(session_writes('b', 5))
+    # 2 filas de más: solo cubrirlas cortaría la sesión "a" por la mitad
+    outbox.append_many(session_writes('c', 1))
+    sessions = {session for session, _ in pending(outbox)}
+    assert sessions == {'b', 'c'}
+    assert outbox.dropped == 6
+    assert len(outbox) == 8
+
+def test_current_session_keeps_its_parent_row():
+    outbox = Outbox(':memory:', max_rows=4, parent_table='games')
+    outbox.append_many(session_writes('a', 6))
+    assert pending(outbox)[0] == ('a', 'games')
+    assert len(outbox) == 4
+    assert outbox.dropped == 3
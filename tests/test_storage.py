@@ -0,0 +1,32 @@
+import json
+
+from sqlite_storage import SQLiteStorage
+from storage import WorkerSnapshot
+
+def stored_health(storage, game_id):
+    rows = storage._conn.execute('SELECT worker_id, health_events FROM worker_stats WHERE game_id = ? '
+                                 'ORDER BY worker_id', (game_id,)).fetchall()
+    return [json.loads(events)['current_health'] for _, events in rows]
+
+def test_diff_mode_writes_changes_below_one_unit():
+    storage = SQLiteStorage(':memory:', threaded=False)
+    game_id = storage.create_game_session()
+    storage.save_worker_stats(game_id, (WorkerSnapshot(80.0, 50.0, 10.0, 'trabajando'),), diff_only=True)
+    # Menos de una unidad: antes la firma truncaba a 80 y la fila no se actualizaba
+    storage.save_worker_stats(game_id, (WorkerSnapshot(80.5, 50.0, 10.0, 'trabajando'),), diff_only=True)
+    assert stored_health(storage, game_id) == [80.5]
+    # Sin cambio a la precisión guardada no se reescribe
+    rows, _ = storage._changed_worker_rows(game_id, (WorkerSnapshot(80.501, 50.0, 10.0, 'trabajando'),),
+                                           diff_only=True)
+    assert rows == []
+
+def test_end_game_session_forgets_worker_signatures():
+    storage = SQLiteStorage(':memory:', threaded=False)
+    first, second = storage.create_game_session(), storage.create_game_session()
+    workers = tuple(WorkerSnapshot(100.0, 100.0, 0.0, 'inactivo') for _ in range(3))
+    storage.save_worker_stats(first, workers, diff_only=True)
+    storage.save_worker_stats(second, workers, diff_only=True)
+    storage.end_game_session(first)
+    assert list(storage._flushed_workers) == [second]
+    storage.end_game_session(second)
+    assert storage._flushed_workers == {}
@@ -0,0 +1,26 @@
+import pygame
+
+from game import Game
+from text_cache import FONTS, TEXT_CACHE
+
+def run_one_frame(game):
+    """Un frame completo: eventos, simulación y dibujado, y salir (pygame.quit)"""
+    pygame.event.post(pygame.event.Event(pygame.QUIT))
+    game.run()
+
+def test_two_games_in_one_process():
+    for _ in range(2):
+        game = Game(enable_persistence=False)
+        run_one_frame(game)
+        # pygame.quit() invalida fuentes y superficies: no queda nada en caché
+        assert TEXT_CACHE.stats()['entries'] == 0
+        assert not FONTS._fonts
+
+def test_quit_clears_caches_every_session():
+    for _ in range(3):
+        pygame.font.init()
+        TEXT_CACHE.render("Día 1", 20, (255, 255, 255))
+        assert TEXT_CACHE.stats()['entries'] == 1
+        pygame.quit()
+        assert TEXT_CACHE.stats()['entries'] == 0
+        assert not FONTS._fonts
@@ -0,0 +1,26 @@
+import random
+
+import pytest
+
+import savestate
+from game import GameState
+
+pytest.importorskip('numpy')
+
+def run(vectorized, seed, ticks=8640):
+    """Un día con asignaciones manuales intercaladas; devuelve la instantánea y los eventos"""
+    state = GameState(enable_persistence=False, initial_workers=60, record_timeseries=False, seed=seed,
+                      vectorized_workers=vectorized)
+    events = []
+    state.events.subscribe(lambda batch, tick: events.extend(batch))
+    rng = random.Random(seed)
+    for tick in range(ticks):
+        if tick % 997 == 0:
+            worker = state.workers[rng.randrange(len(state.workers))]
+            worker.assign_to_building(state.buildings[rng.randrange(len(state.buildings))], state)
+        state.update()
+    return savestate.dumps(state), events
+
+@pytest.mark.parametrize('seed', [1, 5])
+def test_vectorized_matches_objects(seed):
+    assert run(True, seed) == run(False, seed)
@@ -0,0 +1,89 @@
+"""Caché de fuentes y de superficies de texto para la UI.
+
+Construir ``pygame.font.Font`` y llamar a ``render`` en cada frame era la mayor
+parte del coste de dibujado. ``FONTS`` crea cada fuente una sola vez y
+``TEXT_CACHE`` guarda las superficies ya renderizadas en un LRU con clave
+(fuente, texto, color), así que los contadores, las etiquetas de los árboles y
+las filas del leaderboard solo se renderizan cuando cambia su valor.
+
+Las fuentes y superficies dejan de ser válidas con ``pygame.quit()``: ambas
+cachés se vacían en ese momento, así que un segundo ``Game`` en el mismo
+proceso vuelve a crearlas. pygame olvida los ``register_quit`` al salir, por eso
+el registro se renueva con la primera fuente de cada sesión.
+"""
+from collections import OrderedDict
+from typing import Callable, Dict, Optional, Tuple
+
+import pygame
+
+FontKey = Tuple[Optional[str], int]
+
+class FontRegistry:
+    """Fuentes compartidas, creadas bajo demanda (tras pygame.init)"""
+
+    def __init__(self):
+        self._fonts: Dict[FontKey, pygame.font.Font] = {}
+        self.on_quit: Optional[Callable[[], None]] = None
+
+    def get(self, size: int, name: Optional[str] = None) -> pygame.font.Font:
+        key = (name, size)
+        font = self._fonts.get(key)
+        if font is None:
+            if not self._fonts and self.on_quit is not None:
+                pygame.register_quit(self.on_quit)
+            font = pygame.font.Font(name, size)
+            self._fonts[key] = font
+        return font
+
+    def clear(self):
+        self._fonts.clear()
+
+class TextCache:
+    """LRU de superficies de texto con contadores de aciertos, fallos y desalojos"""
+
+    def __init__(self, fonts: FontRegistry, max_entries: int = 512):
+        self.fonts = fonts
+        self.max_entries = max_entries
+        self._surfaces: "OrderedDict[tuple, pygame.Surface]" = OrderedDict()
+        self.hits = 0
+        self.misses = 0
+        self.evictions = 0
+
+    def render(self, text: str, size: int, color, name: Optional[str] = None) -> pygame.Surface:
+        """Equivalente a ``Font(name, size).render(text, True, color)`` con caché"""
+        key = (name, size, text, tuple(color))
+        surface = self._surfaces.get(key)
+        if surface is not None:
+            self._surfaces.move_to_end(key)
+            self.hits += 1
+            return surface
+
+        self.misses += 1
+        surface = self.fonts.get(size, name).render(text, True, color)
+        self._surfaces[key] = surface
+        if len(self._surfaces) > self.max_entries:
+            self._surfaces.popitem(last=False)
+            self.evictions += 1
+        return surface
+
+    def clear(self):
+        self._surfaces.clear()
+
+    def stats(self) -> Dict[str, int]:
+        return {
+            'entries': len(self._surfaces),
+            'hits': self.hits,
+            'misses': self.misses,
+            'evictions': self.evictions
+        }
+
+# Instancias compartidas por todos los renderizadores
+FONTS = FontRegistry()
+TEXT_CACHE = TextCache(FONTS)
+
+def _release():
+    """Olvidar fuentes y superficies de la sesión de pygame que termina"""
+    TEXT_CACHE.clear()
+    FONTS.clear()
+
+FONTS.on_quit = _release
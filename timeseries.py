@@ -0,0 +1,189 @@
+"""Registro de series temporales de la colonia en memoria.
+
+``save_resource_stats`` solo guardaba una fila por autoguardado, así que no se
+veía la dinámica de producción entre guardados. ``ResourceRecorder`` toma una
+muestra por tick con recursos, temperatura, trabajadores por estado y la
+producción de cada tipo de edificio, y la guarda en búferes circulares de
+``array`` tipados (unos pocos bytes por valor, sin objetos por muestra).
+
+Niveles de resolución:
+
+- ``tick``: cada muestra, los últimos ``tick_capacity`` ticks.
+- ``hour``: una fila por hora de juego; niveles (recursos, temperatura,
+  trabajadores) promediados y producción sumada.
+- ``day``: igual, por día de juego.
+
+Cada hora completada se devuelve como fila para ``resource_stats``; ``flush()``
+cierra la hora a medias al terminar la partida. Los datos
+se exportan en bloque a CSV o Parquet (este último necesita ``pyarrow``).
+"""
+import csv
+from array import array
+from typing import Dict, List, Optional, Sequence, Tuple
+
+# Columnas de producción (flujo por tick); el resto son niveles
+OUTPUT_COLUMNS = ('output_coal_mine', 'output_sawmill', 'output_farm', 'output_trees')
+RESOURCE_COLUMNS = ('coal', 'wood', 'food')
+
+class RingBuffer:
+    """Columnas tipadas de capacidad fija; al llenarse se sobrescribe lo más antiguo"""
+
+    def __init__(self, columns: Sequence[Tuple[str, str]], capacity: int):
+        self.names = tuple(name for name, _ in columns)
+        self.capacity = capacity
+        self._columns = [array(typecode, [0]) * capacity for _, typecode in columns]
+        self._next = 0
+        self.size = 0
+
+    def append(self, values: Sequence):
+        index = self._next
+        for column, value in zip(self._columns, values):
+            column[index] = value
+        self._next = (index + 1) % self.capacity
+        if self.size < self.capacity:
+            self.size += 1
+
+    def column(self, name: str) -> List:
+        """Valores de una columna en orden cronológico"""
+        data = self._columns[self.names.index(name)]
+        if self.size < self.capacity:
+            return data[:self.size].tolist()
+        return (data[self._next:] + data[:self._next]).tolist()
+
+    def rows(self) -> List[Tuple]:
+        return list(zip(*(self.column(name) for name in self.names)))
+
+    def __len__(self):
+        return self.size
+
+class _Period:
+    """Acumulador de una hora o un día en curso"""
+
+    def __init__(self, width: int, flows: Sequence[bool]):
+        self.sums = [0.0] * width
+        self.flows = flows
+        self.samples = 0
+
+    def add(self, values: Sequence):
+        sums = self.sums
+        for i, value in enumerate(values):
+            sums[i] += value
+        self.samples += 1
+
+    def close(self) -> List[float]:
+        """Niveles promediados y flujos sumados; reinicia el acumulador"""
+        samples = self.samples or 1
+        row = [total if flow else total / samples for total, flow in zip(self.sums, self.flows)]
+        self.sums = [0.0] * len(self.sums)
+        self.samples = 0
+        return row
+
+class ResourceRecorder:
+    def __init__(self, state_names: Sequence[str], building_kinds: Sequence,
+                 tick_capacity: int = 8640, hour_capacity: int = 24 * 30, day_capacity: int = 365):
+        self.state_names = tuple(state_names)
+        # Tipo de edificio -> columna de producción (el último es la tala de árboles)
+        self.building_kinds = tuple(building_kinds)
+        self.values = (RESOURCE_COLUMNS + ('temperature',) +
+                       tuple(f'workers_{name.lower()}' for name in self.state_names) + OUTPUT_COLUMNS)
+        flows = tuple(name in OUTPUT_COLUMNS for name in self.values)
+
+        tick_types = ([(name, 'l') for name in RESOURCE_COLUMNS] + [('temperature', 'h')] +
+                      [(f'workers_{name.lower()}', 'I') for name in self.state_names] +
+                      [(name, 'f') for name in OUTPUT_COLUMNS])
+        self.ticks = RingBuffer([('game_time', 'L'), ('day', 'H'), ('hour', 'B'), ('minute', 'B')] + tick_types,
+                                tick_capacity)
+        aggregate_types = [(name, 'f') for name in self.values]
+        self.hours = RingBuffer([('day', 'H'), ('hour', 'B')] + aggregate_types, hour_capacity)
+        self.days = RingBuffer([('day', 'H')] + aggregate_types, day_capacity)
+        self._hour = _Period(len(self.values), flows)
+        self._day = _Period(len(self.values), flows)
+        self._current = None  # (día, hora) del periodo en curso
+        self._output = [0.0] * len(OUTPUT_COLUMNS)
+
+    def add_output(self, kind, amount: float):
+        """Sumar producción del tick actual (``kind`` es un tipo de edificio o None para árboles)"""
+        index = self.building_kinds.index(kind) if kind is not None else len(OUTPUT_COLUMNS) - 1
+        self._output[index] += amount
+
+    def sample(self, game_time: int, day: int, hour: int, minute: int, resources: Sequence[int],
+               temperature: int, state_counts: Sequence[int]) -> Optional[Dict]:
+        """Registrar un tick. Devuelve la fila de ``resource_stats`` de la hora que acaba de cerrarse"""
+        values = list(resources) + [temperature] + list(state_counts) + self._output
+        self._output = [0.0] * len(OUTPUT_COLUMNS)
+        self.ticks.append([game_time, day, hour, minute] + values)
+
+        closed = None
+        if self._current is not None and self._current != (day, hour):
+            closed = self._close_hour(*self._current, day_changed=self._current[0] != day)
+        self._current = (day, hour)
+        self._hour.add(values)
+        return closed
+
+    def flush(self) -> Optional[Dict]:
+        """Cerrar la hora (y el día) en curso al terminar; devuelve su fila de ``resource_stats``"""
+        if self._current is None or not self._hour.samples:
+            return None
+        closed = self._close_hour(*self._current, day_changed=True)
+        self._current = None
+        return closed
+
+    def _close_hour(self, day: int, hour: int, day_changed: bool) -> Dict:
+        samples = self._hour.samples
+        row = self._hour.close()
+        self.hours.append([day, hour] + row)
+        # El día acumula las horas ponderadas por sus muestras
+        for i, flow in enumerate(self._day.flows):
+            self._day.sums[i] += row[i] if flow else row[i] * samples
+        self._day.samples += samples
+        if day_changed:
+            self.days.append([day] + self._day.close())
+        values = dict(zip(self.values, row))
+        return {
+            'day': day,
+            'hour': hour,
+            'coal_amount': round(values['coal']),
+            'wood_amount': round(values['wood']),
+            'food_amount': round(values['food']),
+            'temperature': round(values['temperature'])
+        }
+
+    # Exportación
+
+    def _tier(self, tier: str) -> RingBuffer:
+        try:
+            return {'tick': self.ticks, 'hour': self.hours, 'day': self.days}[tier]
+        except KeyError:
+            raise ValueError(f"Nivel desconocido: {tier} (tick, hour, day)") from None
+
+    def columns(self, tier: str = 'tick') -> Dict[str, List]:
+        """Todas las columnas de un nivel en orden cronológico"""
+        buffer = self._tier(tier)
+        return {name: buffer.column(name) for name in buffer.names}
+
+    def to_csv(self, path: str, tier: str = 'tick') -> int:
+        """Escribir un nivel en CSV; devuelve el número de filas"""
+        buffer = self._tier(tier)
+        rows = buffer.rows()
+        with open(path, 'w', newline='') as f:
+            writer = csv.writer(f)
+            writer.writerow(buffer.names)
+            writer.writerows(rows)
+        return len(rows)
+
+    def to_parquet(self, path: str, tier: str = 'tick') -> int:
+        """Escribir un nivel en Parquet (necesita pyarrow); devuelve el número de filas"""
+        try:
+            import pyarrow as pa
+            import pyarrow.parquet as pq
+        except ImportError:
+            raise ImportError("La exportación a Parquet necesita pyarrow (pip install pyarrow)") from None
+        table = pa.table(self.columns(tier))
+        pq.write_table(table, path)
+        return table.num_rows
+
+    def export(self, path: str, tier: str = 'tick') -> int:
+        """Exportar según la extensión (.parquet o .csv)"""
+        if path.endswith('.parquet'):
+            return self.to_parquet(path, tier)
+        return self.to_csv(path, tier)
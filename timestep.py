@@ -0,0 +1,57 @@
+"""Paso de simulación fijo, desacoplado de la velocidad de renderizado.
+
+Todas las reglas del juego están expresadas en frames de 60 Hz (``advance_time``
+cada 60, temperatura cada 600, carbón cada 300...). Antes ``Game.run`` hacía un
+``GameState.update()`` por frame dibujado, así que si el dibujado bajaba de 60
+FPS la simulación se ralentizaba con él.
+
+``FixedTimestep`` acumula el tiempo real transcurrido (multiplicado por la
+escala de tiempo) y devuelve cuántos pasos de ``1 / step_hz`` toca simular. El
+resto del acumulador (``alpha``) sirve para interpolar posiciones entre el
+último estado simulado y el anterior al dibujar. Si hay más atraso que
+``max_steps`` pasos, el exceso se descarta (``dropped_steps``) para no entrar
+en una espiral en la que cada frame tarda más que el anterior.
+"""
+from typing import Tuple
+
+SIM_HZ = 60
+TIME_SCALES: Tuple[int, ...] = (1, 4, 16)
+MAX_STEPS_PER_FRAME = 64  # 16x a 60 FPS son 16 pasos; deja margen para frames lentos
+
+class FixedTimestep:
+    def __init__(self, step_hz: int = SIM_HZ, time_scale: float = 1,
+                 max_steps: int = MAX_STEPS_PER_FRAME):
+        self.step = 1.0 / step_hz
+        self.time_scale = time_scale
+        self.max_steps = max_steps
+        self.accumulator = 0.0
+        self.total_steps = 0
+        self.dropped_steps = 0
+
+    def advance(self, real_dt: float) -> int:
+        """Sumar ``real_dt`` segundos reales y devolver los pasos a simular"""
+        self.accumulator += max(0.0, real_dt) * self.time_scale
+        steps = int(self.accumulator / self.step)
+        if steps > self.max_steps:
+            self.dropped_steps += steps - self.max_steps
+            steps = self.max_steps
+            # Se descarta el atraso; solo se conserva la fracción del paso en curso
+            self.accumulator %= self.step
+        else:
+            self.accumulator -= steps * self.step
+        self.total_steps += steps
+        return steps
+
+    @property
+    def alpha(self) -> float:
+        """Fracción del siguiente paso ya transcurrida (0..1), para interpolar"""
+        return min(1.0, self.accumulator / self.step)
+
+    def cycle_time_scale(self) -> float:
+        """Pasar a la siguiente escala de ``TIME_SCALES`` (1x -> 4x -> 16x -> 1x)"""
+        try:
+            index = (TIME_SCALES.index(self.time_scale) + 1) % len(TIME_SCALES)
+        except ValueError:
+            index = 0
+        self.time_scale = TIME_SCALES[index]
+        return self.time_scale
@@ -0,0 +1,250 @@
+"""Almacén vectorizado (struct-of-arrays) de trabajadores con NumPy.
+
+Mantiene posición, salud, energía, hambre, temporizadores y estado de todos
+los trabajadores en arrays contiguos. El movimiento va en lote, y también el
+tick completo de quien solo se toca a sí mismo (descansar, curarse, seguir
+trabajando). El resto (buscar trabajo, talar, refugiarse, morir...) se ejecuta
+por objeto en el orden de la colonia, sobre los mismos arrays, así que el
+resultado es idéntico al de ``GameState.update`` por objetos con la misma
+semilla.
+"""
+from typing import List
+
+try:
+    import numpy as np
+except ImportError:  # Dependencia opcional
+    np = None
+
+from game import (CHOP_PROGRESS, ENERGY_PER_FRAME, HEALING_AMOUNT, HEALING_PERIOD, HUNGER_PER_FRAME,
+                  MIN_WORK_ENERGY, REST_ENERGY_PER_FRAME, RESTED_ENERGY, Worker, WorkerState)
+
+# Códigos enteros de estado (WorkerState.code)
+CODE_STATES = list(WorkerState)
+IN_SHELTER = WorkerState.IN_SHELTER.code
+RESTING = WorkerState.RESTING.code
+WORKING = WorkerState.WORKING.code
+GATHERING = WorkerState.GATHERING.code
+
+def _array_property(name: str):
+    def getter(self):
+        return getattr(self._store, name)[self._index]
+
+    def setter(self, value):
+        getattr(self._store, name)[self._index] = value
+
+    return property(getter, setter)
+
+class StoredWorker(Worker):
+    """Trabajador cuyos campos numéricos viven en un VectorWorkerStore"""
+    __slots__ = ('_store', '_index')
+
+    x = _array_property('x')
+    y = _array_property('y')
+    target_x = _array_property('target_x')
+    target_y = _array_property('target_y')
+    speed = _array_property('speed')
+    health = _array_property('health')
+    energy = _array_property('energy')
+    hunger = _array_property('hunger')
+    temperature_damage_timer = _array_property('damage_timer')
+    healing_timer = _array_property('healing_timer')
+    work_progress = _array_property('work_progress')
+
+    def __init__(self, store: "VectorWorkerStore", index: int, x: int, y: int, **kwargs):
+        self._store = store
+        self._index = index
+        super().__init__(x, y, **kwargs)
+
+    @property
+    def state(self):
+        return CODE_STATES[self._store.state[self._index]]
+
+    @state.setter
+    def state(self, value):
+        self._store.state[self._index] = value.code
+
+    @property
+    def last_state(self):
+        return CODE_STATES[self._store.last_state[self._index]]
+
+    @last_state.setter
+    def last_state(self, value):
+        self._store.last_state[self._index] = value.code
+
+    @property
+    def manual_assignment(self):
+        return bool(self._store.manual[self._index])
+
+    @manual_assignment.setter
+    def manual_assignment(self, value):
+        self._store.manual[self._index] = value
+
+    @property
+    def dead(self):
+        return bool(self._store.dead[self._index])
+
+    @dead.setter
+    def dead(self, value):
+        self._store.dead[self._index] = value
+
+class VectorWorkerStore:
+    FLOAT_FIELDS = ('x', 'y', 'target_x', 'target_y', 'speed', 'health', 'energy', 'hunger')
+    INT_FIELDS = ('damage_timer', 'healing_timer', 'work_progress')
+
+    def __init__(self, capacity: int = 64):
+        if np is None:
+            raise ImportError("El backend vectorizado necesita numpy (pip install numpy)")
+        self.count = 0
+        self.capacity = max(1, capacity)
+        self.workers: List[StoredWorker] = []
+        for name in self.FLOAT_FIELDS:
+            setattr(self, name, np.zeros(self.capacity, dtype=np.float64))
+        for name in self.INT_FIELDS:
+            setattr(self, name, np.zeros(self.capacity, dtype=np.int64))
+        self.state = np.zeros(self.capacity, dtype=np.int8)
+        # Estado del tick anterior y muertes ya publicadas (eventos)
+        self.last_state = np.zeros(self.capacity, dtype=np.int8)
+        self.dead = np.zeros(self.capacity, dtype=bool)
+        self.manual = np.zeros(self.capacity, dtype=bool)  # Worker.manual_assignment
+
+    def _grow(self):
+        self.capacity *= 2
+        for name in self.FLOAT_FIELDS + self.INT_FIELDS + ('state', 'last_state', 'dead', 'manual'):
+            old = getattr(self, name)
+            new = np.zeros(self.capacity, dtype=old.dtype)
+            new[:self.count] = old[:self.count]
+            setattr(self, name, new)
+
+    def create_worker(self, x: int, y: int, **kwargs) -> StoredWorker:
+        """Crear un trabajador respaldado por los arrays del almacén (``rng``/``color`` como en Worker)"""
+        if self.count == self.capacity:
+            self._grow()
+        worker = StoredWorker(self, self.count, x, y, **kwargs)
+        self.count += 1
+        self.workers.append(worker)
+        return worker
+
+    def move(self):
+        """Movimiento hacia el objetivo para todos; devuelve los índices que se movieron"""
+        n = self.count
+        x, y = self.x[:n], self.y[:n]
+        tx, ty = self.target_x[:n], self.target_y[:n]
+        dx = tx - x
+        dy = ty - y
+        distance = np.sqrt(dx * dx + dy * dy)
+        moved = np.flatnonzero(distance > 0)
+        moving = distance > 2
+        speed, distance = self.speed[:n][moving], distance[moving]
+        x[moving] += (dx[moving] / distance) * speed
+        y[moving] += (dy[moving] / distance) * speed
+        arrived = ~moving
+        x[arrived] = tx[arrived]
+        y[arrived] = ty[arrived]
+        return moved
+
+    def _self_contained(self, game_state):
+        """Trabajadores cuyo tick (decisión y necesidades) solo les toca a ellos mismos
+
+        De noche, quien ya descansa sin asignación manual (descansar implica no
+        tener trabajo). De día, descansar y curarse en el refugio salvo en el
+        tick en que terminan, trabajar con energía suficiente (trabajar
+        implica tener edificio) y talar hasta el tick en que cae la madera
+        (talar implica tener árbol). Además no cambian de estado en update_needs:
+        ni refugio de emergencia (salud <= 20 tras el frío del tick) ni muerte.
+        """
+        n = self.count
+        state, energy, health = self.state[:n], self.energy[:n], self.health[:n]
+        sheltered = state == IN_SHELTER
+        if not game_state.is_daytime():
+            mask = (state == RESTING) & ~self.manual[:n]
+        else:
+            mask = (((state == RESTING) & (energy + REST_ENERGY_PER_FRAME < RESTED_ENERGY)) |
+                    (sheltered & (self.healing_timer[:n] + 1 < HEALING_PERIOD)) |
+                    (((state == WORKING) | ((state == GATHERING) & (self.work_progress[:n] + 1 < CHOP_PROGRESS))) &
+                     (energy >= MIN_WORK_ENERGY)))
+        after_cold = health
+        band = game_state.cold_band
+        if band is not None:
+            period, health_loss, _ = band
+            after_cold = np.where(~sheltered & (self.damage_timer[:n] + 1 >= period), health - health_loss, health)
+        mask &= (state == self.last_state[:n]) & ~self.dead[:n]
+        mask &= (after_cold > 20) | (sheltered & (health > 0))
+        return mask
+
+    def _update_self_contained(self, indices, game_state):
+        """Worker.update_behaviour y Worker.update_needs en lote para ``indices`` (ver _self_contained)"""
+        state = self.state[indices]
+        sheltered = state == IN_SHELTER
+        energy = self.energy[indices]
+        if game_state.is_daytime():
+            energy[state == RESTING] += REST_ENERGY_PER_FRAME
+            self.healing_timer[indices[sheltered]] += 1
+            self.work_progress[indices[state == GATHERING]] += 1
+
+        # Consumo de energía y hambre
+        self.hunger[indices] = np.minimum(self.hunger[indices] + HUNGER_PER_FRAME, 100)
+        energy -= ENERGY_PER_FRAME
+        timer = self.damage_timer[indices] + 1
+
+        # Daño por frío solo fuera del refugio; la banda (balance.COLD_BANDS) es la misma para todos
+        band = game_state.cold_band
+        if band is None:
+            timer[:] = 0
+        else:
+            period, health_loss, energy_loss = band
+            hit = ~sheltered & (timer >= period)
+            self.health[indices[hit]] -= health_loss
+            energy[hit] -= energy_loss
+            timer[hit | sheltered] = 0
+        self.energy[indices] = np.maximum(energy, 0)
+        self.damage_timer[indices] = timer
+
+    def skip_ticks(self, indices: List[int], ticks: int, daytime: bool, band):
+        """Worker.skip_ticks en lote para los trabajadores ``indices``"""
+        indices = np.asarray(indices, dtype=np.intp)
+        health, energy, timer = self.health[indices], self.energy[indices], self.damage_timer[indices]
+        self.hunger[indices] = np.minimum(self.hunger[indices] + ticks * HUNGER_PER_FRAME, 100)
+        energy -= ticks * ENERGY_PER_FRAME
+        if daytime:
+            healing = self.healing_timer[indices]
+            first = np.maximum(1, HEALING_PERIOD - healing)
+            heals = np.where(ticks < first, 0, 1 + (ticks - first) // HEALING_PERIOD)
+            health += heals * HEALING_AMOUNT
+            self.healing_timer[indices] = np.where(heals > 0, ticks - first - (heals - 1) * HEALING_PERIOD,
+                                                   healing + ticks)
+            timer[:] = 0
+        elif band is None:
+            timer[:] = 0
+        else:
+            period, health_loss, energy_loss = band
+            first = np.maximum(1, period - timer)
+            hits = np.where(ticks < first, 0, 1 + (ticks - first) // period)
+            np.maximum(health - hits * health_loss, 0, out=health)
+            energy -= hits * energy_loss
+            timer = np.where(hits > 0, ticks - first - (hits - 1) * period, timer + ticks)
+        self.health[indices] = health
+        self.energy[indices] = np.maximum(energy, 0)
+        self.damage_timer[indices] = timer
+
+    def update(self, game_state):
+        """Tick completo con el mismo resultado que Worker.update para cada trabajador en orden
+
+        El movimiento va en lote. Los trabajadores de _self_contained deciden y
+        gastan en lote: no publican eventos ni tocan nada compartido, así que da
+        igual en qué momento del tick se apliquen. El resto ejecuta
+        Worker.update_behaviour y Worker.update_needs por objeto y en orden,
+        así que cada uno ve las plazas, árboles y comida que dejaron los
+        anteriores, igual que en el camino por objetos.
+        """
+        move = game_state.worker_index.move
+        workers = self.workers
+        moved = self.move()
+        # Worker.bounds() leído de los arrays de una vez, sin pasar por las propiedades
+        for index, x, y in zip(moved.tolist(), self.x[moved].tolist(), self.y[moved].tolist()):
+            move(workers[index], (x - 4, y - 4, x + 4, y + 4), (x, y))
+        contained = self._self_contained(game_state)
+        self._update_self_contained(np.flatnonzero(contained), game_state)
+        for index in np.flatnonzero(~(contained | self.dead[:self.count])).tolist():
+            worker = workers[index]
+            worker.update_behaviour(game_state)
+            worker.update_needs(game_state)